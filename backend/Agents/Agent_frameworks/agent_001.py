@@ -1,14 +1,36 @@
 # agent_001.py
 import os
 import json
-import requests
+import time
+import asyncio
 import urllib.parse
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
+from backend.utils.deadline import Deadline
 from backend.utils.json_utils import parse_response_string
-from backend.llms.groq_llm.inference import GroqInference
+from backend.llms.groq_llm.inference import get_groq_llm
+from backend.utils.http_client import get_async_http_client, get_http_client
+from backend.Agents.Agent_frameworks.search_cache import dedupe_queries, get_search_cache
+from backend.Agents.Agent_frameworks.context_compaction import compact_messages, format_observation
+from backend.utils.token_counter import count_message_tokens
+from backend.utils.lazy import get_lazy_registry
 
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
-llm = GroqInference()
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "5"))
+SEARCH_QUERY_TIMEOUT = float(os.getenv("SEARCH_QUERY_TIMEOUT", "10"))
+NO_SEARCH_RESULTS = {"summary": "No search results could be retrieved.", "places": []}
+SEARCH_SKIPPED = {"summary": "Web search skipped: the time budget for this request is nearly used up.", "places": []}
+# Web search is optional: once less than this share of the request budget is left it is skipped
+SEARCH_MIN_BUDGET_SHARE = 0.2
+AGENT_MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", "8"))
+# Seconds kept back for the forced finishtool call once the agent's time is nearly up
+AGENT_FINISH_RESERVE = float(os.getenv("AGENT_FINISH_RESERVE", "5"))
+
+FORCE_FINISH_PROMPT = (
+    "Stop searching: {reason}. Call finishtool now and summarize what you have found so far. "
+    "Respond only with the finishtool JSON."
+)
 
 SYSTEM_PROMPT = """
 You are an expert in searching through the web and providing information after analyzing the search results you get. 
@@ -64,68 +86,205 @@ Instructions:
     """
 
 class BrowserAgent:
-    def __init__(self):
+    def __init__(self, deadline: Optional[Deadline] = None, max_iterations: int = AGENT_MAX_ITERATIONS):
         self.stored_table = None 
+        self.deadline = deadline
+        self.max_iterations = max_iterations
+        self.last_summary = None
+        # Per-iteration prompt sizes, to measure what context compaction saves
+        self.prompt_token_log = []
 
     def run(self, query):
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"User query: {query}"},
-        ]
+        messages = self._initial_messages(query)
+        iteration = 0
 
         while True:
+            iteration += 1
+            exhausted = self._budget_exhausted(iteration)
+            if exhausted:
+                return self._force_finish(messages, exhausted)
+
             print("\n=== Generating LLM Response ===")
-            response = llm.generate_response(messages=messages)
-            # print(f"Raw LLM response: {response}")
-            messages.append({"role": "assistant", "content": response})
-            response_object = parse_response_string(response)
-            # print(f"Debug:- response_object: {response_object}")
-
-            if response_object is None:
-                messages.append({"role": "user", "content": "Invalid response format, please try again."})
+            try:
+                response = get_groq_llm().generate_response(messages=self._prompt(messages, iteration), timeout=self._llm_timeout())
+            except Exception as e:
+                if self.deadline is None or not self.deadline.expired():
+                    raise
+                print(f"⚠️ LLM call ran out of time: {e}")
+                return self._fallback_response()
+            step = self._parse_step(messages, response)
+            if step is None:
+                continue
+            tool_name, parameters = step
+
+            print(f"\n=== Running Tool: {tool_name} ===")
+            # print(json.dumps(parameters, indent=2))
+
+            try:
+                continue_flag, tool_response = self._run_tool(tool_name, parameters)
+            except Exception as e:
+                print(f"Tool execution failed: {e}")
+                messages.append({"role": "user", "content": f"Tool execution failed with error: {e}"})
                 continue
 
-            tool_name = response_object.get("tool_name")
-            parameters = response_object.get("parameters")
+            final_response = self._handle_tool_result(messages, continue_flag, tool_response)
+            if final_response is not None:
+                return final_response
+
+    async def arun(self, query):
+        """Non-blocking variant of `run` for use inside the event loop."""
+        messages = self._initial_messages(query)
+        iteration = 0
+
+        while True:
+            iteration += 1
+            exhausted = self._budget_exhausted(iteration)
+            if exhausted:
+                return await self._aforce_finish(messages, exhausted)
 
-            if not tool_name or not isinstance(parameters, dict):
-                messages.append({"role": "user", "content": "Invalid tool name or parameters received, please try again."})
+            print("\n=== Generating LLM Response ===")
+            try:
+                response = await get_groq_llm().agenerate_response(messages=self._prompt(messages, iteration), timeout=self._llm_timeout())
+            except Exception as e:
+                if self.deadline is None or not self.deadline.expired():
+                    raise
+                print(f"⚠️ LLM call ran out of time: {e}")
+                return self._fallback_response()
+            step = self._parse_step(messages, response)
+            if step is None:
                 continue
+            tool_name, parameters = step
 
             print(f"\n=== Running Tool: {tool_name} ===")
-            # print(json.dumps(parameters, indent=2))
 
             try:
-                continue_flag, tool_response = self._run_tool(tool_name, parameters)
+                continue_flag, tool_response = await self._arun_tool(tool_name, parameters)
             except Exception as e:
                 print(f"Tool execution failed: {e}")
                 messages.append({"role": "user", "content": f"Tool execution failed with error: {e}"})
                 continue
 
-            if continue_flag:
-                print("\n=== Tool Output ===")
-                print(tool_response)
-                messages.append({
-                    "role": "user",
-                    "content": f"Observations: {json.dumps(tool_response, indent=2)}"
-                })
-                print("\n=== Generating Next Tool Call ===")
-            else:
-                print("\n=== Final Response ===")
-                final_response = {
-                    "summary": tool_response.get("summary", ""),
-                    "table": self.stored_table or "No table found."
-                }
-                # print(json.dumps(final_response, indent=2))
+            final_response = self._handle_tool_result(messages, continue_flag, tool_response)
+            if final_response is not None:
                 return final_response
 
+    def _budget_exhausted(self, iteration):
+        """Return why the agent has to stop now, or None while it may keep going."""
+        if iteration > self.max_iterations:
+            return f"the limit of {self.max_iterations} steps has been reached"
+        if self.deadline is not None and self.deadline.remaining() < AGENT_FINISH_RESERVE:
+            return "the time budget for this request is almost used up"
+        return None
+
+    def _prompt(self, messages, iteration):
+        """Compact the transcript to the context budget and log what the step will cost."""
+        prompt = compact_messages(messages)
+        raw_tokens = count_message_tokens(messages)
+        prompt_tokens = count_message_tokens(prompt)
+        self.prompt_token_log.append({"iteration": iteration, "raw_tokens": raw_tokens, "prompt_tokens": prompt_tokens})
+        print(f"🧮 Iteration {iteration}: {prompt_tokens} prompt tokens "
+              f"({raw_tokens} uncompacted, {len(prompt)}/{len(messages)} messages)")
+        return prompt
+
+    def _llm_timeout(self):
+        return self.deadline.timeout() if self.deadline is not None else None
+
+    def _force_finish(self, messages, reason):
+        print(f"\n=== Forcing finishtool: {reason} ===")
+        messages.append({"role": "user", "content": FORCE_FINISH_PROMPT.format(reason=reason)})
+        if self.deadline is None or not self.deadline.expired():
+            try:
+                response = get_groq_llm().generate_response(messages=self._prompt(messages, "finish"), timeout=self._llm_timeout())
+                final_response = self._finish_from_response(messages, response)
+                if final_response is not None:
+                    return final_response
+            except Exception as e:
+                print(f"⚠️ Forced finish failed: {e}")
+        return self._fallback_response()
+
+    async def _aforce_finish(self, messages, reason):
+        print(f"\n=== Forcing finishtool: {reason} ===")
+        messages.append({"role": "user", "content": FORCE_FINISH_PROMPT.format(reason=reason)})
+        if self.deadline is None or not self.deadline.expired():
+            try:
+                response = await get_groq_llm().agenerate_response(messages=self._prompt(messages, "finish"), timeout=self._llm_timeout())
+                final_response = self._finish_from_response(messages, response)
+                if final_response is not None:
+                    return final_response
+            except Exception as e:
+                print(f"⚠️ Forced finish failed: {e}")
+        return self._fallback_response()
+
+    def _finish_from_response(self, messages, response):
+        step = self._parse_step(messages, response)
+        if step is None or step[0] != "finishtool":
+            return None
+        return self._handle_tool_result(messages, *self._run_tool(*step))
+
+    def _fallback_response(self):
+        """Final response built from what the agent gathered before its budget ran out."""
+        print("\n=== Final Response (budget exhausted) ===")
+        return {
+            "summary": self.last_summary or "The search could not be completed in time.",
+            "table": self.stored_table or "No table found."
+        }
+
+    def _initial_messages(self, query):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"User query: {query}"},
+        ]
+
+    def _parse_step(self, messages, response):
+        """Record the LLM turn and return (tool_name, parameters), or None to ask again."""
+        # print(f"Raw LLM response: {response}")
+        messages.append({"role": "assistant", "content": response})
+        response_object = parse_response_string(response)
+        # print(f"Debug:- response_object: {response_object}")
+
+        if response_object is None:
+            messages.append({"role": "user", "content": "Invalid response format, please try again."})
+            return None
+
+        tool_name = response_object.get("tool_name")
+        parameters = response_object.get("parameters")
+
+        if not tool_name or not isinstance(parameters, dict):
+            messages.append({"role": "user", "content": "Invalid tool name or parameters received, please try again."})
+            return None
+        return tool_name, parameters
+
+    def _handle_tool_result(self, messages, continue_flag, tool_response):
+        """Append the observation, or build the final response once the agent is done."""
+        if continue_flag:
+            if isinstance(tool_response, dict) and tool_response.get("summary") not in (
+                    None, "", NO_SEARCH_RESULTS["summary"], SEARCH_SKIPPED["summary"]):
+                self.last_summary = tool_response["summary"]
+            print("\n=== Tool Output ===")
+            print(tool_response)
+            messages.append({
+                "role": "user",
+                "content": format_observation(tool_response)
+            })
+            print("\n=== Generating Next Tool Call ===")
+            return None
+
+        print("\n=== Final Response ===")
+        final_response = {
+            "summary": tool_response.get("summary", ""),
+            "table": self.stored_table or "No table found."
+        }
+        # print(json.dumps(final_response, indent=2))
+        return final_response
+
     def _run_tool(self, tool_name, input):
+        tools = get_agent_tools()
         if tool_name == "browsertool":
-            return True, BrowserTool().execute(input)
+            return True, tools["browsertool"].execute(input, deadline=self.deadline)
         elif tool_name == "thinkingtool":
-            return True, ThinkingTool().execute(input)
+            return True, tools["thinkingtool"].execute(input)
         elif tool_name == "tablecreatortool":
-            table_dicts = TableCreatorTool().execute(input).get("table", [])
+            table_dicts = tools["tablecreatortool"].execute(input).get("table", [])
             self.stored_table = self._convert_table_to_markdown(table_dicts)
             return True, {"table": self.stored_table}
         elif tool_name == "finishtool":
@@ -134,6 +293,14 @@ class BrowserAgent:
         else:
             return False, {"summary": f"Unknown tool: {tool_name}", "table": ""}
 
+    async def _arun_tool(self, tool_name, input):
+        tools = get_agent_tools()
+        if tool_name == "browsertool":
+            return True, await tools["browsertool"].aexecute(input, deadline=self.deadline)
+        elif tool_name == "thinkingtool":
+            return True, await tools["thinkingtool"].aexecute(input)
+        return self._run_tool(tool_name, input)
+
     def _convert_table_to_markdown(self, table_rows):
         if not table_rows:
             return "No table data available."
@@ -157,45 +324,135 @@ class Tool(ABC):
     def execute(self, input):
         pass
 
+    async def aexecute(self, input):
+        return await asyncio.to_thread(self.execute, input)
+
 
 class BrowserTool(Tool):
-    def __init__(self):
+    def __init__(self, max_concurrency=SEARCH_MAX_CONCURRENCY, query_timeout=SEARCH_QUERY_TIMEOUT):
         super().__init__("browsertool", "This is a tool to browse the web")
+        self.max_concurrency = max_concurrency
+        self.query_timeout = query_timeout
+
+    def _search_timeout(self, deadline):
+        """Per-query timeout, or None when the request budget no longer allows a web search."""
+        if deadline is None:
+            return self.query_timeout
+        if deadline.remaining() < deadline.total * SEARCH_MIN_BUDGET_SHARE:
+            return None
+        return min(self.query_timeout, deadline.remaining())
+
+    def execute(self, input, deadline: Optional[Deadline] = None):
+        """Search all queries concurrently, within the request's `deadline` when given."""
+        queries = dedupe_queries(input.get("queries", []))
+        if not queries:
+            return "No queries to search for"
+        query_timeout = self._search_timeout(deadline)
+        if query_timeout is None:
+            return dict(SEARCH_SKIPPED, places=[])
+
+        # Searches run concurrently; a failed or slow query contributes no snippets
+        # instead of holding up the whole step.
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(queries)))
+        try:
+            futures = [executor.submit(self.search, query) for query in queries]
+            search_deadline = time.monotonic() + query_timeout
+            final_snippets = []
+            for query, future in zip(queries, futures):
+                try:
+                    results = future.result(timeout=max(0.0, search_deadline - time.monotonic()))
+                    final_snippets.append(self.get_snippets_from_search_results(results))
+                except Exception as e:
+                    print(f"⚠️ Search skipped for '{query}': {e.__class__.__name__} {e}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        joined_snippets = self._join_snippets(final_snippets)
+        if not joined_snippets:
+            return dict(NO_SEARCH_RESULTS, places=[])
+        return {
+            "summary": self.summarize_snippets(joined_snippets, timeout=self._llm_timeout(deadline)),
+            "places": self.extract_places_from_snippets(joined_snippets)
+        }
 
-    def execute(self, input):
-        queries = input.get("queries", [])
+    async def aexecute(self, input, deadline: Optional[Deadline] = None):
+        queries = dedupe_queries(input.get("queries", []))
         if not queries:
             return "No queries to search for"
+        query_timeout = self._search_timeout(deadline)
+        if query_timeout is None:
+            return dict(SEARCH_SKIPPED, places=[])
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _search(query):
+            async with semaphore:
+                return await asyncio.wait_for(self.asearch(query), timeout=query_timeout)
 
+        outcomes = await asyncio.gather(*[_search(query) for query in queries], return_exceptions=True)
         final_snippets = []
-        for query in queries:
-            results = self.search(query)
-            snippets = self.get_snippets_from_search_results(results)
-            final_snippets.append(snippets)
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"⚠️ Search skipped for '{query}': {outcome.__class__.__name__} {outcome}")
+                continue
+            final_snippets.append(self.get_snippets_from_search_results(outcome))
 
-        joined_snippets = "\n\n".join(final_snippets)
-        summary = self.summarize_snippets(joined_snippets)
+        joined_snippets = self._join_snippets(final_snippets)
+        if not joined_snippets:
+            return dict(NO_SEARCH_RESULTS, places=[])
         return {
-            "summary": summary,
+            "summary": await self.asummarize_snippets(joined_snippets, timeout=self._llm_timeout(deadline)),
             "places": self.extract_places_from_snippets(joined_snippets)
         }
 
+    def _llm_timeout(self, deadline):
+        return deadline.timeout() if deadline is not None else None
+
+    def _join_snippets(self, final_snippets):
+        return "\n\n".join(snippets for snippets in final_snippets if snippets)
+
     def search(self, query):
+        cache = get_search_cache()
+        cached = cache.get(query)
+        if cached is not None:
+            return cached
+
         url = "https://google.serper.dev/search"
         headers = {"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
-        response = requests.post(url, headers=headers, data=json.dumps({"q": query}))
-        return response.json()
+        response = get_http_client().post(url, headers=headers, data=json.dumps({"q": query}))
+        results = response.json()
+        cache.set(query, results)
+        return results
+
+    async def asearch(self, query):
+        cache = get_search_cache()
+        cached = await asyncio.to_thread(cache.get, query)
+        if cached is not None:
+            return cached
+
+        url = "https://google.serper.dev/search"
+        headers = {"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
+        response = await get_async_http_client().post(url, headers=headers, content=json.dumps({"q": query}))
+        results = response.json()
+        await asyncio.to_thread(cache.set, query, results)
+        return results
 
     def get_snippets_from_search_results(self, results):
         return "\n".join([
             result.get("snippet", "") for result in results.get("organic", [])
         ])
 
-    def summarize_snippets(self, snippets):
-        return llm.generate_response([
+    def summarize_snippets(self, snippets, timeout=None):
+        return get_groq_llm().generate_response(self._summary_messages(snippets), timeout=timeout)
+
+    async def asummarize_snippets(self, snippets, timeout=None):
+        return await get_groq_llm().agenerate_response(self._summary_messages(snippets), timeout=timeout)
+
+    def _summary_messages(self, snippets):
+        return [
             {"role": "system", "content": "You are a summarizer."},
             {"role": "user", "content": f"Summarize these snippets:\n{snippets}"}
-        ])
+        ]
 
     def extract_places_from_snippets(self, snippets):
         import re
@@ -211,7 +468,16 @@ class ThinkingTool(Tool):
         query = input.get("query", "")
         return self.generate_queries(query)
 
+    async def aexecute(self, input):
+        query = input.get("query", "")
+        response = await get_groq_llm().agenerate_response(self._planner_messages(query))
+        return parse_response_string(response)
+
     def generate_queries(self, query):
+        response = get_groq_llm().generate_response(self._planner_messages(query))
+        return parse_response_string(response)
+
+    def _planner_messages(self, query):
         prompt = """
         You are an expert planner. Break down the user query into 5 max optimized search queries in JSON.
         Return this format:
@@ -221,11 +487,10 @@ class ThinkingTool(Tool):
         }
         Only JSON response.
         """
-        response = llm.generate_response([
+        return [
             {"role": "system", "content": prompt},
             {"role": "user", "content": f"User query: {query}"}
-        ])
-        return parse_response_string(response)
+        ]
 
 
 class TableCreatorTool(Tool):
@@ -253,3 +518,19 @@ class TableCreatorTool(Tool):
 
     def generate_map_link(self, place):
         return f"https://www.google.com/maps/search/?q={urllib.parse.quote(place)}"
+
+
+def _create_agent_tools():
+    return {
+        "browsertool": BrowserTool(),
+        "thinkingtool": ThinkingTool(),
+        "tablecreatortool": TableCreatorTool(),
+    }
+
+
+_agent_tools = get_lazy_registry().register("agent_tools", _create_agent_tools)
+
+
+def get_agent_tools():
+    """Tool instances shared by every agent run; per-request state (the deadline) is passed per call."""
+    return _agent_tools.get()
@@ -0,0 +1,118 @@
+#context_compaction.py
+import os
+import json
+from typing import Any, Dict, List
+from backend.utils.json_utils import load_object_from_string, pre_process_the_json_response
+from backend.utils.token_counter import count_message_tokens, truncate_to_tokens
+
+AGENT_CONTEXT_TOKEN_BUDGET = int(os.getenv("AGENT_CONTEXT_TOKEN_BUDGET", "6000"))
+# Tool exchanges at the end of the transcript that are always sent verbatim
+AGENT_KEEP_RECENT_OBSERVATIONS = int(os.getenv("AGENT_KEEP_RECENT_OBSERVATIONS", "2"))
+# Size older observations are cut down to
+OBSERVATION_SUMMARY_TOKENS = int(os.getenv("AGENT_OBSERVATION_SUMMARY_TOKENS", "200"))
+
+OBSERVATION_PREFIX = "Observations: "
+OMITTED_STEPS_NOTE = "[{count} earlier agent messages omitted to stay within the context budget]"
+# The system prompt and the user query are never compacted
+PINNED_MESSAGES = 2
+
+
+def format_observation(tool_response: Any) -> str:
+    """Serialize a tool result for the transcript without indentation or extra whitespace."""
+    return OBSERVATION_PREFIX + json.dumps(tool_response, separators=(",", ":"), ensure_ascii=False)
+
+
+def _is_observation(message: Dict[str, str]) -> bool:
+    return message["role"] == "user" and message["content"].startswith(OBSERVATION_PREFIX)
+
+
+def _compact_observation(content: str, max_tokens: int) -> str:
+    """Keep only the summary of an old tool result (or a truncated prefix when it has none)."""
+    try:
+        payload = json.loads(content[len(OBSERVATION_PREFIX):])
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict) and payload.get("summary"):
+        compacted = {"summary": truncate_to_tokens(str(payload["summary"]), max_tokens)}
+        omitted = [key for key in payload if key != "summary"]
+        if omitted:
+            compacted["omitted"] = omitted
+        return format_observation(compacted)
+    return truncate_to_tokens(content, max_tokens)
+
+
+def _compact_assistant(content: str) -> str:
+    """Drop the reasoning from an old tool call; the tool name and parameters are what matter later."""
+    try:
+        payload = load_object_from_string(pre_process_the_json_response(content))
+    except Exception:
+        return content
+    if not isinstance(payload, dict) or "tool_name" not in payload:
+        return content
+    payload.pop("reasoning", None)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def _omitted_note(dropped: int) -> List[Dict[str, str]]:
+    return [{"role": "user", "content": OMITTED_STEPS_NOTE.format(count=dropped)}] if dropped else []
+
+
+def compact_messages(
+        messages: List[Dict[str, str]],
+        token_budget: int = AGENT_CONTEXT_TOKEN_BUDGET,
+        keep_recent: int = AGENT_KEEP_RECENT_OBSERVATIONS,
+        observation_tokens: int = OBSERVATION_SUMMARY_TOKENS,
+    ) -> List[Dict[str, str]]:
+    """
+    Return the agent transcript to send to the LLM, kept under `token_budget` tokens.
+
+    The system prompt, the user query and the last `keep_recent` tool exchanges stay
+    verbatim. Older observations are reduced to their summary and older tool calls
+    lose their reasoning; if that is still over budget the oldest messages are
+    dropped, and as a last resort the recent observations are cut down as well.
+    The original list is not modified.
+
+    Args:
+        messages: Full agent transcript, system prompt first
+        token_budget: Maximum prompt tokens to send
+        keep_recent: Number of most recent observations left untouched
+        observation_tokens: Size older observations are truncated to
+
+    Returns:
+        List[Dict[str, str]]: The compacted transcript
+    """
+    pinned = [dict(message) for message in messages[:PINNED_MESSAGES]]
+    history = [dict(message) for message in messages[PINNED_MESSAGES:]]
+    if count_message_tokens(pinned + history) <= token_budget:
+        return pinned + history
+
+    observation_indexes = [i for i, message in enumerate(history) if _is_observation(message)]
+    if keep_recent <= 0:
+        recent_start = len(history)
+    elif len(observation_indexes) < keep_recent:
+        recent_start = 0
+    else:
+        recent_start = observation_indexes[-keep_recent]
+    # Keep the tool call that produced the first recent observation with it
+    if recent_start > 0 and history[recent_start - 1]["role"] == "assistant":
+        recent_start -= 1
+
+    older, recent = history[:recent_start], history[recent_start:]
+    for message in older:
+        if _is_observation(message):
+            message["content"] = _compact_observation(message["content"], observation_tokens)
+        elif message["role"] == "assistant":
+            message["content"] = _compact_assistant(message["content"])
+
+    # The note about dropped messages counts against the budget too
+    dropped = 0
+    while older and count_message_tokens(pinned + _omitted_note(dropped) + older + recent) > token_budget:
+        older.pop(0)
+        dropped += 1
+    older = _omitted_note(dropped) + older
+
+    if count_message_tokens(pinned + older + recent) > token_budget:
+        for message in recent:
+            if _is_observation(message):
+                message["content"] = _compact_observation(message["content"], observation_tokens)
+    return pinned + older + recent
@@ -0,0 +1,83 @@
+#search_cache.py
+import os
+import re
+import json
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+from backend.utils.disk_cache import SQLiteCache
+
+DEFAULT_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "search_cache/serper.sqlite3")
+DEFAULT_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+
+
+def normalize_search_query(query: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive form of a search query."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = re.sub(r"[^\w\s]", " ", query)
+    return " ".join(query.split())
+
+
+def dedupe_queries(queries: List[str]) -> List[str]:
+    """Drop queries that normalize to one already in the list, keeping the first spelling."""
+    seen = set()
+    unique = []
+    for query in queries:
+        key = normalize_search_query(query)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+
+class SearchCache:
+    """Persistent TTL cache of web search results keyed by the normalized query."""
+
+    def __init__(
+            self,
+            path: str = DEFAULT_CACHE_PATH,
+            ttl_seconds: float = DEFAULT_TTL_SECONDS,
+            max_entries: int = DEFAULT_MAX_ENTRIES,
+        ) -> None:
+        self._disk = SQLiteCache(path, table="search_results", ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[Dict]:
+        blob = self._disk.get(normalize_search_query(query))
+        with self._lock:
+            if blob is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(blob)
+
+    def set(self, query: str, results: Dict) -> None:
+        # Error payloads (quota, bad key, ...) have no organic results and are not cached
+        if not isinstance(results, dict) or "organic" not in results:
+            return
+        self._disk.set(normalize_search_query(query), json.dumps(results).encode("utf-8"))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide search cache shared by every BrowserTool."""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
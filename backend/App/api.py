@@ -1,10 +1,46 @@
 # api.py
+import os
+import json
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.Conversations.chat import chat_with_tourism_assistant
+from fastapi.responses import StreamingResponse
+from backend.Conversations.chat import achat_with_tourism_assistant, astream_chat_with_tourism_assistant
+from backend.Conversations.response_cache import get_response_cache
+from backend.embeddings.embedding_cache import get_embedding_cache
+from backend.embeddings.micro_batching import MicroBatchingEmbedding
+from backend.memory.chroma_memory.retrieve_data import get_query_embedding_model, retrieval_stats
+from backend.Agents.Agent_frameworks.search_cache import get_search_cache
 from backend.App.models import ChatRequest, ChatResponse
+from backend.utils.deadline import DEFAULT_CHAT_DEADLINE_SECONDS, Deadline
+from backend.utils.http_client import aclose_async_http_client, close_http_client
+from backend.utils.lazy import get_lazy_registry
+from backend.memory.mem0_memory.memory_queue import get_memory_queue
 
-app = FastAPI(title="TravelMate AI", version="1.0")
+# Load models and clients at startup instead of on the first request
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application-lifetime resources: the Chroma client and collections, embedding and
+    LLM clients and the agent tools live in the lazy registry, are shared by all
+    requests, and are released here on shutdown (the memory queue drains first).
+    """
+    # Start the mem0 writers now so jobs left over from the last run get written
+    get_memory_queue()
+    if WARM_UP_ON_STARTUP:
+        # In the background, so /health answers while the models load
+        warm_up = asyncio.ensure_future(asyncio.to_thread(get_lazy_registry().warm_up))
+    yield
+    if WARM_UP_ON_STARTUP and not warm_up.done():
+        await asyncio.gather(warm_up, return_exceptions=True)
+    await get_lazy_registry().aclose()
+    await aclose_async_http_client()
+    close_http_client()
+
+app = FastAPI(title="TravelMate AI", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,14 +58,66 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/stats/caches")
+async def cache_stats():
+    return {
+        "answer_cache": get_response_cache().stats(),
+        "embedding_cache": get_embedding_cache().stats(),
+        "search_cache": get_search_cache().stats(),
+    }
+
+@app.get("/stats/resources")
+async def resource_stats():
+    return get_lazy_registry().status()
+
+@app.get("/stats/embeddings")
+async def embedding_stats():
+    model = get_query_embedding_model()
+    return model.stats() if isinstance(model, MicroBatchingEmbedding) else {"micro_batching": False}
+
+@app.get("/stats/retrieval")
+async def retrieval_latency_stats():
+    return retrieval_stats()
+
+@app.get("/stats/memory_queue")
+async def memory_queue_stats():
+    return get_memory_queue().stats()
+
+def _request_deadline(request: ChatRequest) -> Deadline:
+    """Clients may ask for a tighter budget than the server default, never a looser one."""
+    if request.deadline_seconds is None:
+        return Deadline(DEFAULT_CHAT_DEADLINE_SECONDS)
+    return Deadline(min(request.deadline_seconds, DEFAULT_CHAT_DEADLINE_SECONDS))
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
-    assistant_answer, _ = chat_with_tourism_assistant(
+    assistant_answer, _ = await achat_with_tourism_assistant(
         user_id=request.user_id,
         user_query=request.user_query,
-        messages=[]
+        messages=[],
+        deadline=_request_deadline(request),
     )
     return {
         "summary": assistant_answer.get("summary", ""),
         "table": assistant_answer.get("table", ""),
     }
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Server-sent events: `table` when the agent is done, `token` per summary token, then `done` (or `error`)."""
+    deadline = _request_deadline(request)
+
+    async def event_source():
+        async for event in astream_chat_with_tourism_assistant(
+            user_id=request.user_id,
+            user_query=request.user_query,
+            messages=[],
+            deadline=deadline,
+        ):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,12 @@
 # models.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from backend.utils.deadline import MAX_CHAT_DEADLINE_SECONDS
 
 class ChatRequest(BaseModel):
     user_id: str
     user_query: str
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=MAX_CHAT_DEADLINE_SECONDS)
 
 class ChatResponse(BaseModel):
     summary: Optional[str] = ""
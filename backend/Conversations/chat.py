@@ -1,16 +1,41 @@
 #chat.py
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
+import os
 import json
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
 
-from backend.memory.chroma_memory.retrieve_data import query_chroma
-from backend.llms.groq_llm.inference import GroqInference
-from backend.memory.mem0_memory.try_mem0 import extract_relevant_memories, add_memory_in_mem0
+from backend.memory.chroma_memory.retrieve_data import aquery_chroma, get_query_embedding_model, query_chroma
+from backend.llms.groq_llm.inference import get_groq_llm
+from backend.memory.mem0_memory.try_mem0 import extract_relevant_memories
+from backend.memory.mem0_memory.memory_queue import get_memory_queue
 from backend.utils.json_utils import pre_process_the_json_response, load_object_from_string
 from backend.Agents.Agent_frameworks.agent_001 import BrowserAgent
-from backend.utils.semantic import is_similar_query
-
-groq_llm = GroqInference()
+from backend.utils.semantic import is_similar_to_any
+from backend.Conversations.pipeline import Stage, StageContext, StageExecutor
+from backend.Conversations.response_cache import get_response_cache
+from backend.utils.deadline import Deadline
+
+# Speculative stages trade extra upstream calls for latency; they are kept only
+# when the rephrased query embeds at least this close to the raw one. A discarded
+# agent run has already paid for its web searches and LLM calls, so agent
+# speculation is off unless enabled.
+SPECULATE_RETRIEVAL = os.getenv("SPECULATE_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+SPECULATE_AGENT = os.getenv("SPECULATE_AGENT", "false").lower() in ("1", "true", "yes")
+SPECULATION_SIMILARITY_THRESHOLD = 0.9
+
+ANSWER_CACHE_ENABLED = True
+
+# Share of the request deadline each optional or bounded stage may spend, and the
+# seconds kept back for the final summary once the agent is running.
+MEMORY_BUDGET_SHARE = 0.15
+REPHRASE_BUDGET_SHARE = 0.15
+RETRIEVAL_BUDGET_SHARE = 0.2
+SUMMARY_RESERVE_SECONDS = 6.0
+MIN_STAGE_SECONDS = 0.5
+
+AGENT_FAILURE_SUMMARY = "Agent execution failed."
+SUMMARY_FAILURE_MESSAGE = "⚠️ Sorry, I couldn't generate a summary right now."
+CHAT_FAILURE_MESSAGE = "⚠️ Sorry, something went wrong while planning your trip. Please try again."
 
 
 def print_section(title: str = "", content: str = "", separator: str = "=") -> None:
@@ -24,8 +49,7 @@ def print_section(title: str = "", content: str = "", separator: str = "=") -> N
         print(f"{separator * 80}")
 
 
-def chat_with_tourism_assistant(user_id: str, user_query: str, messages: List[Dict[str, str]]):
-    system_prompt = """
+SYSTEM_PROMPT = """
         -You are a tourism expert and historian. Use provided structured knowledge (documents, tables, maps) and user memories to answer the query clearly.
         -Return only a **clear, concise summary** in markdown format — no tables, no follow-up questions.
         -Do not repeat the user query. Do not use headings like "Summary of the answer". Just write the answer in plain markdown text.
@@ -39,41 +63,32 @@ def chat_with_tourism_assistant(user_id: str, user_query: str, messages: List[Di
         - Always return the final answer in markdown.
     """.strip()
 
-    print_section()
-
-    use_memory = False
-    memories = []
 
+def _select_memories(user_query: str, user_id: str) -> List[str]:
+    """Fetch the user's memories from mem0 and keep them only when they relate to the query."""
     if not user_query.strip() or len(user_query.strip().split()) < 3:
-        use_memory = True
-        memories = extract_relevant_memories(user_query, user_id) or []
-    else:
-        candidate_memories = extract_relevant_memories(user_query, user_id) or []
-        for mem in candidate_memories:
-            if is_similar_query(user_query, mem):
-                use_memory = True
-                memories = candidate_memories
-                break
-
-    print_section("🧠 Memories", "\n".join(memories) if memories else "No relevant memories used.")
+        return extract_relevant_memories(user_query, user_id) or []
 
-    rephrased_query = rephrase_user_query(user_query, memories)
-    print_section("🔁 Rephrased Query", rephrased_query)
+    candidate_memories = extract_relevant_memories(user_query, user_id) or []
+    if is_similar_to_any(user_query, candidate_memories):
+        return candidate_memories
+    return []
 
-    documents = query_chroma(rephrased_query, collection_name="travel_data", n_results=3)
-    print_section("📚 Knowledge Source", documents)
 
-    agent = BrowserAgent()
+def _enqueue_memory(user_id: str, user_query: str) -> None:
+    """Hand the query to the background mem0 writer; the response never waits for it."""
     try:
-        agent_output = agent.run(rephrased_query)
-        print_section("🛠️ Agent Output", json.dumps(agent_output, indent=2) if isinstance(agent_output, dict) else str(agent_output))
+        get_memory_queue().submit(user_id, user_query)
     except Exception as e:
-        print(f"⚠️ Exception during agent.run(): {e}")
-        import traceback
-        traceback.print_exc()
-        agent_output = {"summary": "Agent execution failed.", "table": ""}
+        print(f"⚠️ Failed to queue memory for mem0: {e}")
+
+
+def _format_agent_output(agent_output) -> str:
+    return json.dumps(agent_output, indent=2) if isinstance(agent_output, dict) else str(agent_output)
+
 
-    messages.append({"role": "system", "content": system_prompt})
+def _append_summary_prompt(messages: List[Dict[str, str]], user_query: str, memories: List[str], documents: str, agent_output) -> None:
+    messages.append({"role": "system", "content": SYSTEM_PROMPT})
     messages.append({
         "role": "user",
         "content": f"""
@@ -86,30 +101,416 @@ def chat_with_tourism_assistant(user_id: str, user_query: str, messages: List[Di
         {documents}
 
         AGENT OUTPUT:
-        {json.dumps(agent_output, indent=2) if isinstance(agent_output, dict) else str(agent_output)}
+        {_format_agent_output(agent_output)}
         """
     })
 
-    try:
-        summary = groq_llm.generate_response(messages).strip()
-    except Exception as e:
-        summary = "⚠️ Sorry, I couldn't generate a summary right now."
 
+def _finalize_answer(messages: List[Dict[str, str]], summary: str, agent_output) -> Dict[str, str]:
     assistant_answer = {
         "summary": summary,
         "table": agent_output.get("table", "") if isinstance(agent_output, dict) else ""
     }
-
     messages.append({"role": "assistant", "content": f"{summary}\n\n{assistant_answer['table']}"})
+    return assistant_answer
+
+
+def chat_with_tourism_assistant(
+        user_id: str,
+        user_query: str,
+        messages: List[Dict[str, str]],
+        deadline: Optional[Deadline] = None,
+    ):
+    print_section()
+
+    memories = _select_memories(user_query, user_id)
+    print_section("🧠 Memories", "\n".join(memories) if memories else "No relevant memories used.")
+
+    rephrased_query = rephrase_user_query(user_query, memories)
+    print_section("🔁 Rephrased Query", rephrased_query)
+
+    documents = query_chroma(rephrased_query, collection_name="travel_data", n_results=3)
+    print_section("📚 Knowledge Source", documents)
+
+    agent = BrowserAgent(deadline=deadline.child(reserve=SUMMARY_RESERVE_SECONDS) if deadline is not None else None)
+    try:
+        agent_output = agent.run(rephrased_query)
+        print_section("🛠️ Agent Output", _format_agent_output(agent_output))
+    except Exception as e:
+        print(f"⚠️ Exception during agent.run(): {e}")
+        import traceback
+        traceback.print_exc()
+        agent_output = {"summary": AGENT_FAILURE_SUMMARY, "table": ""}
+
+    _append_summary_prompt(messages, user_query, memories, documents, agent_output)
+
+    try:
+        summary = get_groq_llm().generate_response(messages, timeout=deadline.timeout() if deadline is not None else None).strip()
+    except Exception as e:
+        summary = _summary_fallback(agent_output)
+
+    assistant_answer = _finalize_answer(messages, summary, agent_output)
 
-    with ThreadPoolExecutor() as executor:
-        executor.submit(add_memory_in_mem0, user_query, user_id)
+    _enqueue_memory(user_id, user_query)
 
     return assistant_answer, messages
 
 
-def rephrase_user_query(query: str, memories: List[str]) -> str:
-    llm = GroqInference()
+async def _within_budget(ctx: StageContext, coro, share: float, fallback, label: str):
+    """Await `coro` for at most `share` of the request deadline, returning `fallback` if it runs out."""
+    deadline: Optional[Deadline] = ctx.inputs.get("deadline")
+    if deadline is None:
+        return await coro
+    timeout = deadline.share(share)
+    if timeout < MIN_STAGE_SECONDS:
+        coro.close()
+        print(f"⏱️ Skipping {label}: its share of the time budget is gone ({deadline})")
+        return fallback
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"⏱️ {label} timed out after {timeout:.2f}s, continuing without it")
+        return fallback
+
+
+def _agent_deadline(ctx: StageContext) -> Optional[Deadline]:
+    deadline: Optional[Deadline] = ctx.inputs.get("deadline")
+    return deadline.child(reserve=SUMMARY_RESERVE_SECONDS) if deadline is not None else None
+
+
+def _summary_timeout(ctx: StageContext) -> Optional[float]:
+    deadline: Optional[Deadline] = ctx.inputs.get("deadline")
+    return deadline.timeout() if deadline is not None else None
+
+
+async def _memories_stage(ctx: StageContext) -> List[str]:
+    memories = await _within_budget(
+        ctx,
+        asyncio.to_thread(_select_memories, ctx.inputs["user_query"], ctx.inputs["user_id"]),
+        MEMORY_BUDGET_SHARE,
+        [],
+        "mem0 memory search",
+    )
+    print_section("🧠 Memories", "\n".join(memories) if memories else "No relevant memories used.")
+    return memories
+
+
+async def _rephrase_stage(ctx: StageContext) -> str:
+    rephrased_query = await _within_budget(
+        ctx,
+        arephrase_user_query(ctx.inputs["user_query"], await ctx.get("memories")),
+        REPHRASE_BUDGET_SHARE,
+        ctx.inputs["user_query"],
+        "query rephrasing",
+    )
+    print_section("🔁 Rephrased Query", rephrased_query)
+    return rephrased_query
+
+
+async def _speculation_check_stage(ctx: StageContext) -> bool:
+    """Decide whether work started on the raw query is still valid for the rephrased one."""
+    if not (SPECULATE_RETRIEVAL or SPECULATE_AGENT):
+        return False
+    user_query = ctx.inputs["user_query"]
+    rephrased_query = await ctx.get("rephrase")
+    if " ".join(user_query.lower().split()) == " ".join(rephrased_query.lower().split()):
+        return True
+
+    embedding_model = get_query_embedding_model()
+    embeddings = await _within_budget(
+        ctx,
+        embedding_model.agenerate_batch_embeddings([user_query, rephrased_query]),
+        RETRIEVAL_BUDGET_SHARE,
+        None,
+        "speculation check",
+    )
+    if embeddings is None:
+        print("Speculation discarded (no embeddings within the time budget)")
+        return False
+    raw_embedding, rephrased_embedding = embeddings
+    similarity = embedding_model.calculate_cosine_similarity(raw_embedding, rephrased_embedding)
+    keep = similarity >= SPECULATION_SIMILARITY_THRESHOLD
+    print(f"Speculation {'kept' if keep else 'discarded'} (raw/rephrased similarity {similarity:.3f})")
+    return keep
+
+
+async def _answer_cache_stage(ctx: StageContext) -> Dict:
+    """
+    Look the rephrased query up in the semantic answer cache.
+
+    The cache is shared by all users, so it is bypassed whenever the user's mem0
+    memories take part in the answer: such answers are neither served from it nor
+    stored in it.
+    """
+    if not ANSWER_CACHE_ENABLED or await ctx.get("memories"):
+        return {"embedding": None, "answer": None}
+    embedding = await _within_budget(
+        ctx,
+        get_query_embedding_model().agenerate_embedding(await ctx.get("rephrase")),
+        RETRIEVAL_BUDGET_SHARE,
+        None,
+        "answer cache lookup",
+    )
+    if embedding is None:
+        return {"embedding": None, "answer": None}
+    return {"embedding": embedding, "answer": get_response_cache().lookup(embedding)}
+
+
+async def _cached_answer(ctx: StageContext, speculative_stage: str, speculation_enabled: bool):
+    """Return the cached answer, if any, and drop the now useless speculative stage."""
+    cached = (await ctx.get("answer_cache"))["answer"]
+    if cached is not None and speculation_enabled:
+        ctx.cancel(speculative_stage)
+    return cached
+
+
+def _store_answer(user_query: str, results: Dict, assistant_answer: Dict[str, str]) -> None:
+    # Answers conditioned on one user's memories must not be served to anyone else
+    if results.get("memories"):
+        return
+    cache_result = results.get("answer_cache") or {}
+    if cache_result.get("embedding") is None or cache_result.get("answer") is not None:
+        return
+    agent_output = results.get("agent")
+    if not isinstance(agent_output, dict) or agent_output.get("summary") == AGENT_FAILURE_SUMMARY:
+        return
+    if not assistant_answer["summary"] or assistant_answer["summary"] == SUMMARY_FAILURE_MESSAGE:
+        return
+    try:
+        get_response_cache().store(results.get("rephrase", user_query), cache_result["embedding"], assistant_answer)
+    except Exception as e:
+        print(f"⚠️ Failed to cache answer: {e}")
+
+
+async def _speculative_documents_stage(ctx: StageContext) -> str:
+    return await _within_budget(
+        ctx,
+        aquery_chroma(ctx.inputs["user_query"], collection_name="travel_data", n_results=3),
+        RETRIEVAL_BUDGET_SHARE,
+        None,
+        "speculative retrieval",
+    )
+
+
+async def _documents_stage(ctx: StageContext) -> str:
+    if await _cached_answer(ctx, "speculative_documents", SPECULATE_RETRIEVAL) is not None:
+        return ""
+
+    documents = None
+    if SPECULATE_RETRIEVAL and await ctx.get("speculation_check"):
+        try:
+            documents = await ctx.get("speculative_documents")
+        except Exception as e:
+            print(f"⚠️ Speculative retrieval failed, retrying: {e}")
+    elif SPECULATE_RETRIEVAL:
+        ctx.cancel("speculative_documents")
+
+    if documents is None:
+        documents = await _within_budget(
+            ctx,
+            aquery_chroma(await ctx.get("rephrase"), collection_name="travel_data", n_results=3),
+            RETRIEVAL_BUDGET_SHARE,
+            "",
+            "document retrieval",
+        )
+    print_section("📚 Knowledge Source", documents)
+    return documents
+
+
+async def _speculative_agent_stage(ctx: StageContext):
+    return await BrowserAgent(deadline=_agent_deadline(ctx)).arun(ctx.inputs["user_query"])
+
+
+async def _agent_stage(ctx: StageContext):
+    cached = await _cached_answer(ctx, "speculative_agent", SPECULATE_AGENT)
+    if cached is not None:
+        return cached
+
+    agent_output = None
+    if SPECULATE_AGENT and await ctx.get("speculation_check"):
+        try:
+            agent_output = await ctx.get("speculative_agent")
+        except Exception as e:
+            print(f"⚠️ Speculative agent run failed, retrying: {e}")
+    elif SPECULATE_AGENT:
+        ctx.cancel("speculative_agent")
+
+    if agent_output is None:
+        try:
+            agent_output = await BrowserAgent(deadline=_agent_deadline(ctx)).arun(await ctx.get("rephrase"))
+        except Exception as e:
+            print(f"⚠️ Exception during agent.arun(): {e}")
+            import traceback
+            traceback.print_exc()
+            agent_output = {"summary": AGENT_FAILURE_SUMMARY, "table": ""}
+    print_section("🛠️ Agent Output", _format_agent_output(agent_output))
+    return agent_output
+
+
+async def _summary_stage(ctx: StageContext) -> str:
+    cached = (await ctx.get("answer_cache"))["answer"]
+    if cached is not None:
+        return cached["summary"]
+
+    messages = ctx.inputs["messages"]
+    _append_summary_prompt(
+        messages,
+        ctx.inputs["user_query"],
+        await ctx.get("memories"),
+        await ctx.get("documents"),
+        await ctx.get("agent"),
+    )
+    try:
+        return (await get_groq_llm().agenerate_response(messages, timeout=_summary_timeout(ctx))).strip()
+    except Exception as e:
+        print(f"⚠️ Summary generation failed: {e}")
+        return _summary_fallback(await ctx.get("agent"))
+
+
+def _summary_fallback(agent_output) -> str:
+    """Without a summary from the LLM, fall back to the agent's own summary when it has one."""
+    if isinstance(agent_output, dict) and agent_output.get("summary") not in (None, "", AGENT_FAILURE_SUMMARY):
+        return agent_output["summary"]
+    return SUMMARY_FAILURE_MESSAGE
+
+
+def _build_chat_stages(include_summary: bool = True) -> List[Stage]:
+    """
+    Stage DAG of the chat pipeline.
+
+    Retrieval and the agent run start speculatively on the raw query while mem0 and
+    the rephrase are in flight; once the rephrased query is known they are kept if it
+    embeds close enough to the raw one, otherwise cancelled and rerun on it. A hit in
+    the semantic answer cache short-circuits retrieval, the agent and the summary.
+    """
+    stages = [Stage("memories", _memories_stage)]
+    if SPECULATE_RETRIEVAL:
+        stages.append(Stage("speculative_documents", _speculative_documents_stage, speculative=True))
+    if SPECULATE_AGENT:
+        stages.append(Stage("speculative_agent", _speculative_agent_stage, speculative=True))
+    stages += [
+        Stage("rephrase", _rephrase_stage, deps=["memories"]),
+        Stage("answer_cache", _answer_cache_stage, deps=["memories", "rephrase"]),
+        Stage("speculation_check", _speculation_check_stage, deps=["rephrase"]),
+        Stage("documents", _documents_stage, deps=["answer_cache", "speculation_check"]),
+        Stage("agent", _agent_stage, deps=["answer_cache", "speculation_check"]),
+    ]
+    if include_summary:
+        stages.append(Stage("summary", _summary_stage, deps=["memories", "documents", "agent"]))
+    return stages
+
+
+async def achat_with_tourism_assistant(
+        user_id: str,
+        user_query: str,
+        messages: List[Dict[str, str]],
+        deadline: Optional[Deadline] = None,
+    ):
+    """
+    Non-blocking variant of `chat_with_tourism_assistant`.
+
+    The pipeline runs as a stage DAG (see `_build_chat_stages`): retrieval and the
+    agent run concurrently, and both can start speculatively on the raw query. LLM,
+    embedding and search calls use async clients; mem0, the sentence-transformer gate
+    and Chroma's SQLite access run in worker threads, so the event loop stays free.
+
+    With a `deadline`, optional stages are skipped or cut short once their share of
+    the budget is gone and the agent is forced to finish in time for the summary.
+    """
+    print_section()
+
+    executor = StageExecutor(_build_chat_stages())
+    results = await executor.run({"user_id": user_id, "user_query": user_query, "messages": messages, "deadline": deadline})
+    executor.log_timings()
+
+    assistant_answer = _finalize_answer(messages, results["summary"], results["agent"])
+    _store_answer(user_query, results, assistant_answer)
+
+    # submit() does SQLite I/O and may wait for room, so keep it off the event loop
+    await asyncio.to_thread(_enqueue_memory, user_id, user_query)
+
+    return assistant_answer, messages
+
+
+async def astream_chat_with_tourism_assistant(
+        user_id: str,
+        user_query: str,
+        messages: List[Dict[str, str]],
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[Dict[str, str]]:
+    """
+    Streaming variant of `achat_with_tourism_assistant`.
+
+    Yields events as they become available:
+        {"event": "table", "data": markdown}  as soon as the agent has finished
+        {"event": "token", "data": text}      for every summary token from the LLM
+        {"event": "done",  "data": ""}        once the answer is complete
+        {"event": "error", "data": message}   instead of "done" when the pipeline failed
+
+    The memory write is queued as soon as the pipeline stages finish, before any
+    summary token is sent, so it survives a client that disconnects mid-stream.
+    The answer is cached only once the summary is complete, before "done".
+    """
+    print_section()
+
+    events: "asyncio.Queue" = asyncio.Queue()
+
+    def _on_stage_done(name: str, result) -> None:
+        if name == "agent":
+            table = result.get("table", "") if isinstance(result, dict) else ""
+            events.put_nowait({"event": "table", "data": table})
+
+    executor = StageExecutor(_build_chat_stages(include_summary=False))
+    run = asyncio.ensure_future(executor.run(
+        {"user_id": user_id, "user_query": user_query, "messages": messages, "deadline": deadline},
+        on_stage_done=_on_stage_done,
+    ))
+    try:
+        try:
+            while not run.done() or not events.empty():
+                get_event = asyncio.ensure_future(events.get())
+                await asyncio.wait({run, get_event}, return_when=asyncio.FIRST_COMPLETED)
+                if get_event.done():
+                    yield get_event.result()
+                else:
+                    get_event.cancel()
+            results = run.result()
+        finally:
+            if not run.done():
+                run.cancel()
+    except Exception as e:
+        print(f"⚠️ Chat pipeline failed: {e}")
+        import traceback
+        traceback.print_exc()
+        yield {"event": "error", "data": CHAT_FAILURE_MESSAGE}
+        return
+    executor.log_timings()
+    await asyncio.to_thread(_enqueue_memory, user_id, user_query)
+
+    tokens: List[str] = []
+    cached = results["answer_cache"]["answer"]
+    if cached is not None:
+        tokens.append(cached["summary"])
+        yield {"event": "token", "data": cached["summary"]}
+    else:
+        _append_summary_prompt(messages, user_query, results["memories"], results["documents"], results["agent"])
+        try:
+            timeout = deadline.timeout() if deadline is not None else None
+            async for token in get_groq_llm().astream_response(messages, timeout=timeout):
+                tokens.append(token)
+                yield {"event": "token", "data": token}
+        except Exception as e:
+            print(f"⚠️ Summary stream failed: {e}")
+            if not tokens:
+                tokens.append(_summary_fallback(results["agent"]))
+                yield {"event": "token", "data": tokens[0]}
+
+    assistant_answer = _finalize_answer(messages, "".join(tokens).strip(), results["agent"])
+    _store_answer(user_query, results, assistant_answer)
+    yield {"event": "done", "data": ""}
+
+
+def _rephrase_messages(query: str, memories: List[str]) -> List[Dict[str, str]]:
     memory_text = "\n".join(memories)
 
     system_prompt = """
@@ -134,11 +535,16 @@ def rephrase_user_query(query: str, memories: List[str]) -> str:
         Note: Only respond with the JSON containing the rephrased query.
     """
 
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
 
+
+def rephrase_user_query(query: str, memories: List[str]) -> str:
+    llm = get_groq_llm()
+    messages = _rephrase_messages(query, memories)
+
     try:
         response = llm.generate_response(messages)
         pre_processed = pre_process_the_json_response(response)
@@ -147,3 +553,16 @@ def rephrase_user_query(query: str, memories: List[str]) -> str:
     except Exception as e:
         print("⚠️ Error in rephrasing, using original query.")
         return query
+
+
+async def arephrase_user_query(query: str, memories: List[str]) -> str:
+    messages = _rephrase_messages(query, memories)
+
+    try:
+        response = await get_groq_llm().agenerate_response(messages)
+        pre_processed = pre_process_the_json_response(response)
+        obj = load_object_from_string(pre_processed)
+        return obj["rephrased_query"]
+    except Exception as e:
+        print("⚠️ Error in rephrasing, using original query.")
+        return query
@@ -0,0 +1,150 @@
+#pipeline.py
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+
+class StageContext:
+    """Handle passed to every stage to read inputs and other stages' results."""
+
+    def __init__(self, executor: "StageExecutor", stage_name: str) -> None:
+        self._executor = executor
+        self._stage_name = stage_name
+        self.inputs: Dict[str, Any] = executor.inputs
+
+    async def get(self, name: str) -> Any:
+        """Await another stage's result (declared or not) and record the dependency."""
+        self._executor._used_deps[self._stage_name].add(name)
+        return await self._executor._tasks[name]
+
+    def cancel(self, name: str) -> None:
+        """Discard another stage, e.g. a speculative one whose guess turned out wrong."""
+        task = self._executor._tasks[name]
+        if not task.done():
+            task.cancel()
+
+
+StageFn = Callable[[StageContext], Awaitable[Any]]
+
+
+class Stage:
+    def __init__(self, name: str, fn: StageFn, deps: Iterable[str] = (), speculative: bool = False) -> None:
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.speculative = speculative
+
+
+class StageExecutor:
+    """
+    Runs a DAG of async stages, each as soon as its declared dependencies finish.
+
+    Independent stages run concurrently. Stages may also await other stages lazily
+    through `StageContext.get`, which lets speculative work start early and be kept
+    or cancelled later. After a run, `timings` holds per-stage start/end offsets and
+    `critical_path()` the chain of stages that determined the total latency.
+    """
+
+    def __init__(self, stages: List[Stage]) -> None:
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown or later stage {dep}")
+            self.stages[stage.name] = stage
+        self.inputs: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, "asyncio.Task"] = {}
+        self._used_deps: Dict[str, Set[str]] = {}
+        self._t0 = 0.0
+        self._on_stage_done: Optional[Callable[[str, Any], None]] = None
+
+    async def _run_stage(self, stage: Stage) -> Any:
+        timing = self.timings[stage.name]
+        try:
+            for dep in stage.deps:
+                await self._tasks[dep]
+            timing["start"] = time.perf_counter() - self._t0
+            result = await stage.fn(StageContext(self, stage.name))
+            timing["status"] = "done"
+            if self._on_stage_done is not None:
+                self._on_stage_done(stage.name, result)
+            return result
+        except asyncio.CancelledError:
+            timing["status"] = "cancelled"
+            raise
+        except Exception:
+            timing["status"] = "failed"
+            raise
+        finally:
+            timing["end"] = time.perf_counter() - self._t0
+
+    async def run(
+            self,
+            inputs: Optional[Dict[str, Any]] = None,
+            on_stage_done: Optional[Callable[[str, Any], None]] = None,
+        ) -> Dict[str, Any]:
+        """
+        Run every stage and return {stage_name: result}.
+
+        Cancelled speculative stages are left out of the result; the first
+        non-speculative failure is raised after the remaining stages are cancelled.
+        `on_stage_done(name, result)` is called as each stage finishes, so callers
+        can forward partial results before the whole DAG completes.
+        """
+        self.inputs = dict(inputs or {})
+        self._on_stage_done = on_stage_done
+        self.timings = {name: {"start": None, "end": None, "status": "pending"} for name in self.stages}
+        self._used_deps = {name: set(stage.deps) for name, stage in self.stages.items()}
+        self._t0 = time.perf_counter()
+        self._tasks = {
+            name: asyncio.ensure_future(self._run_stage(stage)) for name, stage in self.stages.items()
+        }
+
+        results: Dict[str, Any] = {}
+        try:
+            for name, task in self._tasks.items():
+                try:
+                    results[name] = await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    if not task.cancelled():
+                        raise
+                except Exception:
+                    if not self.stages[name].speculative:
+                        raise
+        finally:
+            for task in self._tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        return results
+
+    def critical_path(self) -> List[str]:
+        """Walk back from the last stage to finish through the dependency that finished last."""
+        finished = {name: t for name, t in self.timings.items() if t["status"] == "done"}
+        if not finished:
+            return []
+        current = max(finished, key=lambda name: finished[name]["end"])
+        path = [current]
+        while True:
+            deps = [dep for dep in self._used_deps.get(current, ()) if dep in finished]
+            if not deps:
+                break
+            current = max(deps, key=lambda name: finished[name]["end"])
+            path.append(current)
+        return list(reversed(path))
+
+    def log_timings(self) -> None:
+        print("\n=== Stage Timings ===")
+        for name, t in self.timings.items():
+            if t["start"] is None:
+                print(f"  {name:<24} {t['status']}")
+                continue
+            duration = (t["end"] or 0.0) - t["start"]
+            print(f"  {name:<24} {t['status']:<10} start {t['start']:.3f}s  took {duration:.3f}s")
+        path = self.critical_path()
+        if path:
+            total = self.timings[path[-1]]["end"]
+            print(f"  critical path ({total:.3f}s): {' -> '.join(path)}")
@@ -0,0 +1,140 @@
+#response_cache.py
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from backend.memory.chroma_memory.manifest import get_collection_generation
+
+DEFAULT_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+DEFAULT_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+
+# Upper edges of the best-similarity histogram reported by `stats()`
+SIMILARITY_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.98, 1.0)
+
+
+class SemanticResponseCache:
+    """
+    Answer cache keyed by the embedding of the rephrased query.
+
+    A lookup returns the stored {summary, table} of the most similar cached query when
+    the cosine similarity reaches `threshold`. Entries expire after `ttl_seconds`, the
+    least recently used ones are evicted beyond `max_entries`, and the whole cache is
+    dropped when the collection's ingestion generation changes (see manifest.py).
+    """
+
+    def __init__(
+            self,
+            threshold: float = DEFAULT_THRESHOLD,
+            ttl_seconds: float = DEFAULT_TTL_SECONDS,
+            max_entries: int = DEFAULT_MAX_ENTRIES,
+            collection_name: str = "travel_data",
+        ) -> None:
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.collection_name = collection_name
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._generation = get_collection_generation(collection_name)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._similarity_histogram: List[int] = [0] * len(SIMILARITY_BUCKETS)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_generation(self) -> None:
+        generation = get_collection_generation(self.collection_name)
+        if generation != self._generation:
+            print(f"♻️ {self.collection_name} was re-ingested, clearing {len(self._entries)} cached answers")
+            self._entries.clear()
+            self._generation = generation
+
+    def _expire(self) -> None:
+        now = time.time()
+        for key in [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]:
+            del self._entries[key]
+
+    def _record_similarity(self, similarity: float) -> None:
+        for idx, edge in enumerate(SIMILARITY_BUCKETS):
+            if similarity <= edge:
+                self._similarity_histogram[idx] += 1
+                return
+        self._similarity_histogram[-1] += 1
+
+    def lookup(self, embedding: List[float]) -> Optional[Dict[str, str]]:
+        """Return the cached answer closest to `embedding`, or None below the threshold."""
+        query = self._normalize(embedding)
+        with self._lock:
+            self._check_generation()
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            keys = list(self._entries.keys())
+            matrix = np.stack([self._entries[key]["vector"] for key in keys])
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            self._record_similarity(similarity)
+
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(keys[best])
+            entry = self._entries[keys[best]]
+            print(f"🎯 Answer cache hit ({similarity:.3f}) for cached query: {entry['query']}")
+            return dict(entry["answer"])
+
+    def store(self, query: str, embedding: List[float], answer: Dict[str, str]) -> None:
+        with self._lock:
+            self._check_generation()
+            self._entries[query] = {
+                "query": query,
+                "vector": self._normalize(embedding),
+                "answer": {"summary": answer.get("summary", ""), "table": answer.get("table", "")},
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "best_similarity_histogram": {
+                    f"<={edge}": count for edge, count in zip(SIMILARITY_BUCKETS, self._similarity_histogram)
+                },
+            }
+
+
+_response_cache: Optional[SemanticResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """Process-wide answer cache shared by all chat requests."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = SemanticResponseCache()
+        return _response_cache
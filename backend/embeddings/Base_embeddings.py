@@ -1,8 +1,10 @@
 #Base_embeddings.py
-from typing import List, Type
+import asyncio
+from typing import List, Optional, Sequence, Tuple, Type
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 import numpy as np
+from backend.embeddings.embedding_cache import EmbeddingCache
 
 class EmbeddingInput(BaseModel):
     model_name: str
@@ -10,8 +12,18 @@ class EmbeddingInput(BaseModel):
     embedding_type: str
 
 class BaseEmbedding(ABC):
-    def __init__(self, embedding_input: Type[EmbeddingInput]) -> None:
+    def __init__(self, embedding_input: Type[EmbeddingInput], cache: Optional[EmbeddingCache] = None) -> None:
         self._input: EmbeddingInput = embedding_input
+        self._cache: Optional[EmbeddingCache] = cache
+
+    def _cache_namespace(self) -> Tuple:
+        """Model settings that, together with the text, identify a cached vector."""
+        return (
+            self._input.model_name,
+            getattr(self._input, "task", ""),
+            self._input.dimensions,
+            self._input.embedding_type,
+        )
 
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -23,12 +35,13 @@ class BaseEmbedding(ABC):
         Returns:
             List[float]: The embedding for the text.
         """
-        embeddings: List[List[float]] = self._call_embedding_model([text])
+        embeddings: List[List[float]] = self.generate_batch_embeddings([text])
         return embeddings[0]
     
     def generate_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for a list of texts.
+        With a cache attached, only the texts not cached yet are sent upstream.
 
         Args:
             texts (List[str]): The list of texts to generate embeddings for.
@@ -36,13 +49,36 @@ class BaseEmbedding(ABC):
         Returns:
             List[List[float]]: The embeddings for the list of texts.
         """
-        embeddings: List[List[float]] = self._call_embedding_model(texts)
+        # Late-chunked vectors depend on the rest of the batch, so they are never cached
+        if self._cache is None or getattr(self._input, "late_chunking", False):
+            return self._call_embedding_model(texts)
+        embeddings: List[List[float]] = self._cache.get_or_compute(
+            self._cache_namespace(), texts, self._call_embedding_model
+        )
         return embeddings
     
+    async def agenerate_embedding(self, text: str) -> List[float]:
+        """Non-blocking variant of `generate_embedding`."""
+        embeddings: List[List[float]] = await self.agenerate_batch_embeddings([text])
+        return embeddings[0]
+
+    async def agenerate_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Non-blocking variant of `generate_batch_embeddings`."""
+        if self._cache is None or getattr(self._input, "late_chunking", False):
+            return await self._acall_embedding_model(texts)
+        embeddings: List[List[float]] = await self._cache.aget_or_compute(
+            self._cache_namespace(), texts, self._acall_embedding_model
+        )
+        return embeddings
+
     @abstractmethod
     def _call_embedding_model(self, texts: List[str]) -> List[List[float]]:
         pass
 
+    async def _acall_embedding_model(self, texts: List[str]) -> List[List[float]]:
+        # Backends without a native async client run the blocking call off the event loop
+        return await asyncio.to_thread(self._call_embedding_model, texts)
+
     def calculate_cosine_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """
         Calculate cosine similarity between two embeddings.
@@ -62,3 +98,72 @@ class BaseEmbedding(ABC):
         similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
         
         return float(similarity)
+
+    @staticmethod
+    def normalize_embeddings(embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        Stack embeddings into a float32 matrix with unit-length rows, so cosine
+        similarity becomes a single matrix-vector product. Zero rows stay zero.
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[np.newaxis, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    @staticmethod
+    def calculate_batch_cosine_similarity(
+            query_embedding: Sequence[float],
+            candidate_embeddings: Sequence[Sequence[float]],
+            normalized: bool = False,
+        ) -> np.ndarray:
+        """
+        Cosine similarity of one query against many candidates in one pass.
+
+        Args:
+            query_embedding: Query vector
+            candidate_embeddings: Matrix (or list) of candidate vectors, one per row
+            normalized: Inputs are already unit-length float32 (e.g. from
+                `normalize_embeddings`), so normalization is skipped
+
+        Returns:
+            np.ndarray: One similarity score per candidate, in candidate order
+        """
+        if len(candidate_embeddings) == 0:
+            return np.zeros(0, dtype=np.float32)
+        if normalized:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+        else:
+            query = BaseEmbedding.normalize_embeddings(query_embedding)[0]
+            candidates = BaseEmbedding.normalize_embeddings(candidate_embeddings)
+        return candidates @ query
+
+    @staticmethod
+    def top_k_similar(
+            query_embedding: Sequence[float],
+            candidate_embeddings: Sequence[Sequence[float]],
+            k: int,
+            normalized: bool = False,
+            threshold: Optional[float] = None,
+        ) -> List[Tuple[int, float]]:
+        """
+        Return the `k` most similar candidates as (index, score), best first.
+
+        Args:
+            query_embedding: Query vector
+            candidate_embeddings: Candidate vectors, one per row
+            k: Number of candidates to return
+            normalized: Inputs are already unit-length float32
+            threshold: Only keep candidates scoring strictly above this
+
+        Returns:
+            List[Tuple[int, float]]: Candidate indexes and their cosine similarity
+        """
+        scores = BaseEmbedding.calculate_batch_cosine_similarity(query_embedding, candidate_embeddings, normalized)
+        if k <= 0 or scores.size == 0:
+            return []
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top if threshold is None or scores[i] > threshold]
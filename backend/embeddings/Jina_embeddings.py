@@ -1,9 +1,10 @@
 #Jina_embeddings.py
 import os
-import requests
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 from backend.embeddings.Base_embeddings import BaseEmbedding, EmbeddingInput
+from backend.embeddings.embedding_cache import EmbeddingCache
+from backend.utils.http_client import get_async_http_client, get_http_client
 
 load_dotenv()
 
@@ -17,11 +18,11 @@ class JinaEmbeddingInput(EmbeddingInput):
     }
 
 class JinaEmbedding(BaseEmbedding):
-    def __init__(self, embedding_input: JinaEmbeddingInput) -> None:
-        super().__init__(embedding_input)
+    def __init__(self, embedding_input: JinaEmbeddingInput, cache: Optional[EmbeddingCache] = None) -> None:
+        super().__init__(embedding_input, cache=cache)
 
-    def _call_embedding_model(self, texts: List[str]) -> List[List[float]]:
-        data = {
+    def _build_payload(self, texts: List[str]) -> dict:
+        return {
             "model": self._input.model_name,
             "task": self._input.task,
             "late_chunking": self._input.late_chunking,
@@ -30,7 +31,8 @@ class JinaEmbedding(BaseEmbedding):
             "input": texts
         }
 
-        response = requests.post(self._input.URL, headers=self._input.headers, json=data)
+    def _call_embedding_model(self, texts: List[str]) -> List[List[float]]:
+        response = get_http_client().post(self._input.URL, headers=self._input.headers, json=self._build_payload(texts))
 
         try:
             response_json = response.json()
@@ -42,6 +44,18 @@ class JinaEmbedding(BaseEmbedding):
 
         return self._parse_jina_response(response_json)
 
+    async def _acall_embedding_model(self, texts: List[str]) -> List[List[float]]:
+        response = await get_async_http_client().post(
+            self._input.URL, headers=self._input.headers, json=self._build_payload(texts)
+        )
+
+        try:
+            response_json = response.json()
+        except Exception as e:
+            raise ValueError(f"Failed to parse response as JSON: {e}\nRaw response: {response.text}")
+
+        return self._parse_jina_response(response_json)
+
     def _parse_jina_response(self, response: dict) -> List[List[float]]:
         if 'data' not in response:
             raise KeyError(f"Missing 'data' in response. Full response: {response}")
@@ -0,0 +1,93 @@
+#Local_embeddings.py
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from backend.embeddings.Base_embeddings import BaseEmbedding, EmbeddingInput
+from backend.embeddings.embedding_cache import EmbeddingCache
+
+
+class LocalEmbeddingInput(EmbeddingInput):
+    model_name: str = "BAAI/bge-small-en-v1.5"
+    dimensions: int = 384
+    embedding_type: str = "float"
+    # "torch" or "onnx" (sentence-transformers runs ONNX models through optimum/onnxruntime)
+    backend: str = "torch"
+    # Dynamic int8 quantization of the Linear layers (torch backend)
+    quantize_int8: bool = False
+    # ONNX weights to load, e.g. a pre-quantized "onnx/model_qint8_avx512.onnx"
+    onnx_file_name: Optional[str] = None
+    num_threads: Optional[int] = None
+    batch_size: int = 32
+    normalize: bool = True
+    # Instruction some models (e.g. BGE) expect in front of queries or passages
+    prefix: str = ""
+
+
+_models: Dict[Tuple, Any] = {}
+_models_lock = threading.Lock()
+
+
+def _load_model(embedding_input: LocalEmbeddingInput):
+    """Load (once per process and configuration) a sentence-transformer on CPU."""
+    key = (
+        embedding_input.model_name,
+        embedding_input.backend,
+        embedding_input.quantize_int8,
+        embedding_input.onnx_file_name,
+    )
+    with _models_lock:
+        if key in _models:
+            return _models[key]
+
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if embedding_input.num_threads:
+            # Process-wide: intra-op threads used by every torch model in this process
+            torch.set_num_threads(embedding_input.num_threads)
+
+        model_kwargs = {}
+        if embedding_input.backend == "onnx":
+            model_kwargs["provider"] = "CPUExecutionProvider"
+            if embedding_input.onnx_file_name:
+                model_kwargs["file_name"] = embedding_input.onnx_file_name
+        model = SentenceTransformer(
+            embedding_input.model_name,
+            device="cpu",
+            backend=embedding_input.backend,
+            model_kwargs=model_kwargs or None,
+        )
+        if embedding_input.quantize_int8 and embedding_input.backend == "torch":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        _models[key] = model
+        return model
+
+
+class LocalEmbedding(BaseEmbedding):
+    """
+    In-process embedding backend running a sentence-transformer (PyTorch or ONNX)
+    on CPU, so queries do not pay a network round trip or a third-party rate limit.
+    """
+
+    def __init__(self, embedding_input: LocalEmbeddingInput, cache: Optional[EmbeddingCache] = None) -> None:
+        super().__init__(embedding_input, cache=cache)
+
+    def _cache_namespace(self) -> Tuple:
+        # Quantized weights and prefixes change the vectors, so they are part of the key
+        return super()._cache_namespace() + (
+            "local",
+            self._input.backend,
+            self._input.quantize_int8,
+            self._input.onnx_file_name or "",
+            self._input.prefix,
+        )
+
+    def _call_embedding_model(self, texts: List[str]) -> List[List[float]]:
+        model = _load_model(self._input)
+        embeddings = model.encode(
+            [self._input.prefix + text for text in texts],
+            batch_size=self._input.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=self._input.normalize,
+            show_progress_bar=False,
+        )
+        return embeddings.astype("float32").tolist()
@@ -0,0 +1,155 @@
+#embedding_cache.py
+import os
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.utils.disk_cache import SQLiteCache
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache/embeddings.sqlite3")
+DEFAULT_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+# About 800 MB of 1024-dim float32 vectors
+DEFAULT_DISK_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    Vectors are keyed by (model_name, task, dimensions, embedding_type, sha256(text)),
+    stored on disk as raw float32 blobs (at most `max_disk_entries`, oldest
+    dropped first) and fronted by a bounded in-memory LRU.
+    """
+
+    def __init__(
+            self,
+            path: str = DEFAULT_CACHE_PATH,
+            max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+            max_disk_entries: int = DEFAULT_DISK_ENTRIES,
+        ) -> None:
+        self._disk = SQLiteCache(path, table="embeddings", max_entries=max_disk_entries)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._max_memory_entries = max_memory_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(namespace: Sequence, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return "|".join(str(part) for part in namespace) + "|" + text_hash
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_compute(
+            self,
+            namespace: Sequence,
+            texts: List[str],
+            compute: Callable[[List[str]], List[List[float]]],
+        ) -> List[List[float]]:
+        """
+        Return embeddings for `texts`, calling `compute` only for the cache misses.
+
+        Args:
+            namespace: Model settings that make up the cache key besides the text
+            texts: Texts to embed
+            compute: Upstream embedding call taking the list of missing texts
+
+        Returns:
+            List[List[float]]: One embedding per input text, in input order
+        """
+        keys, found, missing = self._lookup(namespace, texts)
+        if missing:
+            self._store(found, missing, compute(list(missing.values())))
+        return [found[key].tolist() for key in keys]
+
+    async def aget_or_compute(
+            self,
+            namespace: Sequence,
+            texts: List[str],
+            acompute: Callable[[List[str]], Awaitable[List[List[float]]]],
+        ) -> List[List[float]]:
+        """Async variant of `get_or_compute`; disk access runs in a worker thread."""
+        keys, found, missing = await asyncio.to_thread(self._lookup, namespace, texts)
+        if missing:
+            computed = await acompute(list(missing.values()))
+            await asyncio.to_thread(self._store, found, missing, computed)
+        return [found[key].tolist() for key in keys]
+
+    def _lookup(self, namespace: Sequence, texts: List[str]) -> Tuple[List[str], Dict[str, np.ndarray], "OrderedDict[str, str]"]:
+        keys = [self.make_key(namespace, text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+        pending = [key for key in dict.fromkeys(keys) if key not in found]
+        if pending:
+            from_disk = self._disk.get_many(pending)
+            with self._lock:
+                for key, blob in from_disk.items():
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+
+        # Send each distinct missing text upstream once
+        missing: "OrderedDict[str, str]" = OrderedDict()
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return keys, found, missing
+
+    def _store(self, found: Dict[str, np.ndarray], missing: "OrderedDict[str, str]", computed: List[List[float]]) -> None:
+        if len(computed) != len(missing):
+            raise ValueError(f"Expected {len(missing)} embeddings, got {len(computed)}")
+        new_items = []
+        with self._lock:
+            for key, embedding in zip(missing.keys(), computed):
+                vector = np.asarray(embedding, dtype=np.float32)
+                found[key] = vector
+                self._remember(key, vector)
+                new_items.append((key, vector.tobytes()))
+        self._disk.set_many(new_items)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.hits = 0
+            self.misses = 0
+        self._disk.clear()
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache shared by all embedding clients."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
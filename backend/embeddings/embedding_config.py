@@ -0,0 +1,75 @@
+#embedding_config.py
+import os
+from typing import Optional
+from pydantic import BaseModel
+from backend.embeddings.Base_embeddings import BaseEmbedding
+from backend.embeddings.Jina_embeddings import JinaEmbedding, JinaEmbeddingInput
+from backend.embeddings.Local_embeddings import LocalEmbedding, LocalEmbeddingInput
+from backend.embeddings.embedding_cache import get_embedding_cache
+
+
+class EmbeddingConfig(BaseModel):
+    """
+    Which embedding backend ingestion and retrieval use.
+
+    Documents and queries must be embedded by the same model, so switching the
+    backend means re-ingesting into a collection built with it.
+    """
+    backend: str = os.getenv("EMBEDDING_BACKEND", "jina")  # "jina" or "local"
+    jina_model_name: str = os.getenv("JINA_EMBEDDING_MODEL", "jina-embeddings-v3")
+    jina_dimensions: int = int(os.getenv("JINA_EMBEDDING_DIMENSIONS", "1024"))
+    local_model_name: str = os.getenv("LOCAL_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+    local_dimensions: int = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "384"))
+    local_runtime: str = os.getenv("LOCAL_EMBEDDING_RUNTIME", "torch")  # "torch" or "onnx"
+    local_quantize_int8: bool = os.getenv("LOCAL_EMBEDDING_INT8", "false").lower() in ("1", "true", "yes")
+    local_onnx_file_name: Optional[str] = os.getenv("LOCAL_EMBEDDING_ONNX_FILE") or None
+    local_num_threads: Optional[int] = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0")) or None
+    local_batch_size: int = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+    local_query_prefix: str = os.getenv("LOCAL_EMBEDDING_QUERY_PREFIX", "")
+
+    def model_id(self) -> str:
+        """Identifies the vectors a collection was built with (recorded by ingestion)."""
+        if self.backend == "local":
+            return f"local:{self.local_model_name}:{self.local_dimensions}"
+        return f"jina:{self.jina_model_name}:{self.jina_dimensions}"
+
+
+def create_embedding_model(
+        for_queries: bool = False,
+        config: Optional[EmbeddingConfig] = None,
+        use_cache: bool = True,
+    ) -> BaseEmbedding:
+    """
+    Build the configured embedding client.
+
+    Args:
+        for_queries: Embed search queries rather than documents (local models may
+            prepend a query instruction)
+        config: Backend selection; read from the environment by default
+        use_cache: Attach the process-wide embedding cache
+
+    Returns:
+        BaseEmbedding: A JinaEmbedding or LocalEmbedding
+    """
+    config = config or EmbeddingConfig()
+    cache = get_embedding_cache() if use_cache else None
+    if config.backend == "jina":
+        return JinaEmbedding(JinaEmbeddingInput(
+            model_name=config.jina_model_name,
+            task="text-matching",
+            late_chunking=False,
+            dimensions=config.jina_dimensions,
+            embedding_type="float"
+        ), cache=cache)
+    if config.backend == "local":
+        return LocalEmbedding(LocalEmbeddingInput(
+            model_name=config.local_model_name,
+            dimensions=config.local_dimensions,
+            backend=config.local_runtime,
+            quantize_int8=config.local_quantize_int8,
+            onnx_file_name=config.local_onnx_file_name,
+            num_threads=config.local_num_threads,
+            batch_size=config.local_batch_size,
+            prefix=config.local_query_prefix if for_queries else "",
+        ), cache=cache)
+    raise ValueError(f"Unknown embedding backend: {config.backend}")
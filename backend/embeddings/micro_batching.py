@@ -0,0 +1,171 @@
+#micro_batching.py
+import os
+import time
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from backend.embeddings.Base_embeddings import BaseEmbedding
+from backend.utils.histogram import Histogram
+
+MICRO_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MICRO_BATCH_MAX_WAIT_MS", "5"))
+# Batches of the blocking API that may be in flight at once
+MICRO_BATCH_SYNC_WORKERS = int(os.getenv("EMBEDDING_MICRO_BATCH_SYNC_WORKERS", "4"))
+
+QUEUE_WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _AsyncQueue:
+    """Pending single-text requests of one event loop."""
+
+    def __init__(self) -> None:
+        self.items: List[Tuple[str, "asyncio.Future", float]] = []
+        self.timer: Optional["asyncio.TimerHandle"] = None
+
+
+class MicroBatchingEmbedding(BaseEmbedding):
+    """
+    Micro-batching layer in front of another `BaseEmbedding`.
+
+    Concurrent `generate_embedding` / `agenerate_embedding` calls are collected for
+    up to `max_wait_ms` or `max_batch_size` texts, embedded with one batch call on
+    the wrapped model (which still applies its cache), and each caller gets its own
+    vector back. Batch calls pass straight through. `stats()` reports queue-wait and
+    batch-size histograms.
+    """
+
+    def __init__(
+            self,
+            model: BaseEmbedding,
+            max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+            max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS,
+            sync_workers: int = MICRO_BATCH_SYNC_WORKERS,
+        ) -> None:
+        super().__init__(model._input, cache=None)
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+
+        self._async_queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncQueue]" = weakref.WeakKeyDictionary()
+        # The loop only keeps weak references to tasks
+        self._async_batches: set = set()
+
+        self._sync_items: List[Tuple[str, Future, float]] = []
+        self._sync_cond = threading.Condition()
+        self._sync_workers = sync_workers
+        self._sync_executor: Optional[ThreadPoolExecutor] = None
+        self._sync_collector: Optional[threading.Thread] = None
+
+    def _cache_namespace(self) -> Tuple:
+        return self.model._cache_namespace()
+
+    def _call_embedding_model(self, texts: List[str]) -> List[List[float]]:
+        return self.model._call_embedding_model(texts)
+
+    async def _acall_embedding_model(self, texts: List[str]) -> List[List[float]]:
+        return await self.model._acall_embedding_model(texts)
+
+    def generate_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self.model.generate_batch_embeddings(texts)
+
+    async def agenerate_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self.model.agenerate_batch_embeddings(texts)
+
+    def _record_batch(self, enqueued_at: List[float]) -> None:
+        now = time.perf_counter()
+        self.batch_size.observe(len(enqueued_at))
+        for t in enqueued_at:
+            self.queue_wait_ms.observe((now - t) * 1000)
+
+    # Event-loop callers
+
+    async def agenerate_embedding(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        queue = self._async_queues.get(loop)
+        if queue is None:
+            queue = self._async_queues[loop] = _AsyncQueue()
+
+        future = loop.create_future()
+        queue.items.append((text, future, time.perf_counter()))
+        if len(queue.items) >= self.max_batch_size:
+            self._flush_async(loop, queue)
+        elif queue.timer is None:
+            queue.timer = loop.call_later(self.max_wait, self._flush_async, loop, queue)
+        return await future
+
+    def _flush_async(self, loop: "asyncio.AbstractEventLoop", queue: _AsyncQueue) -> None:
+        if queue.timer is not None:
+            queue.timer.cancel()
+            queue.timer = None
+        items, queue.items = queue.items[:self.max_batch_size], queue.items[self.max_batch_size:]
+        if queue.items:
+            queue.timer = loop.call_later(self.max_wait, self._flush_async, loop, queue)
+        if items:
+            task = loop.create_task(self._run_async_batch(items))
+            self._async_batches.add(task)
+            task.add_done_callback(self._async_batches.discard)
+
+    async def _run_async_batch(self, items: List[Tuple[str, "asyncio.Future", float]]) -> None:
+        self._record_batch([enqueued_at for _, _, enqueued_at in items])
+        try:
+            embeddings = await self.model.agenerate_batch_embeddings([text for text, _, _ in items])
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), embedding in zip(items, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    # Blocking callers (worker threads)
+
+    def generate_embedding(self, text: str) -> List[float]:
+        future: Future = Future()
+        with self._sync_cond:
+            if self._sync_collector is None:
+                self._sync_executor = ThreadPoolExecutor(max_workers=self._sync_workers, thread_name_prefix="embed-batch")
+                self._sync_collector = threading.Thread(target=self._collect_sync, name="embed-batcher", daemon=True)
+                self._sync_collector.start()
+            self._sync_items.append((text, future, time.perf_counter()))
+            self._sync_cond.notify()
+        return future.result()
+
+    def _collect_sync(self) -> None:
+        while True:
+            with self._sync_cond:
+                while not self._sync_items:
+                    self._sync_cond.wait()
+                flush_at = self._sync_items[0][2] + self.max_wait
+                while len(self._sync_items) < self.max_batch_size:
+                    remaining = flush_at - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._sync_cond.wait(remaining)
+                items = self._sync_items[:self.max_batch_size]
+                self._sync_items = self._sync_items[self.max_batch_size:]
+            self._sync_executor.submit(self._run_sync_batch, items)
+
+    def _run_sync_batch(self, items: List[Tuple[str, Future, float]]) -> None:
+        self._record_batch([enqueued_at for _, _, enqueued_at in items])
+        try:
+            embeddings = self.model.generate_batch_embeddings([text for text, _, _ in items])
+        except Exception as e:
+            for _, future, _ in items:
+                future.set_exception(e)
+            return
+        for (_, future, _), embedding in zip(items, embeddings):
+            future.set_result(embedding)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
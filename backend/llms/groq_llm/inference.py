@@ -1,15 +1,55 @@
 #inference.py
 import os
-from typing import List, Dict
-from groq import Groq
-from groq.types.chat.chat_completion import ChatCompletion
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, List, Optional
+from backend.utils.lazy import get_lazy_registry
+
+if TYPE_CHECKING:
+    from groq import AsyncGroq, Groq
+    from groq.types.chat.chat_completion import ChatCompletion
 
 
 class GroqInference:
     def __init__(self, model: str = "llama-3.3-70b-versatile") -> None:
-        os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
-        self.groq_client = Groq()
         self.model = model
+        # The groq SDK is imported and its clients built on first use, so module-level
+        # instances cost nothing at import time
+        self._groq_client: Optional["Groq"] = None
+        self._async_groq_client: Optional["AsyncGroq"] = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def groq_client(self) -> "Groq":
+        if self._groq_client is None:
+            with self._client_lock:
+                if self._groq_client is None:
+                    from groq import Groq
+                    self._groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        return self._groq_client
+
+    @property
+    def async_groq_client(self) -> "AsyncGroq":
+        if self._async_groq_client is None:
+            with self._client_lock:
+                if self._async_groq_client is None:
+                    from groq import AsyncGroq
+                    self._async_groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+        return self._async_groq_client
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP clients; they are recreated on next use."""
+        with self._client_lock:
+            client, self._groq_client = self._groq_client, None
+            async_client, self._async_groq_client = self._async_groq_client, None
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            await async_client.close()
+
+    @staticmethod
+    def _request_options(timeout: Optional[float]) -> dict:
+        # Leave the client's default timeout alone unless the caller has a deadline
+        return {"timeout": timeout} if timeout is not None else {}
 
     def generate_response(
             self,
@@ -19,23 +59,129 @@ class GroqInference:
             top_p: float = 1.0,
             stream: bool = False,
             stop: List[str] = None,
+            timeout: Optional[float] = None,
         ) -> str:
         """
         Generate a response using Groq's LLM.
 
         Args:
             messages: List of message dictionaries with 'role' and 'content' keys
+            stream: Receive the answer as a token stream (joined before returning);
+                use `stream_response` to consume the tokens as they arrive
+            timeout: Request timeout in seconds, e.g. the caller's remaining deadline
 
         Returns:
             str: The generated response from the model
         """
-        completion: ChatCompletion = self.groq_client.chat.completions.create(
+        if stream:
+            return "".join(self.stream_response(messages, temperature, max_tokens, top_p, stop, timeout))
+
+        completion: "ChatCompletion" = self.groq_client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
             top_p=top_p,
-            stream=stream,
+            stream=False,
             stop=stop,
+            **self._request_options(timeout),
         )
         return completion.choices[0].message.content
+
+    def stream_response(
+            self,
+            messages: List[Dict[str, str]],
+            temperature: float = 0.1,
+            max_tokens: int = 1024,
+            top_p: float = 1.0,
+            stop: List[str] = None,
+            timeout: Optional[float] = None,
+        ) -> Iterator[str]:
+        """
+        Stream a response from Groq's LLM token by token.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+
+        Yields:
+            str: Content deltas in generation order
+        """
+        chunks = self.groq_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            stream=True,
+            stop=stop,
+            **self._request_options(timeout),
+        )
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def agenerate_response(
+            self,
+            messages: List[Dict[str, str]],
+            temperature: float = 0.1,
+            max_tokens: int = 1024,
+            top_p: float = 1.0,
+            stop: List[str] = None,
+            timeout: Optional[float] = None,
+        ) -> str:
+        """
+        Non-blocking variant of `generate_response` using the async Groq client.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+
+        Returns:
+            str: The generated response from the model
+        """
+        completion: "ChatCompletion" = await self.async_groq_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            stop=stop,
+            **self._request_options(timeout),
+        )
+        return completion.choices[0].message.content
+
+    async def astream_response(
+            self,
+            messages: List[Dict[str, str]],
+            temperature: float = 0.1,
+            max_tokens: int = 1024,
+            top_p: float = 1.0,
+            stop: List[str] = None,
+            timeout: Optional[float] = None,
+        ) -> AsyncIterator[str]:
+        """
+        Non-blocking variant of `stream_response`.
+
+        Yields:
+            str: Content deltas in generation order
+        """
+        chunks = await self.async_groq_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            stream=True,
+            stop=stop,
+            **self._request_options(timeout),
+        )
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+_groq_llm = get_lazy_registry().register("groq_llm", GroqInference, close=lambda llm: llm.aclose())
+
+
+def get_groq_llm() -> GroqInference:
+    """Process-wide GroqInference, so requests share one set of Groq connection pools."""
+    return _groq_llm.get()
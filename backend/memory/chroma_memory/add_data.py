@@ -1,52 +1,416 @@
 #add_memory.py
-import uuid
-import chromadb
-from typing import List
+import os
+import time
+import queue
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
 from langchain_core.documents import Document
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from backend.embeddings.Jina_embeddings import JinaEmbedding, JinaEmbeddingInput
+from backend.embeddings.embedding_config import EmbeddingConfig, create_embedding_model
+from backend.memory.chroma_memory.chroma_client import get_chroma_collection
+from backend.memory.chroma_memory.pdf_extraction import (
+    DEFAULT_EXTRACTION_CACHE_DIR,
+    DEFAULT_EXTRACTION_WORKERS,
+    extract_pdfs,
+    file_hash,
+    load_extracted_pages,
+)
+from backend.memory.chroma_memory.manifest import DEFAULT_MANIFEST_PATH, bump_generation, load_manifest, save_manifest
+from backend.memory.chroma_memory.region_router import region_for_pdf
+from backend.memory.lexical_index.bm25 import build_bm25_index, default_bm25_path
+from backend.memory.lexical_index.tokenizer import TOKENIZER_VERSION
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_PENDING_BATCHES = 4
+DEFAULT_EMBEDDING_WORKERS = 2
+DEFAULT_DATASET_ROOT = os.getenv("DATASET_ROOT", "Dataset")
+
+_SENTINEL = object()
 
-def add_pdf_to_chroma(pdf_path: List[str], collection_name: str = "travel_data") -> None:
-    """
-    Add PDF content to ChromaDB after splitting into chunks and generating embeddings.
-    
-    Args:
-        pdf_path: Path to the PDF file
-        collection_name: Name of the ChromaDB collection to store data in
-    """
-    client = chromadb.PersistentClient()
-    collection = client.get_or_create_collection(collection_name)
 
-    loader = PyPDFLoader(pdf_path)
-    pages: List[Document] = loader.load_and_split()
+def _load_chunks(pdf_path: str, cache_path: str) -> List[Document]:
+    pages: List[Document] = load_extracted_pages(pdf_path, cache_path)
 
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=512,
         chunk_overlap=50,
         length_function=len,
         is_separator_regex=False,
+        add_start_index=True,
+    )
+
+    chunks = text_splitter.split_documents(pages)
+    region = region_for_pdf(pdf_path)
+    for chunk in chunks:
+        chunk.metadata["region"] = region
+    return chunks
+
+
+def _file_key(pdf_path: str, dataset_root: str = DEFAULT_DATASET_ROOT) -> str:
+    """
+    Manifest key of a PDF: its path relative to the dataset root, or its absolute
+    path when it lives elsewhere, so same-named files in different folders differ.
+    """
+    pdf_path = os.path.abspath(pdf_path)
+    relative = os.path.relpath(pdf_path, os.path.abspath(dataset_root))
+    if relative.startswith(os.pardir + os.sep) or relative == os.pardir:
+        return pdf_path.replace(os.sep, "/")
+    return relative.replace(os.sep, "/")
+
+
+def _previous_entry(manifest_files: Dict[str, Dict], pdf_path: str, file_key: str) -> Optional[Dict]:
+    """
+    Manifest entry of a PDF, moving one recorded under the basename key used by
+    older manifests to its current key. Its chunks keep their ids, so nothing is
+    re-embedded.
+    """
+    if file_key not in manifest_files:
+        legacy_key = os.path.basename(pdf_path)
+        legacy = manifest_files.get(legacy_key)
+        if legacy_key != file_key and legacy and os.path.abspath(legacy.get("path", "")) == os.path.abspath(pdf_path):
+            manifest_files[file_key] = manifest_files.pop(legacy_key)
+    return manifest_files.get(file_key)
+
+
+def _chunk_id(file_key: str, doc: Document) -> str:
+    """Deterministic id for a chunk: (file, page, character offset within the page)."""
+    key_digest = hashlib.sha1(file_key.encode("utf-8")).hexdigest()[:16]
+    return f"{key_digest}-p{doc.metadata.get('page', 0)}-o{doc.metadata.get('start_index', 0)}"
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _is_unchanged(previous: Optional[Dict], pdf_hash: str) -> bool:
+    return bool(previous) and previous.get("file_hash") == pdf_hash
+
+
+def _plan_file(
+        pdf_path: str,
+        previous: Optional[Dict],
+        pdf_hash: str,
+        cache_path: Optional[str],
+        file_key: str,
+    ) -> Tuple[Optional[Dict], List[Tuple[str, Document]], List[str]]:
+    """
+    Work out what has to change in the collection for one PDF.
+
+    Returns:
+        The new manifest entry (None when the file is unchanged), the
+        (chunk_id, chunk) pairs to upsert and the stale chunk ids to delete.
+    """
+    if _is_unchanged(previous, pdf_hash):
+        return None, [], []
+
+    old_chunks: Dict[str, str] = (previous or {}).get("chunks", {})
+    new_chunks: Dict[str, str] = {}
+    to_upsert: List[Tuple[str, Document]] = []
+
+    for doc in _load_chunks(pdf_path, cache_path):
+        chunk_id = _chunk_id(file_key, doc)
+        content_hash = _content_hash(doc.page_content)
+        new_chunks[chunk_id] = content_hash
+        if old_chunks.get(chunk_id) != content_hash:
+            to_upsert.append((chunk_id, doc))
+
+    stale_ids = [chunk_id for chunk_id in old_chunks if chunk_id not in new_chunks]
+    entry = {"path": pdf_path, "file_hash": pdf_hash, "chunks": new_chunks}
+    return entry, to_upsert, stale_ids
+
+
+def backfill_region_metadata(collection, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Add "region" metadata to chunks ingested before it existed, derived from their
+    source PDF. Only metadata is rewritten; nothing is re-embedded.
+
+    Returns:
+        int: Number of chunks updated
+    """
+    updated = 0
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        page = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+        ids, metadatas = [], []
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            if metadata and "region" not in metadata and metadata.get("source"):
+                ids.append(chunk_id)
+                metadatas.append(dict(metadata, region=region_for_pdf(metadata["source"])))
+        if ids:
+            collection.update(ids=ids, metadatas=metadatas)
+            updated += len(ids)
+    return updated
+
+
+def add_pdf_to_chroma(
+        pdf_path: str,
+        collection_name: str = "travel_data",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        embedding_config: Optional[EmbeddingConfig] = None,
+        dataset_root: str = DEFAULT_DATASET_ROOT,
+    ) -> None:
+    """
+    Add PDF content to ChromaDB after splitting into chunks and generating embeddings.
+
+    Args:
+        pdf_path: Path to the PDF file
+        collection_name: Name of the ChromaDB collection to store data in
+        batch_size: Number of chunks embedded and inserted per request
+        embedding_config: Embedding backend to use (EMBEDDING_BACKEND by default)
+        dataset_root: Directory that chunk ids and manifest keys are relative to
+    """
+    add_pdfs_to_chroma(
+        [pdf_path],
+        collection_name=collection_name,
+        batch_size=batch_size,
+        embedding_config=embedding_config,
+        dataset_root=dataset_root,
     )
 
-    chunks: List[Document] = text_splitter.split_documents(pages)
-
-    # Create embeddings and insert into chroma db
-    for idx, doc in enumerate(chunks):
-        embedding_model = JinaEmbedding(JinaEmbeddingInput(
-            model_name="jina-embeddings-v3",
-            task="text-matching",
-            late_chunking=False,
-            dimensions=1024,
-            embedding_type="float"
-        ))
-        embedding_outputs: List[float] = embedding_model.generate_embedding(doc.page_content)
-        print(f"Embedding created for {doc.metadata['source'], doc.metadata['page']}")
-        
-        collection.add(
-            ids=[str(uuid.uuid4())],
-            documents=[doc.page_content],
-            metadatas=[doc.metadata],
-            embeddings=[embedding_outputs]
+
+def add_pdfs_to_chroma(
+        pdf_paths: List[str],
+        collection_name: str = "travel_data",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+        embedding_workers: int = DEFAULT_EMBEDDING_WORKERS,
+        manifest_path: str = DEFAULT_MANIFEST_PATH,
+        prune_missing: bool = False,
+        embedding_config: Optional[EmbeddingConfig] = None,
+        build_lexical_index: bool = True,
+        extraction_workers: int = DEFAULT_EXTRACTION_WORKERS,
+        extraction_cache_dir: str = DEFAULT_EXTRACTION_CACHE_DIR,
+        dataset_root: str = DEFAULT_DATASET_ROOT,
+    ) -> Dict[str, float]:
+    """
+    Incrementally ingest several PDFs into ChromaDB.
+
+    Every chunk gets a deterministic id derived from its file (path relative to
+    `dataset_root`), page and character offset, and the ingestion manifest records the file hash and a content hash per
+    chunk. PDFs whose hash is unchanged are skipped, only new or modified chunks are
+    embedded and upserted, and chunks that disappeared from a file are deleted, so
+    re-running over the same `Dataset/` is idempotent. Chunk metadata records the
+    region of the PDF ("UT_Ladakh.pdf" -> "ladakh") for region-routed retrieval;
+    collections ingested before that are backfilled once.
+
+    Page text comes from the extraction cache: changed PDFs that are not cached
+    yet are first parsed in parallel by `extraction_workers` processes, so
+    re-chunking or re-embedding never parses a PDF twice.
+
+    Chunks are grouped into batches of `batch_size` and embedded with one
+    `generate_batch_embeddings` call per batch. A loader thread feeds batches to
+    `embedding_workers` embedding threads through bounded queues, while the calling
+    thread writes finished batches to Chroma with one `collection.upsert` per batch,
+    so embedding requests overlap with the writes.
+
+    Args:
+        pdf_paths: Paths to the PDF files
+        collection_name: Name of the ChromaDB collection to store data in
+        batch_size: Number of chunks embedded and inserted per request
+        max_pending_batches: Upper bound on batches buffered between pipeline stages
+        embedding_workers: Number of concurrent embedding requests
+        manifest_path: Where the ingestion manifest is persisted
+        prune_missing: Also delete chunks of manifest files that are not in `pdf_paths`
+        embedding_config: Embedding backend to use (EMBEDDING_BACKEND by default); it
+            must match the one the collection was built with
+        build_lexical_index: Rebuild the collection's BM25 index when its chunks changed
+        extraction_workers: Processes parsing PDFs that are not in the extraction cache yet
+        extraction_cache_dir: Where extracted page text is cached, by file hash
+        dataset_root: Directory that chunk ids and manifest keys are relative to
+
+    Returns:
+        Dict[str, float]: Ingestion stats (files_skipped, chunks, deleted, batches, seconds, chunks_per_sec)
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    collection = get_chroma_collection(collection_name)
+    embedding_config = embedding_config or EmbeddingConfig()
+    embedding_model = create_embedding_model(config=embedding_config)
+
+    manifest = load_manifest(manifest_path)
+    collection_manifest: Dict = manifest["collections"].setdefault(collection_name, {})
+    built_with = collection_manifest.get("embedding_model")
+    if built_with is not None and built_with != embedding_config.model_id():
+        raise ValueError(
+            f"Collection {collection_name} was built with {built_with}, not {embedding_config.model_id()}; "
+            "ingest into a new collection to switch embedding backends"
         )
+    collection_manifest["embedding_model"] = embedding_config.model_id()
+    manifest_files: Dict[str, Dict] = collection_manifest.setdefault("files", {})
+    updated_entries: Dict[str, Dict] = {}
+    stale_ids: List[str] = []
+    skipped_files: List[str] = []
+
+    file_keys = {pdf_path: _file_key(pdf_path, dataset_root) for pdf_path in pdf_paths}
+    previous_entries = {
+        pdf_path: _previous_entry(manifest_files, pdf_path, file_key) for pdf_path, file_key in file_keys.items()
+    }
+    file_hashes = {pdf_path: file_hash(pdf_path) for pdf_path in pdf_paths}
+    changed = [
+        pdf_path for pdf_path in pdf_paths if not _is_unchanged(previous_entries[pdf_path], file_hashes[pdf_path])
+    ]
+    cache_paths = extract_pdfs(
+        changed, file_hashes, cache_dir=extraction_cache_dir, workers=extraction_workers
+    )
+
+    embed_queue: "queue.Queue" = queue.Queue(maxsize=max_pending_batches)
+    write_queue: "queue.Queue" = queue.Queue(maxsize=max_pending_batches)
+    stop_event = threading.Event()
+    errors: List[BaseException] = []
+
+    def _put(q: "queue.Queue", item) -> bool:
+        # Bounded put that gives up once another stage has failed
+        while not stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _loader() -> None:
+        try:
+            batch: List[Tuple[str, Document]] = []
+            for pdf_path in pdf_paths:
+                file_key = file_keys[pdf_path]
+                entry, to_upsert, stale = _plan_file(
+                    pdf_path, previous_entries[pdf_path], file_hashes[pdf_path], cache_paths.get(pdf_path), file_key
+                )
+                if entry is None:
+                    skipped_files.append(file_key)
+                    print(f"Unchanged, skipping {pdf_path}")
+                    continue
+
+                updated_entries[file_key] = entry
+                stale_ids.extend(stale)
+                print(f"Chunked {pdf_path}: {len(to_upsert)} changed, {len(stale)} stale")
+                for pair in to_upsert:
+                    batch.append(pair)
+                    if len(batch) >= batch_size:
+                        if not _put(embed_queue, batch):
+                            return
+                        batch = []
+            if batch:
+                _put(embed_queue, batch)
+        except BaseException as e:
+            errors.append(e)
+            stop_event.set()
+        finally:
+            for _ in range(embedding_workers):
+                _put(embed_queue, _SENTINEL)
+
+    def _embedder() -> None:
+        try:
+            while not stop_event.is_set():
+                try:
+                    batch = embed_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if batch is _SENTINEL:
+                    return
+                embeddings = embedding_model.generate_batch_embeddings(
+                    [doc.page_content for _, doc in batch]
+                )
+                if not _put(write_queue, (batch, embeddings)):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop_event.set()
+        finally:
+            _put(write_queue, _SENTINEL)
+
+    threads = [threading.Thread(target=_loader, name="ingest-loader", daemon=True)]
+    threads += [
+        threading.Thread(target=_embedder, name=f"ingest-embedder-{i}", daemon=True)
+        for i in range(embedding_workers)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
 
-    print(f"Total documents added: {collection.count()}")
\ No newline at end of file
+    total_chunks = 0
+    total_batches = 0
+    finished_workers = 0
+    try:
+        while finished_workers < embedding_workers and not stop_event.is_set():
+            try:
+                item = write_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _SENTINEL:
+                finished_workers += 1
+                continue
+
+            batch, embeddings = item
+            collection.upsert(
+                ids=[chunk_id for chunk_id, _ in batch],
+                documents=[doc.page_content for _, doc in batch],
+                metadatas=[doc.metadata for _, doc in batch],
+                embeddings=embeddings
+            )
+            total_chunks += len(batch)
+            total_batches += 1
+            elapsed = time.perf_counter() - start
+            print(f"Batch {total_batches} upserted ({total_chunks} chunks, {total_chunks / elapsed:.1f} chunks/sec)")
+    except BaseException:
+        stop_event.set()
+        raise
+    finally:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    # Only touch deletions and the manifest once every upsert has landed, so an
+    # interrupted run is simply repeated by the next one.
+    if prune_missing:
+        wanted = set(file_keys.values())
+        for file_key in [key for key in manifest_files if key not in wanted]:
+            stale_ids.extend(manifest_files.pop(file_key).get("chunks", {}).keys())
+            print(f"Pruned {file_key} from {collection_name}")
+
+    for i in range(0, len(stale_ids), batch_size):
+        collection.delete(ids=stale_ids[i:i + batch_size])
+
+    backfilled = 0
+    if not collection_manifest.get("region_metadata"):
+        backfilled = backfill_region_metadata(collection, batch_size)
+        collection_manifest["region_metadata"] = True
+        if backfilled:
+            print(f"Added region metadata to {backfilled} existing chunks")
+
+    manifest_files.update(updated_entries)
+    # Lets the query router skip regions this collection has no PDF for
+    collection_manifest["regions"] = sorted({region_for_pdf(entry["path"]) for entry in manifest_files.values()})
+    if total_chunks or stale_ids or backfilled:
+        bump_generation(manifest, collection_name)
+    save_manifest(manifest, manifest_path)
+
+    if build_lexical_index and (
+            total_chunks or stale_ids or backfilled
+            or collection_manifest.get("bm25_tokenizer_version") != TOKENIZER_VERSION
+            or not os.path.exists(default_bm25_path(collection_name))):
+        build_bm25_index(collection_name, manifest_path=manifest_path)
+        collection_manifest["bm25_tokenizer_version"] = TOKENIZER_VERSION
+        save_manifest(manifest, manifest_path)
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "files_skipped": len(skipped_files),
+        "chunks": total_chunks,
+        "deleted": len(stale_ids),
+        "batches": total_batches,
+        "seconds": elapsed,
+        "chunks_per_sec": total_chunks / elapsed if elapsed > 0 else 0.0,
+    }
+    print(
+        f"Upserted {total_chunks} chunks, deleted {len(stale_ids)}, skipped {len(skipped_files)} unchanged files "
+        f"in {elapsed:.1f}s ({stats['chunks_per_sec']:.1f} chunks/sec)"
+    )
+    print(f"Total documents in collection: {collection.count()}")
+    return stats
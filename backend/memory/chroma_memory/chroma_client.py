@@ -0,0 +1,41 @@
+#chroma_client.py
+import threading
+from typing import TYPE_CHECKING, Dict
+from backend.utils.lazy import get_lazy_registry
+
+if TYPE_CHECKING:
+    from chromadb import Collection
+    from chromadb.api import ClientAPI
+
+
+def _create_client() -> "ClientAPI":
+    import chromadb
+    return chromadb.PersistentClient()
+
+
+_collections: Dict[str, "Collection"] = {}
+_collections_lock = threading.Lock()
+
+
+def _release_client(client: "ClientAPI") -> None:
+    # Collection handles belong to the client being released
+    with _collections_lock:
+        _collections.clear()
+
+
+_client = get_lazy_registry().register("chroma_client", _create_client, close=_release_client)
+
+
+def get_chroma_client() -> "ClientAPI":
+    """Process-wide persistent Chroma client; it owns the SQLite handle, so create it once."""
+    return _client.get()
+
+
+def get_chroma_collection(collection_name: str) -> "Collection":
+    """Shared handle to `collection_name`, created on first use."""
+    with _collections_lock:
+        collection = _collections.get(collection_name)
+        if collection is None:
+            collection = get_chroma_client().get_or_create_collection(collection_name)
+            _collections[collection_name] = collection
+        return collection
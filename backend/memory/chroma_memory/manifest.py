@@ -0,0 +1,73 @@
+#manifest.py
+import os
+import json
+import time
+from typing import Dict, FrozenSet, Optional
+
+DEFAULT_MANIFEST_PATH = "ingestion_manifest.json"
+
+
+def load_manifest(manifest_path: str = DEFAULT_MANIFEST_PATH) -> Dict:
+    """Load the ingestion manifest, or an empty one if it does not exist yet."""
+    if not os.path.exists(manifest_path):
+        return {"collections": {}}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict, manifest_path: str = DEFAULT_MANIFEST_PATH) -> None:
+    """Atomically write the ingestion manifest."""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def bump_generation(manifest: Dict, collection_name: str) -> int:
+    """Mark a collection's contents as changed; readers compare generations to drop stale caches."""
+    entry = manifest["collections"].setdefault(collection_name, {})
+    entry["generation"] = entry.get("generation", 0) + 1
+    entry["updated_at"] = time.time()
+    return entry["generation"]
+
+
+_summary_cache: Dict[str, tuple] = {}
+
+
+def _collection_summaries(manifest_path: str) -> Dict[str, Dict]:
+    """
+    Generation and region set of every collection in the manifest.
+
+    The manifest is re-read only when its mtime changes, so this is cheap enough to
+    call on every request.
+    """
+    try:
+        mtime = os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _summary_cache.get(manifest_path)
+    if cached is None or cached[0] != mtime:
+        try:
+            manifest = load_manifest(manifest_path)
+        except (OSError, ValueError):
+            return cached[1] if cached else {}
+        summaries = {
+            name: {
+                "generation": entry.get("generation", 0),
+                "regions": frozenset(entry["regions"]) if "regions" in entry else None,
+            }
+            for name, entry in manifest.get("collections", {}).items()
+        }
+        cached = (mtime, summaries)
+        _summary_cache[manifest_path] = cached
+    return cached[1]
+
+
+def get_collection_generation(collection_name: str, manifest_path: str = DEFAULT_MANIFEST_PATH) -> int:
+    """Current ingestion generation of a collection (0 if never ingested)."""
+    return _collection_summaries(manifest_path).get(collection_name, {}).get("generation", 0)
+
+
+def get_collection_regions(collection_name: str, manifest_path: str = DEFAULT_MANIFEST_PATH) -> Optional[FrozenSet[str]]:
+    """Regions the collection has chunks for, or None when the manifest does not record them."""
+    return _collection_summaries(manifest_path).get(collection_name, {}).get("regions")
@@ -0,0 +1,109 @@
+#pdf_extraction.py
+import os
+import gzip
+import json
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+
+DEFAULT_EXTRACTION_CACHE_DIR = os.getenv("PDF_EXTRACTION_CACHE_DIR", "extraction_cache")
+DEFAULT_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path_for(content_hash: str, cache_dir: str = DEFAULT_EXTRACTION_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"{content_hash}.jsonl.gz")
+
+
+def _extract_to_cache(pdf_path: str, cache_path: str) -> int:
+    """
+    Parse one PDF page by page into a gzipped JSONL file ({"text", "metadata"} per
+    page). Runs in a worker process; the file only appears once complete.
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    pages = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for page in PyPDFLoader(pdf_path).lazy_load():
+            f.write(json.dumps({"text": page.page_content, "metadata": page.metadata}, default=str) + "\n")
+            pages += 1
+    os.replace(tmp_path, cache_path)
+    return pages
+
+
+def extract_pdfs(
+        pdf_paths: List[str],
+        file_hashes: Optional[Dict[str, str]] = None,
+        cache_dir: str = DEFAULT_EXTRACTION_CACHE_DIR,
+        workers: int = DEFAULT_EXTRACTION_WORKERS,
+    ) -> Dict[str, str]:
+    """
+    Make sure the page text of every PDF is in the extraction cache.
+
+    The cache is keyed by file content hash, so a PDF is parsed once no matter how
+    often chunking or embedding settings change, or which collection it goes into.
+    PDFs missing from the cache are parsed in parallel, one per worker process.
+
+    Args:
+        pdf_paths: PDF files to extract
+        file_hashes: Content hashes already computed by the caller, by path
+        cache_dir: Directory of the cache files
+        workers: Worker processes (CPU count by default)
+
+    Returns:
+        Dict[str, str]: Cache file of each PDF path
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    file_hashes = file_hashes or {}
+    cache_paths = {
+        pdf_path: cache_path_for(file_hashes.get(pdf_path) or file_hash(pdf_path), cache_dir)
+        for pdf_path in pdf_paths
+    }
+    missing = [pdf_path for pdf_path, cache_path in cache_paths.items() if not os.path.exists(cache_path)]
+    if not missing:
+        return cache_paths
+
+    start = time.perf_counter()
+    total_pages = 0
+    workers = max(1, min(workers, len(missing)))
+    if workers == 1:
+        for pdf_path in missing:
+            total_pages += _extract_to_cache(pdf_path, cache_paths[pdf_path])
+    else:
+        # Spawned rather than forked: the parent may already hold client threads and locks
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(_extract_to_cache, pdf_path, cache_paths[pdf_path]): pdf_path for pdf_path in missing
+            }
+            for future in as_completed(futures):
+                pages = future.result()
+                total_pages += pages
+                print(f"Extracted {futures[future]} ({pages} pages)")
+    print(f"📄 Extracted {len(missing)} PDFs ({total_pages} pages) with {workers} workers "
+          f"in {time.perf_counter() - start:.1f}s")
+    return cache_paths
+
+
+def load_extracted_pages(pdf_path: str, cache_path: str) -> List[Document]:
+    """Pages of a PDF read back from its cache file, as PyPDFLoader would return them."""
+    pages: List[Document] = []
+    with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            # The cache is shared by identical files, so the path is the caller's
+            metadata = dict(record["metadata"], source=pdf_path)
+            pages.append(Document(page_content=record["text"], metadata=metadata))
+    return pages
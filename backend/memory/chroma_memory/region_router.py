@@ -0,0 +1,96 @@
+#region_router.py
+import os
+from typing import Dict, List, Tuple
+from backend.memory.lexical_index.tokenizer import tokenize
+
+# Country-wide overview (Dataset/India.pdf); searched along with any routed region
+NATIONAL_REGION = "india"
+MAX_PLACE_TOKENS = 4
+
+# Region key (the Dataset PDF name without "UT_", lowercased) -> names that place a
+# query in it: the state / UT itself, its well-known cities and destinations.
+# Names shared by several regions (e.g. Aurangabad) or that are common words are left out.
+REGION_PLACES: Dict[str, List[str]] = {
+    "andaman_and_nicobar_islands": ["Andaman and Nicobar Islands", "Andaman", "Nicobar", "Port Blair", "Havelock Island", "Swaraj Dweep", "Neil Island"],
+    "andhra_pradesh": ["Andhra Pradesh", "Andhra", "Visakhapatnam", "Tirupati", "Tirumala", "Vijayawada", "Araku Valley", "Amaravati", "Srisailam"],
+    "arunachal_pradesh": ["Arunachal Pradesh", "Arunachal", "Tawang", "Ziro", "Ziro Valley", "Itanagar", "Bomdila", "Dirang", "Namdapha", "Mechuka"],
+    "assam": ["Assam", "Guwahati", "Kaziranga", "Majuli", "Tezpur", "Jorhat", "Sivasagar", "Manas National Park", "Kamakhya"],
+    "bihar": ["Bihar", "Patna", "Bodh Gaya", "Bodhgaya", "Nalanda", "Rajgir", "Vaishali"],
+    "chandigarh": ["Chandigarh", "Rock Garden", "Sukhna Lake"],
+    "chhattisgarh": ["Chhattisgarh", "Raipur", "Bastar", "Chitrakote", "Jagdalpur"],
+    "dadra_and_nagar_haveli_and_daman_and_diu": ["Dadra and Nagar Haveli", "Daman and Diu", "Dadra", "Nagar Haveli", "Silvassa", "Daman", "Diu"],
+    "delhi": ["Delhi", "New Delhi", "Qutub Minar", "Red Fort", "Chandni Chowk", "India Gate"],
+    "goa": ["Goa", "Panaji", "Panjim", "Calangute", "Baga", "Anjuna", "Palolem", "Vasco da Gama", "Margao", "Dudhsagar"],
+    "gujarat": ["Gujarat", "Ahmedabad", "Surat", "Vadodara", "Rann of Kutch", "Kutch", "Dwarka", "Somnath", "Gir", "Statue of Unity"],
+    "haryana": ["Haryana", "Gurugram", "Kurukshetra", "Panipat", "Faridabad", "Pinjore"],
+    "himachal_pradesh": ["Himachal Pradesh", "Himachal", "Shimla", "Manali", "Dharamshala", "McLeod Ganj", "Kasol", "Spiti", "Kullu", "Dalhousie", "Kasauli", "Bir Billing"],
+    "jammu_and_kashmir": ["Jammu and Kashmir", "Kashmir", "Jammu", "Srinagar", "Gulmarg", "Pahalgam", "Sonamarg", "Dal Lake", "Vaishno Devi", "Katra"],
+    "jharkhand": ["Jharkhand", "Ranchi", "Jamshedpur", "Deoghar", "Netarhat", "Betla"],
+    "karnataka": ["Karnataka", "Bengaluru", "Mysuru", "Hampi", "Coorg", "Kodagu", "Chikmagalur", "Gokarna", "Badami", "Mangaluru", "Udupi", "Kabini"],
+    "kerala": ["Kerala", "Kochi", "Munnar", "Alleppey", "Alappuzha", "Thiruvananthapuram", "Varkala", "Kovalam", "Wayanad", "Thekkady", "Kumarakom", "Kozhikode"],
+    "ladakh": ["Ladakh", "Leh", "Pangong", "Nubra Valley", "Nubra", "Kargil", "Zanskar", "Khardung La"],
+    "lakshadweep": ["Lakshadweep", "Agatti", "Bangaram", "Kavaratti"],
+    "madhya_pradesh": ["Madhya Pradesh", "Bhopal", "Indore", "Khajuraho", "Gwalior", "Ujjain", "Orchha", "Kanha", "Bandhavgarh", "Pachmarhi", "Sanchi", "Mandu"],
+    "maharashtra": ["Maharashtra", "Mumbai", "Pune", "Nashik", "Ajanta", "Ellora", "Lonavala", "Mahabaleshwar", "Shirdi", "Nagpur"],
+    "manipur": ["Manipur", "Imphal", "Loktak Lake", "Loktak", "Ukhrul", "Moirang"],
+    "meghalaya": ["Meghalaya", "Shillong", "Cherrapunji", "Sohra", "Mawlynnong", "Dawki", "Mawsynram"],
+    "mizoram": ["Mizoram", "Aizawl", "Champhai", "Lunglei", "Reiek"],
+    "nagaland": ["Nagaland", "Kohima", "Dimapur", "Dzukou Valley", "Dzukou", "Hornbill Festival", "Mokokchung"],
+    "odisha": ["Odisha", "Bhubaneswar", "Konark", "Chilika", "Cuttack", "Gopalpur", "Simlipal"],
+    "puducherry": ["Puducherry", "Auroville", "Karaikal", "Mahe", "Yanam"],
+    "punjab": ["Punjab", "Amritsar", "Golden Temple", "Wagah", "Ludhiana", "Patiala", "Jalandhar"],
+    "rajasthan": ["Rajasthan", "Jaipur", "Udaipur", "Jodhpur", "Jaisalmer", "Pushkar", "Ranthambore", "Mount Abu", "Bikaner", "Chittorgarh", "Ajmer"],
+    "sikkim": ["Sikkim", "Gangtok", "Pelling", "Lachung", "Lachen", "Yumthang", "Tsomgo Lake", "Nathu La", "Ravangla"],
+    "tamil_nadu": ["Tamil Nadu", "Chennai", "Madurai", "Udhagamandalam", "Kodaikanal", "Mahabalipuram", "Mamallapuram", "Rameswaram", "Kanyakumari", "Thanjavur", "Coimbatore", "Tiruchirappalli"],
+    "telangana": ["Telangana", "Hyderabad", "Warangal", "Charminar", "Golconda", "Ramoji Film City", "Nagarjuna Sagar"],
+    "tripura": ["Tripura", "Agartala", "Unakoti", "Neermahal"],
+    "uttar_pradesh": ["Uttar Pradesh", "Agra", "Taj Mahal", "Varanasi", "Lucknow", "Prayagraj", "Mathura", "Vrindavan", "Ayodhya", "Fatehpur Sikri", "Sarnath"],
+    "uttarakhand": ["Uttarakhand", "Rishikesh", "Haridwar", "Dehradun", "Mussoorie", "Nainital", "Jim Corbett", "Corbett", "Auli", "Kedarnath", "Badrinath", "Valley of Flowers"],
+    "west_bengal": ["West Bengal", "Kolkata", "Darjeeling", "Sundarbans", "Kalimpong", "Siliguri", "Shantiniketan"],
+}
+
+
+def region_for_pdf(pdf_path: str) -> str:
+    """Region key of a Dataset PDF: "UT_Ladakh.pdf" -> "ladakh", "Tamil_Nadu.pdf" -> "tamil_nadu"."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0].lower()
+    return stem[3:] if stem.startswith("ut_") else stem
+
+
+def _build_gazetteer() -> Dict[Tuple[str, ...], str]:
+    gazetteer: Dict[Tuple[str, ...], str] = {}
+    for region, places in REGION_PLACES.items():
+        for place in places:
+            key = tuple(tokenize(place))
+            if key:
+                gazetteer[key] = region
+    return gazetteer
+
+
+# Keyed by token tuples from the lexical tokenizer, so aliases ("Bangalore"),
+# diacritics and spelling variants match the same way as in BM25
+_GAZETTEER = _build_gazetteer()
+
+
+def route_query(query_text: str) -> List[str]:
+    """
+    Regions a query refers to, found by matching its token n-grams (longest first)
+    against the place gazetteer.
+
+    Returns:
+        List[str]: Region keys in order of mention; empty when the query names no
+        state, UT or known destination (search everything then)
+    """
+    tokens = tokenize(query_text)
+    regions: List[str] = []
+    i = 0
+    while i < len(tokens):
+        for size in range(min(MAX_PLACE_TOKENS, len(tokens) - i), 0, -1):
+            region = _GAZETTEER.get(tuple(tokens[i:i + size]))
+            if region is not None:
+                if region not in regions:
+                    regions.append(region)
+                i += size
+                break
+        else:
+            i += 1
+    return regions
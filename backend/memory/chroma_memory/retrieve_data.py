@@ -1,44 +1,391 @@
 #retrieve_data.py
-import chromadb
-from chromadb import QueryResult
-from backend.embeddings.Jina_embeddings import JinaEmbedding, JinaEmbeddingInput
+import os
+import time
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from pydantic import BaseModel
+from backend.embeddings.Base_embeddings import BaseEmbedding
+from backend.embeddings.embedding_config import create_embedding_model
+from backend.embeddings.micro_batching import MicroBatchingEmbedding
+from backend.memory.chroma_memory.chroma_client import get_chroma_collection
+from backend.memory.chroma_memory.manifest import get_collection_regions
+from backend.memory.chroma_memory.region_router import NATIONAL_REGION, route_query
+from backend.memory.lexical_index.bm25 import get_bm25_index
+from backend.memory.lexical_index.fusion import reciprocal_rank_fusion
+from backend.memory.vector_index.index import get_vector_index
+from backend.utils.histogram import Histogram
+from backend.utils.lazy import get_lazy_registry
 
-def query_chroma(query_text: str, collection_name: str = "travel_data", n_results: int = 1) -> str:
+if TYPE_CHECKING:
+    from chromadb import QueryResult
+
+
+EMBEDDING_MICRO_BATCHING = os.getenv("EMBEDDING_MICRO_BATCHING", "true").lower() in ("1", "true", "yes")
+# "chroma" queries the collection; "snapshot" serves it from its exported in-process index
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma")
+# "vector" (embedding search), "lexical" (BM25 only, no embedding call) or
+# "hybrid" (both, merged by reciprocal rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+# Candidates each ranking contributes to hybrid fusion, per requested result
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "4"))
+
+# Search only the regions (states / UTs) a query names, when it names any
+REGION_ROUTING = os.getenv("REGION_ROUTING", "true").lower() in ("1", "true", "yes")
+# Routed searches also cover the national overview chunks
+ROUTING_INCLUDE_NATIONAL = os.getenv("ROUTING_INCLUDE_NATIONAL", "true").lower() in ("1", "true", "yes")
+
+RETRIEVAL_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+_retrieval_latency_ms: Dict[str, Histogram] = {mode: Histogram(RETRIEVAL_LATENCY_BUCKETS_MS) for mode in RETRIEVAL_MODES}
+_routing_counts: Dict[str, int] = {"routed": 0, "global": 0, "fallback": 0}
+_routing_lock = threading.Lock()
+
+
+def _create_query_embedding_model() -> BaseEmbedding:
+    model = create_embedding_model(for_queries=True)
+    # Concurrent requests' single-query embeddings are sent upstream together
+    return MicroBatchingEmbedding(model) if EMBEDDING_MICRO_BATCHING else model
+
+
+_query_embedding_model = get_lazy_registry().register("query_embedding_model", _create_query_embedding_model)
+
+
+def get_query_embedding_model() -> BaseEmbedding:
     """
-    Query ChromaDB with text and return relevant results.
-    
-    Args:
-        query_text: Text to search for in the database
-        collection_name: Name of ChromaDB collection to query
-        n_results: Number of results to return
-        
-    Returns:
-        Query results from ChromaDB
+    Shared query embedding client for the backend selected by EMBEDDING_BACKEND
+    (stateless, so safe to use from concurrent requests).
     """
-    client = chromadb.PersistentClient()
-    collection = client.get_or_create_collection(collection_name)
+    return _query_embedding_model.get()
 
-    embedding_model = JinaEmbedding(JinaEmbeddingInput(
-        model_name="jina-embeddings-v3", 
-        task="text-matching",
-        late_chunking=False,
-        dimensions=1024,
-        embedding_type="float"
-    ))
 
-    embedding_outputs = embedding_model.generate_embedding(query_text)
+class RetrievedChunk(BaseModel):
+    """One retrieval hit."""
+    id: str
+    text: str
+    # Vector distance, or a negated BM25 / fusion score; smaller is better either way
+    distance: Optional[float] = None
+    # PDF file name and page the chunk was extracted from
+    source: Optional[str] = None
+    page: Optional[int] = None
+    region: Optional[str] = None
+    metadata: Dict[str, Any] = {}
 
-    query: QueryResult = collection.query(
-        query_texts=[query_text],
-        query_embeddings=[embedding_outputs],
-        n_results=n_results
-    )
 
-    list_of_documents = query['documents'][0]
+def _to_chunks(result: "QueryResult") -> List[RetrievedChunk]:
+    """Hits of a single-query QueryResult."""
+    ids = result["ids"][0]
+    documents = result["documents"][0]
+    metadatas = (result.get("metadatas") or [None])[0] or [None] * len(ids)
+    distances = (result.get("distances") or [None])[0] or [None] * len(ids)
+    chunks = []
+    for chunk_id, document, metadata, distance in zip(ids, documents, metadatas, distances):
+        metadata = metadata or {}
+        source = metadata.get("source")
+        chunks.append(RetrievedChunk(
+            id=chunk_id,
+            text=document or "",
+            distance=distance,
+            source=os.path.basename(source) if source else None,
+            page=metadata.get("page"),
+            region=metadata.get("region"),
+            metadata=metadata,
+        ))
+    return chunks
+
+
+def format_chunks(chunks: List[RetrievedChunk]) -> str:
+    """The numbered DOCUMENT block the chat prompts embed."""
     final_document_answer = ""
-    for idx, document in enumerate(list_of_documents):
+    for idx, chunk in enumerate(chunks):
         final_document_answer += f"""
-        DOCUMENT {idx+1}: {document}
+        DOCUMENT {idx+1}: {chunk.text}
 
         """
     return final_document_answer
+
+
+def _split_result(result: "QueryResult", position: int) -> "QueryResult":
+    """The single-query QueryResult of one query in a batched result."""
+    return {
+        key: [result[key][position]]
+        for key in ("ids", "documents", "metadatas", "distances")
+        if result.get(key) is not None
+    }
+
+
+def _vector_search(
+        embeddings: List[List[float]],
+        collection_name: str,
+        n_results: int,
+        regions: Optional[List[str]] = None,
+    ) -> "QueryResult":
+    """One batched nearest-neighbour search; only embeddings are sent, so Chroma never embeds the text itself."""
+    if RETRIEVAL_BACKEND == "snapshot":
+        return get_vector_index(collection_name).query(embeddings, n_results=n_results, regions=regions)
+    return get_chroma_collection(collection_name).query(
+        query_embeddings=embeddings,
+        n_results=n_results,
+        where={"region": {"$in": regions}} if regions else None,
+        include=["documents", "metadatas", "distances"]
+    )
+
+
+def _vector_batch(
+        embeddings: List[List[float]],
+        routes: List[Optional[List[str]]],
+        collection_name: str,
+        n_results: int,
+    ) -> List["QueryResult"]:
+    """Vector results per query, with one batched search per distinct region filter."""
+    groups: Dict[Optional[tuple], List[int]] = {}
+    for position, route in enumerate(routes):
+        groups.setdefault(tuple(route) if route else None, []).append(position)
+    results: List[Optional["QueryResult"]] = [None] * len(embeddings)
+    for key, positions in groups.items():
+        batch = _vector_search(
+            [embeddings[position] for position in positions], collection_name, n_results, list(key) if key else None
+        )
+        for offset, position in enumerate(positions):
+            results[position] = _split_result(batch, offset)
+    return results
+
+
+def _lexical_batch(
+        queries: List[str],
+        routes: List[Optional[List[str]]],
+        collection_name: str,
+        n_results: int,
+    ) -> List["QueryResult"]:
+    index = get_bm25_index(collection_name)
+    return [index.query(query, n_results=n_results, regions=route) for query, route in zip(queries, routes)]
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    mode = mode or RETRIEVAL_MODE
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode}")
+    return mode
+
+
+def _count_routing(outcome: str, count: int = 1) -> None:
+    # Retrieval runs on request threads and worker threads alike
+    with _routing_lock:
+        _routing_counts[outcome] += count
+
+
+def _route(query_text: str, collection_name: str) -> Optional[List[str]]:
+    """
+    Regions to restrict the search to, or None to search everything. Regions the
+    collection has no chunks for (per the ingestion manifest) are not routed to.
+    """
+    if not REGION_ROUTING:
+        return None
+    regions = route_query(query_text)
+    available = get_collection_regions(collection_name)
+    if available is not None:
+        regions = [region for region in regions if region in available]
+    if not regions:
+        _count_routing("global")
+        return None
+    _count_routing("routed")
+    if ROUTING_INCLUDE_NATIONAL and (available is None or NATIONAL_REGION in available):
+        return regions + [NATIONAL_REGION]
+    return regions
+
+
+def _candidates(mode: str, n_results: int) -> int:
+    return n_results * HYBRID_CANDIDATE_FACTOR if mode == "hybrid" else n_results
+
+
+def _combine(
+        mode: str,
+        vector: List[Optional["QueryResult"]],
+        lexical: List[Optional["QueryResult"]],
+        n_results: int,
+    ) -> List["QueryResult"]:
+    if mode == "hybrid":
+        return [reciprocal_rank_fusion([v, l], n_results) for v, l in zip(vector, lexical)]
+    return vector if mode == "vector" else lexical
+
+
+def _unanswered(routes: List[Optional[List[str]]], results: List["QueryResult"]) -> List[int]:
+    """
+    Routed queries that found nothing in the regions they named (hits from the
+    national overview alone do not count); they are retried over the whole collection.
+    Only for routes the router picked: regions the caller passed are searched as given.
+    """
+    positions = []
+    for position, (route, result) in enumerate(zip(routes, results)):
+        if not route:
+            continue
+        named = set(route) - {NATIONAL_REGION} or set(route)
+        metadatas = (result.get("metadatas") or [None])[0] or []
+        if not named & {(metadata or {}).get("region") for metadata in metadatas}:
+            positions.append(position)
+    if positions:
+        _count_routing("fallback", len(positions))
+    return positions
+
+
+def _routing_snapshot() -> Dict[str, int]:
+    with _routing_lock:
+        return dict(_routing_counts)
+
+
+def retrieval_stats() -> Dict[str, Dict]:
+    """Latency histogram (milliseconds, embedding included) of each retrieval mode, and region routing counts."""
+    return {
+        "latency_ms": {mode: histogram.snapshot() for mode, histogram in _retrieval_latency_ms.items()},
+        "routing": _routing_snapshot(),
+    }
+
+
+def retrieve(
+        queries: List[str],
+        collection_name: str = "travel_data",
+        n_results: int = 1,
+        mode: Optional[str] = None,
+        regions: Optional[List[str]] = None,
+    ) -> List[List[RetrievedChunk]]:
+    """
+    Retrieve chunks for several queries at once.
+
+    All queries are embedded with one batch call and searched with one batched
+    query per distinct region filter (Chroma or, with RETRIEVAL_BACKEND=snapshot,
+    the exported snapshot). A query that names a state, UT or known destination
+    the collection has chunks for only searches that region's chunks plus the
+    national overview, and falls back to the whole collection if none of the hits
+    comes from the named region. Explicit `regions` are searched without fallback.
+
+    Args:
+        queries: Texts to search for
+        collection_name: Name of ChromaDB collection to query
+        n_results: Number of results per query
+        mode: "vector", "lexical" (BM25, skips the embedding call) or "hybrid"
+            (RETRIEVAL_MODE by default)
+        regions: Region keys to search for every query, overriding the router
+            (no fallback to the whole collection)
+
+    Returns:
+        List[List[RetrievedChunk]]: Hits per query, best first
+    """
+    if not queries:
+        return []
+    mode = _resolve_mode(mode)
+    start = time.perf_counter()
+    routes = [regions or _route(query, collection_name) for query in queries]
+    candidates = _candidates(mode, n_results)
+    embeddings: List[List[float]] = []
+    if mode != "lexical":
+        embedding_model = get_query_embedding_model()
+        # A single query goes through generate_embedding so concurrent callers still micro-batch
+        embeddings = (
+            [embedding_model.generate_embedding(queries[0])] if len(queries) == 1
+            else embedding_model.generate_batch_embeddings(queries)
+        )
+
+    def _search_all(positions: List[int], routes: List[Optional[List[str]]]) -> List["QueryResult"]:
+        vector = lexical = [None] * len(positions)
+        if mode != "lexical":
+            vector = _vector_batch([embeddings[i] for i in positions], routes, collection_name, candidates)
+        if mode != "vector":
+            lexical = _lexical_batch([queries[i] for i in positions], routes, collection_name, candidates)
+        return _combine(mode, vector, lexical, n_results)
+
+    results = _search_all(list(range(len(queries))), routes)
+    retry = [] if regions else _unanswered(routes, results)
+    if retry:
+        for position, result in zip(retry, _search_all(retry, [None] * len(retry))):
+            results[position] = result
+    _retrieval_latency_ms[mode].observe((time.perf_counter() - start) * 1000)
+    return [_to_chunks(result) for result in results]
+
+
+async def aretrieve(
+        queries: List[str],
+        collection_name: str = "travel_data",
+        n_results: int = 1,
+        mode: Optional[str] = None,
+        regions: Optional[List[str]] = None,
+    ) -> List[List[RetrievedChunk]]:
+    """
+    Non-blocking variant of `retrieve`: the embedding goes through the async
+    client and the searches (SQLite-backed Chroma or the snapshot scan, BM25) run
+    in worker threads. In hybrid mode the BM25 searches overlap the embedding call.
+    """
+    if not queries:
+        return []
+    mode = _resolve_mode(mode)
+    start = time.perf_counter()
+    routes = [regions or _route(query, collection_name) for query in queries]
+    candidates = _candidates(mode, n_results)
+    embedding_task = None
+    if mode != "lexical":
+        embedding_model = get_query_embedding_model()
+        embedding_task = asyncio.ensure_future(
+            embedding_model.agenerate_embedding(queries[0]) if len(queries) == 1
+            else embedding_model.agenerate_batch_embeddings(queries)
+        )
+
+    async def _search_all(positions: List[int], routes: List[Optional[List[str]]]) -> List["QueryResult"]:
+        vector = lexical = [None] * len(positions)
+        if mode != "vector":
+            lexical = await asyncio.to_thread(
+                _lexical_batch, [queries[i] for i in positions], routes, collection_name, candidates
+            )
+        if mode != "lexical":
+            embeddings = await embedding_task
+            embeddings = [embeddings] if len(queries) == 1 else embeddings
+            vector = await asyncio.to_thread(
+                _vector_batch, [embeddings[i] for i in positions], routes, collection_name, candidates
+            )
+        return _combine(mode, vector, lexical, n_results)
+
+    try:
+        results = await _search_all(list(range(len(queries))), routes)
+        retry = [] if regions else _unanswered(routes, results)
+        if retry:
+            for position, result in zip(retry, await _search_all(retry, [None] * len(retry))):
+                results[position] = result
+    finally:
+        if embedding_task is not None and not embedding_task.done():
+            embedding_task.cancel()
+    _retrieval_latency_ms[mode].observe((time.perf_counter() - start) * 1000)
+    return [_to_chunks(result) for result in results]
+
+
+def query_chroma(
+        query_text: str,
+        collection_name: str = "travel_data",
+        n_results: int = 1,
+        mode: Optional[str] = None,
+        regions: Optional[List[str]] = None,
+    ) -> str:
+    """
+    Query ChromaDB with text and return relevant results.
+
+    Args:
+        query_text: Text to search for in the database
+        collection_name: Name of ChromaDB collection to query
+        n_results: Number of results to return
+        mode: "vector", "lexical" or "hybrid" (RETRIEVAL_MODE by default)
+        regions: Region keys to search, overriding the router (no fallback)
+
+    Returns:
+        The results formatted as numbered DOCUMENT blocks (see `retrieve` for the hits themselves)
+    """
+    chunks = retrieve([query_text], collection_name, n_results, mode=mode, regions=regions)[0]
+    return format_chunks(chunks)
+
+
+async def aquery_chroma(
+        query_text: str,
+        collection_name: str = "travel_data",
+        n_results: int = 1,
+        mode: Optional[str] = None,
+        regions: Optional[List[str]] = None,
+    ) -> str:
+    """Non-blocking variant of `query_chroma`, over `aretrieve`."""
+    chunks = (await aretrieve([query_text], collection_name, n_results, mode=mode, regions=regions))[0]
+    return format_chunks(chunks)
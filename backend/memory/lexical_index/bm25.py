@@ -0,0 +1,211 @@
+#bm25.py
+import os
+import math
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.memory.chroma_memory.manifest import DEFAULT_MANIFEST_PATH, get_collection_generation
+from backend.memory.lexical_index.tokenizer import TOKENIZER_VERSION, tokenize
+from backend.memory.vector_index.snapshot import (
+    DEFAULT_SNAPSHOT_DIR,
+    SnapshotDocuments,
+    SnapshotFile,
+    document_sections,
+    read_collection,
+    write_snapshot,
+)
+from backend.utils.lazy import get_lazy_registry
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def default_bm25_path(collection_name: str) -> str:
+    return os.path.join(DEFAULT_SNAPSHOT_DIR, f"{collection_name}.bm25")
+
+
+def build_bm25_index(
+        collection_name: str = "travel_data",
+        path: Optional[str] = None,
+        manifest_path: str = DEFAULT_MANIFEST_PATH,
+    ) -> str:
+    """
+    Build the BM25 inverted index over the chunks of a Chroma collection.
+
+    Postings are stored term by term (CSR layout: doc rows and term frequencies,
+    with per-term offsets) in a snapshot file next to the vector snapshot, together
+    with the vocabulary, document lengths, the chunks themselves, the collection's
+    ingestion generation and the tokenizer version.
+
+    Args:
+        collection_name: Chroma collection to index
+        path: Index file (snapshots/<collection>.bm25 by default)
+        manifest_path: Ingestion manifest holding the collection generation
+
+    Returns:
+        str: Path of the written index
+    """
+    path = path or default_bm25_path(collection_name)
+    start = time.perf_counter()
+    _, ids, documents, metadatas, _ = read_collection(collection_name)
+
+    vocabulary: Dict[str, int] = {}
+    term_rows: List[int] = []
+    doc_rows: List[int] = []
+    frequencies: List[int] = []
+    doc_lengths = np.zeros(len(documents), dtype=np.float32)
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        doc_lengths[row] = len(tokens)
+        for term, frequency in Counter(tokens).items():
+            term_rows.append(vocabulary.setdefault(term, len(vocabulary)))
+            doc_rows.append(row)
+            frequencies.append(frequency)
+
+    terms = np.asarray(term_rows, dtype=np.int32)
+    # Stable, so each posting list stays in row order
+    order = np.argsort(terms, kind="stable")
+    postings_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=len(vocabulary)), out=postings_offsets[1:])
+
+    arrays, blobs = document_sections(ids, documents, metadatas)
+    arrays["postings_offsets"] = postings_offsets
+    arrays["postings_docs"] = np.asarray(doc_rows, dtype=np.int32)[order]
+    arrays["postings_tf"] = np.asarray(frequencies, dtype=np.float32)[order]
+    arrays["doc_lengths"] = doc_lengths
+    blobs["vocabulary"] = "\n".join(sorted(vocabulary, key=vocabulary.get)).encode("utf-8")
+
+    header = {
+        "collection": collection_name,
+        "count": len(ids),
+        "terms": len(vocabulary),
+        "avg_doc_length": float(doc_lengths.mean()) if len(doc_lengths) else 0.0,
+        "generation": get_collection_generation(collection_name, manifest_path),
+        "tokenizer_version": TOKENIZER_VERSION,
+        "created_at": time.time(),
+    }
+    write_snapshot(path, header, arrays=arrays, blobs=blobs)
+    print(f"🔤 Built BM25 index of {collection_name} ({len(ids)} chunks, {len(vocabulary)} terms) "
+          f"in {time.perf_counter() - start:.2f}s")
+    return path
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a memory-mapped index written by `build_bm25_index`.
+
+    A query touches only the posting lists of its own terms, and needs no embedding.
+    `query` returns a Chroma QueryResult-shaped dict whose distances are negated
+    BM25 scores (smaller is better, as with vector distances); chunks that share no
+    term with the query are not returned.
+    """
+
+    def __init__(self, path: str, k1: float = BM25_K1, b: float = BM25_B) -> None:
+        self.snapshot = SnapshotFile(path)
+        header = self.snapshot.header
+        self.collection_name: str = header["collection"]
+        self.generation: int = header.get("generation", 0)
+        self.tokenizer_version: int = header.get("tokenizer_version", 1)
+        self.count: int = header["count"]
+        self.k1 = k1
+        self.records = SnapshotDocuments(self.snapshot)
+        self._offsets = self.snapshot.array("postings_offsets")
+        self._docs = self.snapshot.array("postings_docs")
+        self._tf = self.snapshot.array("postings_tf")
+        avg_doc_length = max(header["avg_doc_length"], 1e-9)
+        # Per-document part of the BM25 denominator, computed once
+        self._length_norm = k1 * (1.0 - b + b * self.snapshot.array("doc_lengths") / avg_doc_length)
+        self._vocabulary: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def vocabulary(self) -> Dict[str, int]:
+        if self._vocabulary is None:
+            with self._lock:
+                if self._vocabulary is None:
+                    terms = bytes(self.snapshot.blob("vocabulary")).decode("utf-8").split("\n")
+                    self._vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+        return self._vocabulary
+
+    def search(self, query_text: str, n_results: int = 1, regions: Optional[Sequence[str]] = None) -> List[Tuple[int, float]]:
+        """
+        Best-scoring chunks for a query.
+
+        Args:
+            query_text: Free-text query, tokenized like the chunks
+            n_results: Maximum number of results
+            regions: Only return chunks whose "region" metadata is one of these
+
+        Returns:
+            List[Tuple[int, float]]: (row, BM25 score) pairs, best first
+        """
+        if n_results <= 0:
+            return []
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term, query_frequency in Counter(tokenize(query_text)).items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs, tf = self._docs[start:end], self._tf[start:end]
+            idf = math.log(1.0 + (self.count - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += query_frequency * idf * tf * (self.k1 + 1.0) / (tf + self._length_norm[docs])
+        if regions:
+            region_rows = self.records.rows_where("region", regions)
+            in_region = np.zeros(self.count, dtype=np.float32)
+            in_region[region_rows] = scores[region_rows]
+            scores = in_region
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > n_results:
+            matched = matched[np.argpartition(-scores[matched], n_results - 1)[:n_results]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(row), float(scores[row])) for row in matched]
+
+    def query(self, query_text: str, n_results: int = 1, regions: Optional[Sequence[str]] = None) -> Dict[str, List[List[Any]]]:
+        """Same as `search`, shaped like Chroma's QueryResult (distances are negated scores)."""
+        hits = [(row, -score) for row, score in self.search(query_text, n_results, regions=regions)]
+        return self.records.query_result([hits])
+
+    def close(self) -> None:
+        self.records.release()
+        self._offsets = self._docs = self._tf = self._length_norm = None
+        self.snapshot.close()
+
+
+_indexes_lock = threading.Lock()
+
+
+def _close_indexes(indexes: Dict[str, BM25Index]) -> None:
+    with _indexes_lock:
+        for index in indexes.values():
+            index.close()
+        indexes.clear()
+
+
+_indexes = get_lazy_registry().register("bm25_indexes", dict, close=_close_indexes)
+
+
+def get_bm25_index(collection_name: str = "travel_data", path: Optional[str] = None) -> BM25Index:
+    """
+    Shared BM25 index of `collection_name`, opened on first use.
+
+    Warns when the collection was re-ingested or the tokenizer changed after the
+    index was built.
+    """
+    indexes: Dict[str, BM25Index] = _indexes.get()
+    with _indexes_lock:
+        index = indexes.get(collection_name)
+        if index is None:
+            index = BM25Index(path or default_bm25_path(collection_name))
+            current = get_collection_generation(collection_name)
+            if current != index.generation:
+                print(f"⚠️ BM25 index of {collection_name} is from generation {index.generation}, "
+                      f"collection is at {current}; rebuild it")
+            if index.tokenizer_version != TOKENIZER_VERSION:
+                print(f"⚠️ BM25 index of {collection_name} was built with tokenizer version "
+                      f"{index.tokenizer_version}, current is {TOKENIZER_VERSION}; rebuild it")
+            indexes[collection_name] = index
+        return index
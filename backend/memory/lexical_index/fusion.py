@@ -0,0 +1,40 @@
+#fusion.py
+from typing import Any, Dict, List, Sequence
+
+# Standard RRF constant; damps the advantage of the very first ranks
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(results: Sequence[Dict[str, Any]], n_results: int, k: int = RRF_K) -> Dict[str, List[List[Any]]]:
+    """
+    Merge several single-query rankings by reciprocal rank fusion.
+
+    Every chunk scores sum(1 / (k + rank)) over the rankings it appears in, so
+    chunks that both the lexical and the vector search rank well come first,
+    whatever the scale of their raw scores.
+
+    Args:
+        results: Chroma QueryResult-shaped dicts (ids, documents, metadatas) of one query each
+        n_results: Number of fused results to keep
+        k: RRF constant
+
+    Returns:
+        Dict: QueryResult-shaped fusion, distances being negated RRF scores
+    """
+    scores: Dict[str, float] = {}
+    records: Dict[str, tuple] = {}
+    for result in results:
+        ids = result["ids"][0]
+        documents = result["documents"][0]
+        metadatas = (result.get("metadatas") or [None])[0] or [None] * len(ids)
+        for rank, (chunk_id, document, metadata) in enumerate(zip(ids, documents, metadatas), start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+            records.setdefault(chunk_id, (document, metadata))
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:n_results]
+    return {
+        "ids": [ranked],
+        "documents": [[records[chunk_id][0] for chunk_id in ranked]],
+        "metadatas": [[records[chunk_id][1] for chunk_id in ranked]],
+        "distances": [[-scores[chunk_id] for chunk_id in ranked]],
+    }
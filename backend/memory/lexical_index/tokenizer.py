@@ -0,0 +1,91 @@
+#tokenizer.py
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Bumped whenever tokens change, so indexes built with an older tokenizer are detected
+TOKENIZER_VERSION = 2
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here
+hers him his how i if in into is it its itself just me more most my no nor not now of off on once only or
+other our ours out over own same she should so some such than that the their theirs them then there these
+they this those through to too under until up very was we were what when where which while who whom why
+will with would you your yours
+""".split())
+
+# Former names and common spellings, mapped onto the name the corpus mostly uses
+PLACE_ALIASES = {
+    "bangalore": "bengaluru",
+    "bombay": "mumbai",
+    "madras": "chennai",
+    "calcutta": "kolkata",
+    "pondicherry": "puducherry",
+    "pondy": "puducherry",
+    "cochin": "kochi",
+    "trivandrum": "thiruvananthapuram",
+    "mysore": "mysuru",
+    "mangalore": "mangaluru",
+    "gurgaon": "gurugram",
+    "allahabad": "prayagraj",
+    "banaras": "varanasi",
+    "benares": "varanasi",
+    "kashi": "varanasi",
+    "orissa": "odisha",
+    "simla": "shimla",
+    "baroda": "vadodara",
+    "poona": "pune",
+    "calicut": "kozhikode",
+    "trichy": "tiruchirappalli",
+    "tuticorin": "thoothukudi",
+    "ooty": "udhagamandalam",
+    "kanniyakumari": "kanyakumari",
+    "vizag": "visakhapatnam",
+    "waltair": "visakhapatnam",
+    "gauhati": "guwahati",
+    "dehradoon": "dehradun",
+    # Transliteration variants
+    "puduchery": "puducherry",
+    "pondichery": "puducherry",
+    "darjiling": "darjeeling",
+    "mussorie": "mussoorie",
+    "alleppy": "alleppey",
+    "rameshwaram": "rameswaram",
+    "ranthambhore": "ranthambore",
+}
+
+
+def _fold(token: str) -> str:
+    """
+    Reduce a plural to its singular ("beaches" -> "beach", "cities" -> "city",
+    "hills" -> "hill"), in the manner of a light S-stemmer. Words ending in "ss",
+    "us" or "is" ("pass", "famous", "oasis") and short words are left alone.
+    """
+    if len(token) <= 3 or not token.endswith("s") or token.endswith(("ss", "us", "is")):
+        return token
+    if token.endswith("ies") and not token.endswith(("aies", "eies")):
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    return token[:-1]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lexical tokens of `text`, for indexing and querying alike.
+
+    Lowercases, strips diacritics ("Kōchi" -> "kochi"), splits on anything that is
+    not a letter or digit (so "Ziro-valley" gives "ziro", "valley"), drops English
+    stopwords and single letters, maps former names and transliteration variants
+    of places onto the usual spelling and reduces plurals.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if token in STOPWORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        tokens.append(_fold(PLACE_ALIASES.get(token, token)))
+    return tokens
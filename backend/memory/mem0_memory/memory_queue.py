@@ -0,0 +1,299 @@
+#memory_queue.py
+import os
+import time
+import random
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from backend.utils.lazy import get_lazy_registry
+from backend.memory.mem0_memory.try_mem0 import add_memories_in_mem0
+
+DEFAULT_QUEUE_PATH = os.getenv("MEMORY_QUEUE_PATH", "memory_queue/memory_queue.sqlite3")
+MEMORY_QUEUE_MAX_PENDING = int(os.getenv("MEMORY_QUEUE_MAX_PENDING", "1000"))
+MEMORY_QUEUE_WORKERS = int(os.getenv("MEMORY_QUEUE_WORKERS", "1"))
+MEMORY_QUEUE_BATCH_SIZE = int(os.getenv("MEMORY_QUEUE_BATCH_SIZE", "16"))
+MEMORY_QUEUE_MAX_ATTEMPTS = int(os.getenv("MEMORY_QUEUE_MAX_ATTEMPTS", "5"))
+MEMORY_QUEUE_DRAIN_TIMEOUT = float(os.getenv("MEMORY_QUEUE_DRAIN_TIMEOUT", "30"))
+
+RETRY_BACKOFF_BASE = 2.0
+RETRY_BACKOFF_MAX = 300.0
+IDLE_POLL_SECONDS = 1.0
+
+# Writes the queries of one user in one call: write(queries, user_id, skip, on_added).
+# `skip` holds memories an interrupted earlier attempt already stored; the writer
+# reports each memory it stores through `on_added`.
+WriteFn = Callable[[List[str], str, Set[str], Callable[[str], None]], None]
+
+
+class MemoryWriteQueue:
+    """
+    Durable write-behind queue for mem0 memory ingestion.
+
+    `submit` stores (user_id, query) in SQLite and returns immediately; worker
+    threads take due jobs in batches, coalesce them per user (duplicate queries
+    collapse, the rest go through one extraction call) and hand them to `write`.
+    Failed writes are retried with exponential backoff and parked as `failed`
+    after `max_attempts`. Jobs are deleted only once written, so whatever is
+    pending at shutdown or after a crash is picked up by the next process.
+    Memories stored before a write failed are recorded per job and skipped on
+    retry, so a retried batch does not add them twice.
+    A user's jobs are never processed by two workers at once.
+    """
+
+    def __init__(
+            self,
+            write: WriteFn,
+            path: str = DEFAULT_QUEUE_PATH,
+            max_pending: int = MEMORY_QUEUE_MAX_PENDING,
+            workers: int = MEMORY_QUEUE_WORKERS,
+            batch_size: int = MEMORY_QUEUE_BATCH_SIZE,
+            max_attempts: int = MEMORY_QUEUE_MAX_ATTEMPTS,
+        ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._write = write
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory_jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, query TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, created_at REAL NOT NULL, last_error TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS memory_jobs_due ON memory_jobs(status, next_attempt_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS memory_jobs_user ON memory_jobs(status, user_id, id)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory_progress ("
+            "job_id INTEGER NOT NULL, memory TEXT NOT NULL, PRIMARY KEY (job_id, memory))"
+        )
+        self._conn.commit()
+
+        self._claimed_users: Set[str] = set()
+        self._accepting = True
+        self._stopping = False
+        self.submitted = 0
+        self.rejected = 0
+        self.written = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"mem0-writer-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _pending_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM memory_jobs WHERE status = 'pending'").fetchone()[0]
+
+    def submit(self, user_id: str, query: str, timeout: float = 0.0) -> bool:
+        """
+        Enqueue a memory write. Waits up to `timeout` seconds for room when the queue
+        is full (backpressure) and returns False if the job was not accepted.
+        """
+        give_up_at = time.monotonic() + timeout
+        with self._wakeup:
+            while self._accepting and self._pending_count() >= self.max_pending:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.wait(remaining)
+            if not self._accepting or self._pending_count() >= self.max_pending:
+                self.rejected += 1
+                print(f"⚠️ Memory queue full or closed, dropping memory write for {user_id}")
+                return False
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO memory_jobs (user_id, query, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (user_id, query, now, now),
+            )
+            self._conn.commit()
+            self.submitted += 1
+            self._wakeup.notify_all()
+        return True
+
+    def _claim_batch(self) -> Tuple[Optional[str], List[Tuple[int, str, int]]]:
+        """Claim the jobs of the oldest unclaimed, due user: (user_id, [(id, query, attempts)])."""
+        claimed = list(self._claimed_users)
+        # One row per user with the timing of its oldest job (SQLite takes bare columns
+        # from the MIN() row); a user whose oldest job is backing off waits as a whole,
+        # so writes keep their order
+        row = self._conn.execute(
+            "SELECT user_id, MIN(id) AS head, next_attempt_at FROM memory_jobs "
+            f"WHERE status = 'pending' AND user_id NOT IN ({','.join('?' * len(claimed))}) "
+            "GROUP BY user_id HAVING next_attempt_at <= ? ORDER BY head LIMIT 1",
+            (*claimed, time.time()),
+        ).fetchone()
+        if row is None:
+            return None, []
+        user_id = row[0]
+        jobs = self._conn.execute(
+            "SELECT id, query, attempts FROM memory_jobs WHERE status = 'pending' AND user_id = ? "
+            "ORDER BY id LIMIT ?",
+            (user_id, self.batch_size),
+        ).fetchall()
+        self._claimed_users.add(user_id)
+        return user_id, [(job_id, query, attempts) for job_id, query, attempts in jobs]
+
+    def _wait_for_batch(self) -> Optional[Tuple[str, List[Tuple[int, str, int]]]]:
+        """Block until a user's jobs can be claimed; None once the queue is stopping."""
+        with self._wakeup:
+            user_id, jobs = self._claim_batch()
+            while user_id is None:
+                if self._stopping:
+                    return None
+                self._wakeup.wait(IDLE_POLL_SECONDS)
+                user_id, jobs = self._claim_batch()
+            return user_id, jobs
+
+    def _worker_loop(self) -> None:
+        # Errors outside the write itself (e.g. a locked database) must not kill the
+        # worker: they are logged and the jobs, still pending on disk, are claimed again
+        while True:
+            try:
+                batch = self._wait_for_batch()
+            except Exception as e:
+                print(f"⚠️ Memory queue worker could not claim jobs: {e}")
+                time.sleep(IDLE_POLL_SECONDS)
+                continue
+            if batch is None:
+                return
+            user_id, jobs = batch
+            try:
+                self._process(user_id, jobs)
+            except Exception as e:
+                print(f"⚠️ Memory queue worker failed on the jobs of {user_id}: {e}")
+                time.sleep(IDLE_POLL_SECONDS)
+            finally:
+                with self._wakeup:
+                    self._claimed_users.discard(user_id)
+                    self._wakeup.notify_all()
+
+    def _process(self, user_id: str, jobs: List[Tuple[int, str, int]]) -> None:
+        # Coalesce: one write per user per batch, each distinct query once, oldest first
+        distinct: "OrderedDict[str, str]" = OrderedDict()
+        for _, query, _ in jobs:
+            distinct.setdefault(" ".join(query.split()).lower(), query)
+        queries = list(distinct.values())
+        ids = [job_id for job_id, _, _ in jobs]
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            already_added = {
+                memory for (memory,) in self._conn.execute(
+                    f"SELECT DISTINCT memory FROM memory_progress WHERE job_id IN ({placeholders})", ids
+                )
+            }
+
+        def _on_added(memory: str) -> None:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO memory_progress (job_id, memory) VALUES (?, ?)",
+                    [(job_id, memory) for job_id in ids],
+                )
+                self._conn.commit()
+
+        try:
+            self._write(queries, user_id, already_added, _on_added)
+        except Exception as e:
+            self._retry(jobs, e)
+            return
+        with self._lock:
+            self._conn.execute(f"DELETE FROM memory_jobs WHERE id IN ({placeholders})", ids)
+            self._conn.execute(f"DELETE FROM memory_progress WHERE job_id IN ({placeholders})", ids)
+            self._conn.commit()
+            self.written += len(queries)
+            self.coalesced += len(jobs) - len(queries)
+
+    def _retry(self, jobs: List[Tuple[int, str, int]], error: Exception) -> None:
+        updates, failed = [], 0
+        for job_id, _, attempts in jobs:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                updates.append(("failed", attempts, time.time(), str(error), job_id))
+                failed += 1
+            else:
+                delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempts)))
+                updates.append(("pending", attempts, time.time() + delay, str(error), job_id))
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE memory_jobs SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                updates,
+            )
+            self._conn.commit()
+            self.failed += failed
+        print(f"⚠️ Memory write failed for {len(jobs)} job(s) ({failed} given up): {error}")
+
+    def drain(self, timeout: float = MEMORY_QUEUE_DRAIN_TIMEOUT) -> bool:
+        """Wait until no job is due or in flight; returns False if `timeout` ran out first."""
+        give_up_at = time.monotonic() + timeout
+        with self._wakeup:
+            while True:
+                due = self._conn.execute(
+                    "SELECT COUNT(*) FROM memory_jobs WHERE status = 'pending' AND next_attempt_at <= ?",
+                    (time.time(),),
+                ).fetchone()[0]
+                if not due and not self._claimed_users:
+                    return True
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._wakeup.wait(min(remaining, IDLE_POLL_SECONDS))
+
+    def close(self, drain_timeout: float = MEMORY_QUEUE_DRAIN_TIMEOUT) -> None:
+        """Stop accepting jobs, drain what is due, stop the workers. Undrained jobs stay on disk."""
+        with self._wakeup:
+            self._accepting = False
+            self._wakeup.notify_all()
+        if not self.drain(drain_timeout):
+            print("⚠️ Memory queue not fully drained; remaining jobs are kept for the next start")
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=drain_timeout)
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM memory_jobs GROUP BY status").fetchall())
+            return {
+                "pending": counts.get("pending", 0),
+                "failed_jobs": counts.get("failed", 0),
+                "in_flight_users": len(self._claimed_users),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "written": self.written,
+                "coalesced": self.coalesced,
+                "failed": self.failed,
+            }
+
+
+def _create_memory_queue() -> MemoryWriteQueue:
+    return MemoryWriteQueue(add_memories_in_mem0)
+
+
+# Draining blocks, so shutdown runs it in a worker thread
+_memory_queue = get_lazy_registry().register(
+    "memory_queue",
+    _create_memory_queue,
+    close=lambda queue: asyncio.to_thread(queue.close),
+)
+
+
+def get_memory_queue() -> MemoryWriteQueue:
+    """Process-wide memory write queue; its workers start with it."""
+    return _memory_queue.get()
@@ -1,7 +1,7 @@
 #try_mem0.py
-from backend.llms.groq_llm.inference import GroqInference
+from backend.llms.groq_llm.inference import get_groq_llm
 from backend.utils.json_utils import parse_response_string
-from mem0 import Memory
+from backend.utils.lazy import get_lazy_registry
 
 config = {
     "llm": {
@@ -25,30 +25,61 @@ config = {
     },
 }
 
-mem0 = Memory.from_config(config)
+
+def _load_mem0():
+    from mem0 import Memory
+    return Memory.from_config(config)
+
+
+mem0 = get_lazy_registry().register("mem0", _load_mem0)
 
 
 def add_memory_in_mem0(query, user_id):
     """Add relevant memories extracted from query to mem0 memory."""
-    relevant_memories = _extract_relevant_memories(query)
+    add_memories_in_mem0([query], user_id)
+
+
+def _memory_key(memory: str) -> str:
+    return " ".join(memory.split()).lower()
+
+
+def add_memories_in_mem0(queries, user_id, skip=(), on_added=None):
+    """
+    Add the memories of several queries by the same user, with one extraction call.
+
+    Args:
+        queries: Queries of the user, oldest first
+        user_id: mem0 user the memories belong to
+        skip: Memories already added by an earlier, interrupted attempt
+        on_added: Called with each memory right after mem0 stored it
+    """
+    extracted = _extract_relevant_memories("\n".join(queries))
+    if not isinstance(extracted, list):
+        raise Exception(f"Expected a list of memories from the extractor, got {type(extracted).__name__}.")
+    relevant_memories = list(dict.fromkeys(
+        memory.strip() for memory in extracted if isinstance(memory, str) and memory.strip()
+    ))
 
     print("\n=== Extracted Memories ===")
-    if isinstance(relevant_memories, list):
-        print("\nMemories:")
-        for i, memory in enumerate(relevant_memories, 1):
-            print(f"  {i}. {memory}")
-    else:
-        print("\nMemories:")
-        print(relevant_memories)
+    print("\nMemories:")
+    for i, memory in enumerate(relevant_memories, 1):
+        print(f"  {i}. {memory}")
     print("\n" + "=" * 24 + "\n")
 
+    already_added = {_memory_key(memory) for memory in skip}
     for memory in relevant_memories:
+        if _memory_key(memory) in already_added:
+            print(f"Already added, skipping memory: {memory}")
+            continue
         print(f"Adding memory: {memory}")
-        mem0.add(memory, user_id=user_id)
+        mem0.get().add(memory, user_id=user_id)
+        already_added.add(_memory_key(memory))
+        if on_added is not None:
+            on_added(memory)
 
 
 def extract_relevant_memories(query, user_id) -> list[str]:
-    results = mem0.search(query, user_id=user_id)
+    results = mem0.get().search(query, user_id=user_id)
     raw_results = results.get("results", [])
 
     memories = [m.get("memory", "") for m in raw_results if "memory" in m]
@@ -59,7 +90,7 @@ def extract_relevant_memories(query, user_id) -> list[str]:
 
 def _extract_relevant_memories(query) -> list[str]:
     """Extract the relevant memories from the query using LLM."""
-    llm = GroqInference()
+    llm = get_groq_llm()
 
     system_prompt = """
     You are an expert information extractor. You are given a user query and you need to extract the relevant memories from it.
@@ -0,0 +1,261 @@
+#index.py
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.memory.chroma_memory.manifest import get_collection_generation
+from backend.memory.vector_index.ivf import probe_rows
+from backend.memory.vector_index.quantization import hamming_distances, int8_dots, quantize_binary
+from backend.memory.vector_index.snapshot import SnapshotDocuments, SnapshotFile, default_snapshot_path
+from backend.utils.lazy import get_lazy_registry
+
+# Lists probed per query when the snapshot has an IVF partition (0 = exact search)
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "0"))
+# Candidate scan before full-precision rescoring: "none", "binary" (Hamming), "int8"
+# or "matryoshka" (truncated prefixes)
+VECTOR_INDEX_FIRST_STAGE = os.getenv("VECTOR_INDEX_FIRST_STAGE", "none")
+# Prefix length scanned by the "matryoshka" first stage
+VECTOR_INDEX_MATRYOSHKA_DIM = int(os.getenv("VECTOR_INDEX_MATRYOSHKA_DIM", "256"))
+# Candidates the first stage passes on to rescoring. Sign-bit codes need about 300
+# for the exact top 10 of 384-dim vectors; rescoring that many rows stays cheap
+VECTOR_INDEX_SHORTLIST = int(os.getenv("VECTOR_INDEX_SHORTLIST", "300"))
+SCAN_CHUNK_ROWS = 16384
+METRICS = ("l2", "cosine", "ip")
+
+
+class VectorIndex:
+    """
+    In-process, read-only vector index over a memory-mapped snapshot.
+
+    Distances follow the collection's Chroma metric (squared L2 by default, or
+    cosine / inner-product distance), so `query` ranks like `collection.query` and
+    returns the same QueryResult-shaped dict. Search is an exact vectorized scan, or
+    an IVF probe of the `nprobe` closest lists when the snapshot was exported with
+    `ivf_lists`. A quantized first stage (binary codes compared by Hamming distance,
+    or int8 codes) or a coarse scan over truncated Matryoshka prefixes can pick a
+    shortlist that is then rescored with the full-precision vectors, so only the
+    compact representation is scanned in full.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.snapshot = SnapshotFile(path)
+        header = self.snapshot.header
+        self.collection_name: str = header["collection"]
+        self.generation: int = header.get("generation", 0)
+        self.metric: str = header["metric"]
+        if self.metric not in METRICS:
+            raise ValueError(f"Unsupported distance metric in {path}: {self.metric}")
+        self.embeddings = self.snapshot.array("embeddings")
+        self.sq_norms = self.snapshot.array("sq_norms")
+        self.records = SnapshotDocuments(self.snapshot)
+        self.has_ivf = self.snapshot.has("ivf_centroids")
+        if self.has_ivf:
+            self._ivf = (
+                self.snapshot.array("ivf_centroids"),
+                self.snapshot.array("ivf_order"),
+                self.snapshot.array("ivf_offsets"),
+            )
+        self._binary_codes = self.snapshot.array("binary_codes") if self.snapshot.has("binary_codes") else None
+        self._int8 = (
+            (self.snapshot.array("int8_codes"), self.snapshot.array("int8_scales"))
+            if self.snapshot.has("int8_codes") else None
+        )
+        self._matryoshka: Dict[int, np.ndarray] = {
+            int(name.split("_", 1)[1]): self.snapshot.array(name)
+            for name in self.snapshot.header["sections"] if name.startswith("matryoshka_")
+        }
+        self._norms: Optional[np.ndarray] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.embeddings)
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    def _dot(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """(rows, queries) inner products; a full scan converts float16 blocks chunk by chunk."""
+        if rows is not None:
+            return np.asarray(self.embeddings[rows], dtype=np.float32) @ queries.T
+        if self.embeddings.dtype == np.float32:
+            return self.embeddings @ queries.T
+        dots = np.empty((self.count, len(queries)), dtype=np.float32)
+        for start in range(0, self.count, SCAN_CHUNK_ROWS):
+            block = self.embeddings[start:start + SCAN_CHUNK_ROWS].astype(np.float32)
+            dots[start:start + len(block)] = block @ queries.T
+        return dots
+
+    def _distances(self, dots: np.ndarray, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        sq_norms = self.sq_norms if rows is None else self.sq_norms[rows]
+        if self.metric == "l2":
+            query_sq = np.einsum("ij,ij->i", queries, queries)
+            return sq_norms[:, None] - 2.0 * dots + query_sq[None, :]
+        if self.metric == "ip":
+            return 1.0 - dots
+        if self._norms is None:
+            self._norms = np.sqrt(self.sq_norms)
+        norms = self._norms if rows is None else self._norms[rows]
+        query_norms = np.linalg.norm(queries, axis=1)
+        return 1.0 - dots / np.maximum(norms[:, None] * query_norms[None, :], 1e-12)
+
+    @staticmethod
+    def _top_k(distances: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k smallest distances, closest first."""
+        k = min(k, len(distances))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        return candidates[np.argsort(distances[candidates], kind="stable")]
+
+    def _shortlist(
+            self,
+            query: np.ndarray,
+            rows: Optional[np.ndarray],
+            size: int,
+            first_stage: str,
+            matryoshka_dim: int,
+        ) -> np.ndarray:
+        """Rows (out of `rows`, or all) that the approximate `first_stage` scan ranks best."""
+        if first_stage == "binary":
+            if self._binary_codes is None:
+                raise ValueError("Snapshot has no binary codes; export it with quantization=['binary']")
+            scores = hamming_distances(self._binary_codes, quantize_binary(query), rows)
+        elif first_stage == "int8":
+            if self._int8 is None:
+                raise ValueError("Snapshot has no int8 codes; export it with quantization=['int8']")
+            dots = int8_dots(*self._int8, query, rows)
+            scores = self._distances(dots[:, None], query[None, :], rows)[:, 0]
+        elif first_stage == "matryoshka":
+            prefixes = self._matryoshka.get(matryoshka_dim)
+            if prefixes is None:
+                raise ValueError(
+                    f"Snapshot has no {matryoshka_dim}-dim prefixes; export it with matryoshka_dims=[{matryoshka_dim}]"
+                )
+            prefix = query[:matryoshka_dim] / max(float(np.linalg.norm(query[:matryoshka_dim])), 1e-12)
+            scores = -((prefixes if rows is None else prefixes[rows]) @ prefix)
+        else:
+            raise ValueError(f"Unknown first stage: {first_stage}")
+        top = np.sort(self._top_k(scores, size))  # ascending rows read the mapping in order
+        return top if rows is None else rows[top]
+
+    def search(
+            self,
+            query_embeddings: Sequence[Sequence[float]],
+            n_results: int = 1,
+            nprobe: Optional[int] = None,
+            first_stage: Optional[str] = None,
+            shortlist: Optional[int] = None,
+            matryoshka_dim: Optional[int] = None,
+            regions: Optional[Sequence[str]] = None,
+        ) -> List[List[Tuple[int, float]]]:
+        """
+        Nearest rows for each query.
+
+        Args:
+            query_embeddings: One or more query vectors
+            n_results: Neighbours per query
+            nprobe: IVF lists to probe; exact search when 0 or the snapshot has no IVF
+                (VECTOR_INDEX_NPROBE by default)
+            first_stage: "binary" or "int8" to shortlist candidates from the quantized
+                codes, "matryoshka" from truncated prefixes, before rescoring; "none" to
+                score every candidate in full precision (VECTOR_INDEX_FIRST_STAGE by default)
+            shortlist: Candidates kept by the first stage (VECTOR_INDEX_SHORTLIST by default)
+            matryoshka_dim: Prefix length for the "matryoshka" first stage
+                (VECTOR_INDEX_MATRYOSHKA_DIM by default)
+            regions: Only search chunks whose "region" metadata is one of these (the
+                IVF partition is skipped; the first stage runs within the region)
+
+        Returns:
+            List[List[Tuple[int, float]]]: (row, distance) pairs per query, closest first
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match index dimension {self.dim}")
+        nprobe = VECTOR_INDEX_NPROBE if nprobe is None else nprobe
+        first_stage = first_stage or VECTOR_INDEX_FIRST_STAGE
+        shortlist = max(shortlist or VECTOR_INDEX_SHORTLIST, n_results)
+        matryoshka_dim = matryoshka_dim or VECTOR_INDEX_MATRYOSHKA_DIM
+        region_rows = self.records.rows_where("region", regions) if regions else None
+        if region_rows is not None and not len(region_rows):
+            return [[] for _ in queries]
+        use_ivf = bool(nprobe) and self.has_ivf and region_rows is None
+
+        if use_ivf or first_stage != "none" or region_rows is not None:
+            results = []
+            for query in queries:
+                rows = probe_rows(query, *self._ivf, nprobe=nprobe) if use_ivf else region_rows
+                if first_stage != "none":
+                    rows = self._shortlist(query, rows, shortlist, first_stage, matryoshka_dim)
+                distances = self._distances(self._dot(query[None, :], rows), query[None, :], rows)[:, 0]
+                top = self._top_k(distances, n_results)
+                results.append([(int(rows[i]), float(distances[i])) for i in top])
+            return results
+
+        distances = self._distances(self._dot(queries), queries)
+        results = []
+        for column in range(len(queries)):
+            top = self._top_k(distances[:, column], n_results)
+            results.append([(int(i), float(distances[i, column])) for i in top])
+        return results
+
+    def query(
+            self,
+            query_embeddings: Sequence[Sequence[float]],
+            n_results: int = 1,
+            nprobe: Optional[int] = None,
+            first_stage: Optional[str] = None,
+            shortlist: Optional[int] = None,
+            matryoshka_dim: Optional[int] = None,
+            regions: Optional[Sequence[str]] = None,
+        ) -> Dict[str, List[List[Any]]]:
+        """Same as `search`, shaped like Chroma's QueryResult (ids, documents, metadatas, distances)."""
+        hits = self.search(
+            query_embeddings,
+            n_results=n_results,
+            nprobe=nprobe,
+            first_stage=first_stage,
+            shortlist=shortlist,
+            matryoshka_dim=matryoshka_dim,
+            regions=regions,
+        )
+        return self.records.query_result(hits)
+
+    def close(self) -> None:
+        self.records.release()
+        self.embeddings = self.sq_norms = None
+        self._ivf = self._binary_codes = self._int8 = None
+        self._matryoshka = {}
+        self.snapshot.close()
+
+
+_indexes_lock = threading.Lock()
+
+
+def _close_indexes(indexes: Dict[str, VectorIndex]) -> None:
+    with _indexes_lock:
+        for index in indexes.values():
+            index.close()
+        indexes.clear()
+
+
+_indexes = get_lazy_registry().register("vector_indexes", dict, close=_close_indexes)
+
+
+def get_vector_index(collection_name: str = "travel_data", path: Optional[str] = None) -> VectorIndex:
+    """
+    Shared index over the snapshot of `collection_name`, opened on first use.
+
+    Warns when the collection was re-ingested after the snapshot was exported.
+    """
+    indexes: Dict[str, VectorIndex] = _indexes.get()
+    with _indexes_lock:
+        index = indexes.get(collection_name)
+        if index is None:
+            index = VectorIndex(path or default_snapshot_path(collection_name))
+            current = get_collection_generation(collection_name)
+            if current != index.generation:
+                print(f"⚠️ Snapshot of {collection_name} is from generation {index.generation}, "
+                      f"collection is at {current}; re-export it")
+            indexes[collection_name] = index
+        return index
@@ -0,0 +1,64 @@
+#ivf.py
+from typing import Tuple
+import numpy as np
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50_000
+ASSIGN_CHUNK_ROWS = 8192
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (L2) for every row, computed in chunks."""
+    centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        # |x - c|^2 without the |x|^2 term, which is the same for every centroid
+        distances = centroid_sq[None, :] - 2.0 * (chunk @ centroids.T)
+        assignments[start:start + len(chunk)] = distances.argmin(axis=1)
+    return assignments
+
+
+def train_ivf(vectors: np.ndarray, n_lists: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Partition vectors into `n_lists` inverted lists with k-means.
+
+    Args:
+        vectors: (n, dim) embedding matrix
+        n_lists: Number of clusters (about sqrt(n) is a good start)
+        seed: Random seed for the centroid initialization and training sample
+
+    Returns:
+        Tuple of centroids (n_lists, dim) float32, `order` (n,) int32 holding row
+        indices grouped by list, and `offsets` (n_lists + 1,) int64 so that list `i`
+        is `order[offsets[i]:offsets[i + 1]]`
+    """
+    n = len(vectors)
+    n_lists = max(1, min(n_lists, n))
+    rng = np.random.default_rng(seed)
+    sample_rows = rng.choice(n, size=min(n, max(KMEANS_SAMPLE_SIZE, n_lists)), replace=False)
+    sample = np.asarray(vectors[np.sort(sample_rows)], dtype=np.float32)
+
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = _nearest_centroid(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=n_lists)
+        filled = counts > 0
+        # Empty clusters keep their previous centroid
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+    assignments = _nearest_centroid(vectors, centroids)
+    order = np.argsort(assignments, kind="stable").astype(np.int32)
+    offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+    return centroids, order, offsets
+
+
+def probe_rows(query: np.ndarray, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray, nprobe: int) -> np.ndarray:
+    """Rows of the `nprobe` lists whose centroids are closest to `query`."""
+    nprobe = max(1, min(nprobe, len(centroids)))
+    distances = np.einsum("ij,ij->i", centroids, centroids) - 2.0 * (centroids @ query)
+    lists = np.argpartition(distances, nprobe - 1)[:nprobe]
+    return np.concatenate([order[offsets[i]:offsets[i + 1]] for i in lists])
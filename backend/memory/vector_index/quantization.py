@@ -0,0 +1,57 @@
+#quantization.py
+from typing import Optional, Tuple
+import numpy as np
+
+QUANTIZATION_MODES = ("binary", "int8")
+SCAN_CHUNK_ROWS = 16384
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed: (n, dim) floats -> (n, ceil(dim / 8)) uint8."""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-dimension int8 quantization.
+
+    Returns:
+        Tuple of codes (n, dim) int8 and scales (dim,) float32, with
+        vectors ~= codes * scales
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=0) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _popcount(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits)
+    return _POPCOUNT[bits]
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Hamming distance from `query_code` to every row of `codes` (or to `rows` only)."""
+    if rows is not None:
+        return _popcount(codes[rows] ^ query_code).sum(axis=1, dtype=np.int32)
+    distances = np.empty(len(codes), dtype=np.int32)
+    for start in range(0, len(codes), SCAN_CHUNK_ROWS):
+        block = codes[start:start + SCAN_CHUNK_ROWS]
+        distances[start:start + len(block)] = _popcount(block ^ query_code).sum(axis=1, dtype=np.int32)
+    return distances
+
+
+def int8_dots(codes: np.ndarray, scales: np.ndarray, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Approximate inner products of `query` with the int8-coded rows (scales folded into the query)."""
+    scaled_query = query * scales
+    if rows is not None:
+        return codes[rows].astype(np.float32) @ scaled_query
+    dots = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), SCAN_CHUNK_ROWS):
+        block = codes[start:start + SCAN_CHUNK_ROWS]
+        dots[start:start + len(block)] = block.astype(np.float32) @ scaled_query
+    return dots
@@ -0,0 +1,289 @@
+#snapshot.py
+import os
+import json
+import mmap
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.memory.chroma_memory.manifest import DEFAULT_MANIFEST_PATH, get_collection_generation
+from backend.memory.vector_index.ivf import train_ivf
+from backend.memory.vector_index.quantization import QUANTIZATION_MODES, quantize_binary, quantize_int8
+
+DEFAULT_SNAPSHOT_DIR = os.getenv("VECTOR_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_MAGIC = b"TMVSNAP1"
+SNAPSHOT_VERSION = 1
+# Sections start on 64-byte boundaries so the mapped arrays are aligned
+ALIGNMENT = 64
+EXPORT_PAGE_SIZE = 1000
+
+
+def default_snapshot_path(collection_name: str) -> str:
+    return os.path.join(DEFAULT_SNAPSHOT_DIR, f"{collection_name}.snapshot")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(path: str, header: Dict[str, Any], arrays: Dict[str, np.ndarray], blobs: Dict[str, bytes]) -> None:
+    """
+    Write a single-file snapshot: magic, header length, JSON header, then each
+    array and blob section at an aligned offset. Written to a temp file and
+    renamed into place, so readers never see a partial snapshot.
+
+    Args:
+        path: Destination file
+        header: JSON-serializable metadata; section locations are added to it
+        arrays: Named NumPy arrays, stored raw (C order) with dtype and shape
+        blobs: Named byte strings
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+    payloads: List[bytes] = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        sections[name] = {"offset": offset, "nbytes": array.nbytes, "dtype": array.dtype.str, "shape": list(array.shape)}
+        payloads.append(array.tobytes())
+        offset = _align(offset + array.nbytes)
+    for name, blob in blobs.items():
+        sections[name] = {"offset": offset, "nbytes": len(blob)}
+        payloads.append(blob)
+        offset = _align(offset + len(blob))
+
+    header_bytes = json.dumps(dict(header, version=SNAPSHOT_VERSION, sections=sections)).encode("utf-8")
+    data_start = _align(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, payload in zip(sections, payloads):
+            f.seek(data_start + sections[name]["offset"])
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SnapshotFile:
+    """
+    Read-only, memory-mapped view of a snapshot written by `write_snapshot`.
+
+    Arrays are zero-copy views into the mapping, so processes serving the same
+    snapshot share its pages through the OS page cache and opening it is instant.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a vector snapshot")
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header_len = int.from_bytes(self._mmap[len(SNAPSHOT_MAGIC):header_start], "little")
+        self.header: Dict[str, Any] = json.loads(self._mmap[header_start:header_start + header_len])
+        if self.header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.header.get('version')} in {path}")
+        self._data_start = _align(header_start + header_len)
+
+    def has(self, name: str) -> bool:
+        return name in self.header["sections"]
+
+    def array(self, name: str) -> np.ndarray:
+        section = self.header["sections"][name]
+        dtype = np.dtype(section["dtype"])
+        count = int(np.prod(section["shape"])) if section["shape"] else 1
+        array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._data_start + section["offset"])
+        return array.reshape(section["shape"])
+
+    def blob(self, name: str) -> memoryview:
+        section = self.header["sections"][name]
+        start = self._data_start + section["offset"]
+        return memoryview(self._mmap)[start:start + section["nbytes"]]
+
+    def close(self) -> None:
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Arrays handed out are still referenced; the mapping goes away with them
+            pass
+
+
+class SnapshotDocuments:
+    """
+    Ids, documents and metadata stored in a snapshot by `document_sections`, looked
+    up by row. Ids and metadata are decoded on first use; documents are sliced out of
+    the mapping one at a time.
+    """
+
+    def __init__(self, snapshot: SnapshotFile) -> None:
+        self._snapshot = snapshot
+        self._offsets = snapshot.array("doc_offsets")
+        self._documents = snapshot.blob("documents")
+        self._ids: Optional[List[str]] = None
+        self._metadatas: Optional[List[Dict[str, Any]]] = None
+        self._rows_by_value: Dict[str, Dict[Any, np.ndarray]] = {}
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            self._ids = json.loads(bytes(self._snapshot.blob("ids")))
+        return self._ids
+
+    @property
+    def metadatas(self) -> List[Dict[str, Any]]:
+        if self._metadatas is None:
+            self._metadatas = json.loads(bytes(self._snapshot.blob("metadatas")))
+        return self._metadatas
+
+    def document(self, row: int) -> str:
+        return bytes(self._documents[self._offsets[row]:self._offsets[row + 1]]).decode("utf-8")
+
+    def rows_where(self, key: str, values: Sequence[Any]) -> np.ndarray:
+        """Sorted rows whose metadata `key` is one of `values` (the grouping is built once per key)."""
+        groups = self._rows_by_value.get(key)
+        if groups is None:
+            rows_by_value: Dict[Any, List[int]] = defaultdict(list)
+            for row, metadata in enumerate(self.metadatas):
+                rows_by_value[metadata.get(key)].append(row)
+            groups = {value: np.asarray(rows, dtype=np.int64) for value, rows in rows_by_value.items()}
+            self._rows_by_value[key] = groups
+        parts = [groups[value] for value in values if value in groups]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def query_result(self, hits: List[List[Tuple[int, float]]]) -> Dict[str, List[List[Any]]]:
+        """(row, distance) hits per query, shaped like Chroma's QueryResult."""
+        return {
+            "ids": [[self.ids[row] for row, _ in query_hits] for query_hits in hits],
+            "documents": [[self.document(row) for row, _ in query_hits] for query_hits in hits],
+            "metadatas": [[self.metadatas[row] for row, _ in query_hits] for query_hits in hits],
+            "distances": [[distance for _, distance in query_hits] for query_hits in hits],
+        }
+
+    def release(self) -> None:
+        self._documents.release()
+        self._offsets = self._documents = None
+
+
+def read_collection(collection_name: str, include_embeddings: bool = False) -> Tuple[
+        Any, List[str], List[str], List[Dict[str, Any]], Optional[np.ndarray]]:
+    """
+    Page through every record of a Chroma collection.
+
+    Returns:
+        Tuple of the collection handle, ids, documents, metadatas and (when
+        `include_embeddings`) the float32 embedding matrix
+    """
+    from backend.memory.chroma_memory.chroma_client import get_chroma_collection
+
+    collection = get_chroma_collection(collection_name)
+    include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    embeddings: List[np.ndarray] = []
+    total = collection.count()
+    for offset in range(0, total, EXPORT_PAGE_SIZE):
+        page = collection.get(limit=EXPORT_PAGE_SIZE, offset=offset, include=include)
+        ids.extend(page["ids"])
+        documents.extend(doc or "" for doc in page["documents"])
+        metadatas.extend(meta or {} for meta in page["metadatas"])
+        if include_embeddings:
+            embeddings.append(np.asarray(page["embeddings"], dtype=np.float32))
+    if not ids:
+        raise ValueError(f"Collection {collection_name} is empty")
+    matrix = np.concatenate(embeddings) if include_embeddings else None
+    return collection, ids, documents, metadatas, matrix
+
+
+def document_sections(
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, bytes]]:
+    """Snapshot sections read back by `SnapshotDocuments`: one UTF-8 blob plus row offsets, ids, metadata."""
+    encoded_docs = [doc.encode("utf-8") for doc in documents]
+    doc_offsets = np.zeros(len(encoded_docs) + 1, dtype=np.int64)
+    np.cumsum([len(doc) for doc in encoded_docs], out=doc_offsets[1:])
+    arrays = {"doc_offsets": doc_offsets}
+    blobs = {
+        "documents": b"".join(encoded_docs),
+        "ids": json.dumps(ids).encode("utf-8"),
+        "metadatas": json.dumps(metadatas).encode("utf-8"),
+    }
+    return arrays, blobs
+
+
+def export_collection_snapshot(
+        collection_name: str = "travel_data",
+        path: Optional[str] = None,
+        dtype: str = "float16",
+        ivf_lists: int = 0,
+        quantization: Sequence[str] = (),
+        matryoshka_dims: Sequence[int] = (),
+        manifest_path: str = DEFAULT_MANIFEST_PATH,
+    ) -> str:
+    """
+    Export a Chroma collection to a snapshot for the in-process serving index.
+
+    Stores the embedding matrix (float16 or float32), squared row norms, the
+    documents (one UTF-8 blob plus row offsets), ids and metadata, the collection's
+    distance metric and its ingestion generation, so a stale snapshot can be told
+    apart from a current one.
+
+    Args:
+        collection_name: Chroma collection to export
+        path: Snapshot file (snapshots/<collection>.snapshot by default)
+        dtype: Storage type of the embedding matrix, "float16" or "float32"
+        ivf_lists: Also train an IVF partition with this many lists (0 = exact search only)
+        quantization: Also store "binary" (sign bits) and/or "int8" codes for a
+            quantized first-pass scan
+        matryoshka_dims: Also store the re-normalized leading `dim` components of every
+            vector (e.g. 128, 256) for a coarse Matryoshka first-pass scan
+        manifest_path: Ingestion manifest holding the collection generation
+
+    Returns:
+        str: Path of the written snapshot
+    """
+    if dtype not in ("float16", "float32"):
+        raise ValueError("dtype must be float16 or float32")
+    unknown = set(quantization) - set(QUANTIZATION_MODES)
+    if unknown:
+        raise ValueError(f"Unknown quantization modes: {sorted(unknown)}")
+    path = path or default_snapshot_path(collection_name)
+    start = time.perf_counter()
+    collection, ids, documents, metadatas, matrix = read_collection(collection_name, include_embeddings=True)
+
+    header = {
+        "collection": collection_name,
+        "count": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "metric": (collection.metadata or {}).get("hnsw:space", "l2"),
+        "generation": get_collection_generation(collection_name, manifest_path),
+        "created_at": time.time(),
+    }
+    arrays, blobs = document_sections(ids, documents, metadatas)
+    arrays["embeddings"] = matrix.astype(dtype)
+    # From the float32 vectors, so distances do not inherit float16 rounding twice
+    arrays["sq_norms"] = np.einsum("ij,ij->i", matrix, matrix).astype(np.float32)
+    if ivf_lists:
+        arrays["ivf_centroids"], arrays["ivf_order"], arrays["ivf_offsets"] = train_ivf(matrix, ivf_lists)
+    if "binary" in quantization:
+        arrays["binary_codes"] = quantize_binary(matrix)
+    if "int8" in quantization:
+        arrays["int8_codes"], arrays["int8_scales"] = quantize_int8(matrix)
+    for dim in matryoshka_dims:
+        if not 0 < dim < matrix.shape[1]:
+            raise ValueError(f"Matryoshka dimension {dim} must be below the embedding dimension {matrix.shape[1]}")
+        # Contiguous float32 copy: the coarse scan reads only these bytes and runs on BLAS
+        prefix = matrix[:, :dim]
+        arrays[f"matryoshka_{dim}"] = prefix / np.maximum(np.linalg.norm(prefix, axis=1, keepdims=True), 1e-12)
+
+    write_snapshot(path, header, arrays=arrays, blobs=blobs)
+    print(f"📦 Exported {len(ids)} vectors from {collection_name} to {path} in {time.perf_counter() - start:.2f}s")
+    return path
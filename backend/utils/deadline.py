@@ -0,0 +1,43 @@
+#deadline.py
+import os
+import time
+from typing import Optional
+
+DEFAULT_CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "60"))
+# Upper bound accepted for a client-supplied deadline; longer values are rejected
+MAX_CHAT_DEADLINE_SECONDS = float(os.getenv("MAX_CHAT_DEADLINE_SECONDS", "300"))
+
+
+class Deadline:
+    """
+    Latency budget for one request, passed down to every stage that can block.
+
+    Stages ask how much time is left (`remaining`), how much of it they may use
+    (`share`), or derive a tighter deadline for a sub-task (`child`).
+    """
+
+    def __init__(self, seconds: float, _expires_at: Optional[float] = None) -> None:
+        self.total = seconds
+        self.expires_at = _expires_at if _expires_at is not None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def share(self, fraction: float) -> float:
+        """Seconds a stage allotted `fraction` of the total budget may still spend."""
+        return min(self.remaining(), self.total * fraction)
+
+    def child(self, reserve: float = 0.0) -> "Deadline":
+        """Deadline that expires `reserve` seconds before this one, leaving time for later stages."""
+        expires_at = self.expires_at - reserve
+        return Deadline(max(0.0, expires_at - time.monotonic()), _expires_at=expires_at)
+
+    def timeout(self, minimum: float = 1.0) -> float:
+        """Timeout for a single upstream call: the remaining time, but never below `minimum`."""
+        return max(minimum, self.remaining())
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.2f}s of {self.total:.2f}s)"
@@ -0,0 +1,34 @@
+#histogram.py
+import threading
+from typing import Dict, Sequence
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram; `buckets` are the inclusive upper edges."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            for idx, edge in enumerate(self.buckets):
+                if value <= edge:
+                    self._counts[idx] += 1
+                    return
+            self._counts[-1] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            buckets = {f"<={edge}": count for edge, count in zip(self.buckets, self._counts)}
+            buckets[f">{self.buckets[-1]}"] = self._counts[-1]
+            return {
+                "count": self._count,
+                "mean": self._sum / self._count if self._count else 0.0,
+                "buckets": buckets,
+            }
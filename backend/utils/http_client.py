@@ -0,0 +1,191 @@
+#http_client.py
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Optional, Tuple
+import httpx
+import requests
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class HTTPClientConfig(BaseModel):
+    pool_connections: int = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    pool_maxsize: int = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+    connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    read_timeout: float = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    max_retries: int = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    backoff_base: float = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+    backoff_max: float = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+
+
+def _backoff_delay(config: HTTPClientConfig, attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), config.backoff_max)
+        except ValueError:
+            pass
+    ceiling = min(config.backoff_max, config.backoff_base * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class HTTPClient:
+    """
+    Shared HTTP client with keep-alive connection pools, timeouts and retries.
+
+    `pool_maxsize` caps the open connections per host (callers wait for a free
+    connection instead of opening more). Connection errors, timeouts and
+    429/5xx responses are retried with full-jitter exponential backoff, honouring
+    the server's Retry-After header when it sends one.
+    """
+
+    def __init__(self, config: Optional[HTTPClientConfig] = None) -> None:
+        self.config = config or HTTPClientConfig()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+            pool_block=True,
+            max_retries=0,
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return (self.config.connect_timeout, self.config.read_timeout)
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        return _backoff_delay(self.config, attempt, retry_after)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying transient failures.
+
+        Returns the last response once retries are exhausted, so callers keep
+        deciding how to handle error payloads; network errors are re-raised.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.config.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"⚠️ {method} {url} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.config.max_retries:
+                    return response
+                delay = self.backoff_delay(attempt, response.headers.get("Retry-After"))
+                print(f"⚠️ {method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class AsyncHTTPClient:
+    """
+    Non-blocking counterpart of `HTTPClient` built on `httpx.AsyncClient`.
+
+    Same timeouts and retry policy, for use from the event loop. httpx has no
+    per-host connection limit, so `pool_maxsize` caps its connections overall;
+    since this client only talks to a couple of APIs, that is never looser than
+    the sync client's per-host cap.
+    """
+
+    def __init__(self, config: Optional[HTTPClientConfig] = None) -> None:
+        self.config = config or HTTPClientConfig()
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.config.pool_maxsize,
+                max_keepalive_connections=self.config.pool_maxsize,
+            ),
+            timeout=httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout),
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt >= self.config.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"⚠️ {method} {url} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.config.max_retries:
+                    return response
+                delay = self.backoff_delay(attempt, response.headers.get("Retry-After"))
+                print(f"⚠️ {method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        return _backoff_delay(self.config, attempt, retry_after)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Process-wide HTTP client, so every caller reuses the same connection pools."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
+
+
+def close_http_client() -> None:
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+_async_client: Optional[AsyncHTTPClient] = None
+
+
+def get_async_http_client() -> AsyncHTTPClient:
+    """Process-wide async HTTP client. Create and use it from the serving event loop."""
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = AsyncHTTPClient()
+        return _async_client
+
+
+async def aclose_async_http_client() -> None:
+    global _async_client
+    with _client_lock:
+        client, _async_client = _async_client, None
+    if client is not None:
+        await client.aclose()
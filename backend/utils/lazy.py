@@ -0,0 +1,115 @@
+#lazy.py
+import time
+import inspect
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class LazyResource:
+    """
+    A heavy object (model, client) built by `factory` on first `get()`, then shared.
+
+    `close(value)`, if given, releases it at shutdown; it may be a coroutine function.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], close: Optional[Callable[[Any], Any]] = None) -> None:
+        self.name = name
+        self._factory = factory
+        self._close = close
+        self._value: Any = None
+        self._initialized = False
+        self._lock = threading.Lock()
+        self.init_seconds: Optional[float] = None
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    def get(self) -> Any:
+        if self._initialized:
+            return self._value
+        with self._lock:
+            if not self._initialized:
+                start = time.perf_counter()
+                self._value = self._factory()
+                self.init_seconds = time.perf_counter() - start
+                self._initialized = True
+                print(f"⚙️ Loaded {self.name} in {self.init_seconds:.2f}s")
+        return self._value
+
+    async def aclose(self) -> None:
+        """Release the object if it was built; the next `get()` builds a fresh one."""
+        with self._lock:
+            if not self._initialized:
+                return
+            value, self._value, self._initialized = self._value, None, False
+        if self._close is not None:
+            result = self._close(value)
+            if inspect.isawaitable(result):
+                await result
+
+
+class LazyRegistry:
+    """
+    Named lazily-initialized resources.
+
+    Modules register their heavy objects here at import time (cheap) and resolve
+    them on first use, so importing the API does not load models or open clients.
+    Once built, a resource is shared by every request until `aclose()` releases it
+    at shutdown. `warm_up()` builds them ahead of the first request when startup
+    time matters less than first-request latency.
+    """
+
+    def __init__(self) -> None:
+        self._resources: Dict[str, LazyResource] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], close: Optional[Callable[[Any], Any]] = None) -> LazyResource:
+        with self._lock:
+            if name in self._resources:
+                raise ValueError(f"Lazy resource already registered: {name}")
+            resource = LazyResource(name, factory, close)
+            self._resources[name] = resource
+            return resource
+
+    def get(self, name: str) -> Any:
+        return self._resources[name].get()
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, Optional[float]]:
+        """
+        Initialize the given resources (all of them by default).
+
+        Returns:
+            Dict[str, Optional[float]]: Seconds each one took to load, or None if it failed
+        """
+        timings: Dict[str, Optional[float]] = {}
+        for name in (list(names) if names is not None else list(self._resources)):
+            try:
+                self._resources[name].get()
+                timings[name] = self._resources[name].init_seconds
+            except Exception as e:
+                print(f"⚠️ Failed to warm up {name}: {e}")
+                timings[name] = None
+        return timings
+
+    async def aclose(self) -> None:
+        """Release every built resource, most recently registered first, e.g. at app shutdown."""
+        for resource in reversed(list(self._resources.values())):
+            try:
+                await resource.aclose()
+            except Exception as e:
+                print(f"⚠️ Failed to close {resource.name}: {e}")
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"initialized": resource.initialized, "init_seconds": resource.init_seconds}
+            for name, resource in self._resources.items()
+        }
+
+
+_registry = LazyRegistry()
+
+
+def get_lazy_registry() -> LazyRegistry:
+    """Process-wide registry of lazily loaded models and clients."""
+    return _registry
@@ -1,9 +1,54 @@
 #semantic.py
-from sentence_transformers import SentenceTransformer, util
+from typing import List, Optional, Tuple
+from backend.embeddings.Base_embeddings import BaseEmbedding
+from backend.utils.lazy import get_lazy_registry
+
+
+def _load_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer("all-MiniLM-L6-v2")
+
+
+model = get_lazy_registry().register("sentence_transformer", _load_model)
+
+
+def rank_similar(
+        query: str,
+        candidates: List[str],
+        top_k: Optional[int] = None,
+        threshold: Optional[float] = None,
+    ) -> List[Tuple[int, float]]:
+    """
+    Rank `candidates` by similarity to `query`.
+
+    The query and all candidates are encoded together in one batch (a single
+    forward pass however many candidates there are) as unit-length float32 vectors.
+
+    Args:
+        query: Text to compare against
+        candidates: Texts to rank
+        top_k: Keep at most this many (all by default)
+        threshold: Keep only candidates scoring strictly above this
+
+    Returns:
+        List[Tuple[int, float]]: (candidate index, cosine similarity), best first
+    """
+    if not candidates:
+        return []
+    embeddings = model.get().encode([query] + list(candidates), convert_to_numpy=True, normalize_embeddings=True)
+    return BaseEmbedding.top_k_similar(
+        embeddings[0],
+        embeddings[1:],
+        k=top_k or len(candidates),
+        normalized=True,
+        threshold=threshold,
+    )
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
 def is_similar_query(query1: str, query2: str, threshold: float = 0.75) -> bool:
-    embeddings = model.encode([query1, query2], convert_to_tensor=True)
-    similarity = util.pytorch_cos_sim(embeddings[0], embeddings[1]).item()
-    return similarity > threshold
+    return bool(rank_similar(query1, [query2], threshold=threshold))
+
+
+def is_similar_to_any(query: str, candidates: List[str], threshold: float = 0.75) -> bool:
+    """Whether any candidate is similar to `query`, at the cost of one batched encode."""
+    return bool(rank_similar(query, candidates, top_k=1, threshold=threshold))
@@ -0,0 +1,77 @@
+#embedding_backend_benchmark.py
+"""
+Compare the remote Jina embedding backend with the local in-process one.
+
+    python benchmarks/embedding_backend_benchmark.py [--backends jina local] [--queries 50] [--batch 64]
+
+For each backend, reports single-query latency (what a /chat request pays) and
+batch throughput (what ingestion gets). The embedding cache is bypassed. The local
+backend is configured through the LOCAL_EMBEDDING_* environment variables, e.g.
+LOCAL_EMBEDDING_INT8=true or LOCAL_EMBEDDING_THREADS=4.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.embeddings.embedding_config import EmbeddingConfig, create_embedding_model
+
+QUERIES = [
+    "Best time to visit Jaipur and entry fees for Amber Fort",
+    "Beaches to visit in Goa in December",
+    "Trekking routes near Manali for beginners",
+    "Temples in Madurai and their timings",
+    "How to reach Leh from Delhi by road",
+]
+PASSAGE = (
+    "The fort is open from 8 AM to 5:30 PM on all days. Entry fees are INR 100 for Indian "
+    "nationals and INR 500 for foreign nationals; the light and sound show runs in the evening."
+)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def benchmark(backend: str, n_queries: int, batch: int) -> None:
+    model = create_embedding_model(for_queries=True, config=EmbeddingConfig(backend=backend), use_cache=False)
+    model.generate_embedding("warm up")  # model load / connection setup is not per-query cost
+
+    latencies = []
+    for i in range(n_queries):
+        start = time.perf_counter()
+        model.generate_embedding(f"{QUERIES[i % len(QUERIES)]} ({i})")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    texts = [f"{PASSAGE} [{i}]" for i in range(batch)]
+    start = time.perf_counter()
+    model.generate_batch_embeddings(texts)
+    throughput = batch / (time.perf_counter() - start)
+
+    print(
+        f"{backend:<6} query p50 {statistics.median(latencies):7.1f}ms  p95 {_percentile(latencies, 0.95):7.1f}ms  "
+        f"batch of {batch}: {throughput:8.1f} texts/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["jina", "local"])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        try:
+            benchmark(backend, args.queries, args.batch)
+        except Exception as e:
+            print(f"{backend:<6} failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#matryoshka_retrieval_benchmark.py
+"""
+Latency vs recall of two-stage Matryoshka retrieval.
+
+    python benchmarks/matryoshka_retrieval_benchmark.py [--collection travel_data] [--export]
+        [--dims 64 128 256 512] [--shortlists 20 50 100 200] [--queries 200] [--query-file queries.txt] [--k 5]
+
+A coarse scan over the truncated, re-normalized `dim`-length prefixes picks a
+shortlist that is reranked with the full vectors. `--export` writes the snapshot
+with the requested prefixes first. Queries are the lines of `--query-file`,
+embedded with the configured query model, or else stored vectors with a little
+noise added. For every (dim, shortlist) pair, reports p50/p95 latency and
+recall@k against exact full-dimension search.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.memory.vector_index.index import VectorIndex
+from backend.memory.vector_index.snapshot import default_snapshot_path, export_collection_snapshot
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _queries(index: VectorIndex, args: argparse.Namespace) -> np.ndarray:
+    if args.query_file:
+        from backend.memory.chroma_memory.retrieve_data import get_query_embedding_model
+        with open(args.query_file, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return np.asarray(get_query_embedding_model().generate_batch_embeddings(texts), dtype=np.float32)
+    rng = np.random.default_rng(0)
+    rows = rng.choice(index.count, size=min(args.queries, index.count), replace=False)
+    base = np.asarray(index.embeddings[np.sort(rows)], dtype=np.float32)
+    scale = args.noise * np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(index.dim)
+    return base + rng.normal(size=base.shape).astype(np.float32) * scale
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="travel_data")
+    parser.add_argument("--snapshot", default=None)
+    parser.add_argument("--export", action="store_true")
+    parser.add_argument("--dtype", default="float16", choices=["float16", "float32"])
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256, 512])
+    parser.add_argument("--shortlists", type=int, nargs="+", default=[20, 50, 100, 200])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-file", default=None)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    path = args.snapshot or default_snapshot_path(args.collection)
+    if args.export:
+        export_collection_snapshot(args.collection, path, dtype=args.dtype, matryoshka_dims=args.dims)
+    index = VectorIndex(path)
+    queries = _queries(index, args)
+    print(f"{index.count} vectors x {index.dim} dims ({index.embeddings.dtype}), {len(queries)} queries, k={args.k}")
+
+    def timed_search(**kwargs):
+        results, latencies = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results.append({row for row, _ in index.search([query], args.k, nprobe=0, **kwargs)[0]})
+            latencies.append((time.perf_counter() - start) * 1000)
+        return results, latencies
+
+    truth, latencies = timed_search(first_stage="none")
+    print(f"{'full ' + str(index.dim):<24} p50 {statistics.median(latencies):7.2f}ms  p95 {_percentile(latencies, 0.95):7.2f}ms")
+    for dim in args.dims:
+        if not index.snapshot.has(f"matryoshka_{dim}"):
+            print(f"dim={dim}: snapshot has no prefixes, run with --export")
+            continue
+        for shortlist in args.shortlists:
+            results, latencies = timed_search(first_stage="matryoshka", matryoshka_dim=dim, shortlist=shortlist)
+            recall = statistics.mean(len(expected & found) / args.k for expected, found in zip(truth, results))
+            print(
+                f"dim={dim:<4} shortlist={shortlist:<6} p50 {statistics.median(latencies):7.2f}ms  "
+                f"p95 {_percentile(latencies, 0.95):7.2f}ms  recall@{args.k} {recall:.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#quantized_retrieval_benchmark.py
+"""
+Measure quantized first-pass retrieval against the full-precision baseline.
+
+    python benchmarks/quantized_retrieval_benchmark.py [--collection travel_data] [--export]
+        [--queries 200] [--query-file queries.txt] [--k 5] [--shortlists 20 50 100 200]
+
+Uses the snapshot of the collection (`--export` writes it first, with binary and
+int8 codes). Queries are the lines of `--query-file`, embedded with the configured
+query model, or else stored vectors with a little noise added. For the float scan
+and each first stage ("binary" Hamming, "int8") with each shortlist size, reports
+the bytes scanned per query (the codes, versus the full matrix), p50/p95 latency
+and recall@k against exact full-precision search.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.memory.vector_index.index import VectorIndex
+from backend.memory.vector_index.snapshot import default_snapshot_path, export_collection_snapshot
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _queries(index: VectorIndex, args: argparse.Namespace) -> np.ndarray:
+    if args.query_file:
+        from backend.memory.chroma_memory.retrieve_data import get_query_embedding_model
+        with open(args.query_file, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return np.asarray(get_query_embedding_model().generate_batch_embeddings(texts), dtype=np.float32)
+    rng = np.random.default_rng(0)
+    rows = rng.choice(index.count, size=min(args.queries, index.count), replace=False)
+    base = np.asarray(index.embeddings[np.sort(rows)], dtype=np.float32)
+    scale = args.noise * np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(index.dim)
+    return base + rng.normal(size=base.shape).astype(np.float32) * scale
+
+
+def _section_bytes(index: VectorIndex, *names: str) -> int:
+    return sum(index.snapshot.header["sections"][name]["nbytes"] for name in names)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="travel_data")
+    parser.add_argument("--snapshot", default=None)
+    parser.add_argument("--export", action="store_true")
+    parser.add_argument("--dtype", default="float16", choices=["float16", "float32"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-file", default=None)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--shortlists", type=int, nargs="+", default=[20, 50, 100, 200])
+    args = parser.parse_args()
+
+    path = args.snapshot or default_snapshot_path(args.collection)
+    if args.export:
+        export_collection_snapshot(args.collection, path, dtype=args.dtype, quantization=("binary", "int8"))
+    index = VectorIndex(path)
+    queries = _queries(index, args)
+    print(f"{index.count} vectors x {index.dim} dims ({index.embeddings.dtype}), {len(queries)} queries, k={args.k}")
+
+    truth = [{row for row, _ in hits} for hits in index.search(queries, args.k, nprobe=0, first_stage="none")]
+
+    def run(first_stage: str, shortlist: int, scanned_bytes: int) -> None:
+        latencies, recalls = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            hits = index.search([query], args.k, nprobe=0, first_stage=first_stage, shortlist=shortlist)[0]
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len(expected & {row for row, _ in hits}) / args.k)
+        label = first_stage if first_stage == "none" else f"{first_stage} shortlist={shortlist}"
+        print(
+            f"{label:<24} scans {scanned_bytes / 2**20:8.2f} MiB  p50 {statistics.median(latencies):7.2f}ms  "
+            f"p95 {_percentile(latencies, 0.95):7.2f}ms  recall@{args.k} {statistics.mean(recalls):.3f}"
+        )
+
+    float32_bytes = index.count * index.dim * 4
+    print(f"float32 matrix would be {float32_bytes / 2**20:.2f} MiB; stored matrix is "
+          f"{_section_bytes(index, 'embeddings') / 2**20:.2f} MiB")
+    run("none", args.k, _section_bytes(index, "embeddings"))
+    for first_stage, sections in (("binary", ("binary_codes",)), ("int8", ("int8_codes", "int8_scales"))):
+        if not all(index.snapshot.has(name) for name in sections):
+            print(f"{first_stage}: snapshot has no codes, run with --export")
+            continue
+        for shortlist in args.shortlists:
+            run(first_stage, shortlist, _section_bytes(index, *sections))
+
+
+if __name__ == "__main__":
+    main()
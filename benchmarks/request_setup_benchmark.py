@@ -0,0 +1,78 @@
+#request_setup_benchmark.py
+"""
+Measure the per-request setup cost of the retrieval and LLM clients.
+
+    python benchmarks/request_setup_benchmark.py [--requests 20]
+
+"per-call" builds what a chat request used to build every time (a Chroma
+PersistentClient and collection, a JinaEmbedding, GroqInference clients and the
+agent tools); "shared" resolves the same objects through the application-lifetime
+registry. No network calls are made.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _per_call_setup() -> None:
+    import chromadb
+    from backend.embeddings.Jina_embeddings import JinaEmbedding, JinaEmbeddingInput
+    from backend.embeddings.embedding_cache import get_embedding_cache
+    from backend.llms.groq_llm.inference import GroqInference
+    from backend.Agents.Agent_frameworks.agent_001 import BrowserTool, TableCreatorTool, ThinkingTool
+
+    chromadb.PersistentClient().get_or_create_collection("travel_data")
+    JinaEmbedding(JinaEmbeddingInput(
+        model_name="jina-embeddings-v3",
+        task="text-matching",
+        late_chunking=False,
+        dimensions=1024,
+        embedding_type="float"
+    ), cache=get_embedding_cache())
+    for _ in range(2):  # rephrase and memory extraction each built their own
+        llm = GroqInference()
+        llm.groq_client, llm.async_groq_client
+    BrowserTool(), ThinkingTool(), TableCreatorTool()
+
+
+def _shared_setup() -> None:
+    from backend.memory.chroma_memory.chroma_client import get_chroma_collection
+    from backend.memory.chroma_memory.retrieve_data import get_query_embedding_model
+    from backend.llms.groq_llm.inference import get_groq_llm
+    from backend.Agents.Agent_frameworks.agent_001 import get_agent_tools
+
+    get_chroma_collection("travel_data")
+    get_query_embedding_model()
+    for _ in range(2):
+        llm = get_groq_llm()
+        llm.groq_client, llm.async_groq_client
+    get_agent_tools()
+
+
+def _measure(setup: Callable[[], None], requests: int) -> List[float]:
+    setup()  # imports and first-time initialization are not per-request cost
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        setup()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, setup in (("per-call", _per_call_setup), ("shared", _shared_setup)):
+        samples = [s * 1000 for s in _measure(setup, args.requests)]
+        print(f"{label:<9} median {statistics.median(samples):.2f}ms  p95 {sorted(samples)[int(0.95 * (len(samples) - 1))]:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#retrieval_modes_benchmark.py
+"""
+Latency of the vector, lexical (BM25) and hybrid retrieval modes.
+
+    python benchmarks/retrieval_modes_benchmark.py [--collection travel_data] [--modes vector lexical hybrid]
+        [--n-results 3] [--query-file queries.txt] [--build-bm25]
+
+Runs every query once per mode through `query_chroma` and reports p50/p95
+latency, embedding call included. Queries are the lines of `--query-file`, or a
+built-in set of place-name and descriptive travel questions. Each query text is
+made unique per mode so the embedding cache does not hide the embedding call.
+`--build-bm25` (re)builds the BM25 index first.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.memory.chroma_memory.retrieve_data import RETRIEVAL_MODES, query_chroma
+from backend.memory.lexical_index.bm25 import build_bm25_index
+
+QUERIES = [
+    "Hampi",
+    "Ziro valley",
+    "Things to do in Kaziranga National Park",
+    "Best time to visit Ladakh",
+    "Beaches near Puducherry",
+    "Temples of Madurai",
+    "How to reach Tawang",
+    "Backwaters of Alleppey",
+    "Hill stations in Himachal Pradesh for a family trip",
+    "Places to see in Jaipur in two days",
+]
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="travel_data")
+    parser.add_argument("--modes", nargs="+", default=list(RETRIEVAL_MODES), choices=RETRIEVAL_MODES)
+    parser.add_argument("--n-results", type=int, default=3)
+    parser.add_argument("--query-file", default=None)
+    parser.add_argument("--build-bm25", action="store_true")
+    args = parser.parse_args()
+
+    queries = QUERIES
+    if args.query_file:
+        with open(args.query_file, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    if args.build_bm25:
+        build_bm25_index(args.collection)
+
+    # First call per mode loads clients and indexes; not part of the per-query cost
+    for mode in args.modes:
+        query_chroma("warm up", args.collection, args.n_results, mode=mode)
+
+    for mode in args.modes:
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            query_chroma(f"{query} ({mode})", args.collection, args.n_results, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{mode:<8} p50 {statistics.median(latencies):8.2f}ms  p95 {_percentile(latencies, 0.95):8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#startup_benchmark.py
+"""
+Measure API startup cost.
+
+    python benchmarks/startup_benchmark.py [--runs 3] [--port 8765]
+
+Reports, over fresh interpreters, the time to `import backend.App.api` and the time
+from launching uvicorn until `/health` first answers. Run it with
+WARM_UP_ON_STARTUP unset to measure the lazy path.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import backend.App.api; print(time.perf_counter() - t)"
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_time_to_health(port: int, timeout: float = 120.0) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.App.api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.RequestException:
+                pass
+            time.sleep(0.05)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _report(label: str, samples) -> None:
+    print(f"{label:<22} median {statistics.median(samples):.3f}s  min {min(samples):.3f}s  max {max(samples):.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    _report("import backend.App.api", [measure_import() for _ in range(args.runs)])
+    _report("time to first /health", [measure_time_to_health(args.port) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
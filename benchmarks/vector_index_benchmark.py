@@ -0,0 +1,93 @@
+#vector_index_benchmark.py
+"""
+Check the snapshot index against Chroma and compare their query latency.
+
+    python benchmarks/vector_index_benchmark.py [--collection travel_data] [--export] [--dtype float16]
+        [--ivf-lists 0] [--queries 200] [--k 5] [--nprobe 8]
+
+Queries are stored vectors with a little noise added, so no embedding API is
+needed. Reports how often the snapshot returns exactly Chroma's top-k ids (and
+their overlap), p50/p95 latency of both, and, when the snapshot has an IVF
+partition, recall@k of the IVF probe against exact search. `--export` writes the
+snapshot first.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.memory.chroma_memory.chroma_client import get_chroma_collection
+from backend.memory.vector_index.index import VectorIndex
+from backend.memory.vector_index.snapshot import default_snapshot_path, export_collection_snapshot
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="travel_data")
+    parser.add_argument("--snapshot", default=None)
+    parser.add_argument("--export", action="store_true")
+    parser.add_argument("--dtype", default="float16", choices=["float16", "float32"])
+    parser.add_argument("--ivf-lists", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--noise", type=float, default=0.02)
+    args = parser.parse_args()
+
+    path = args.snapshot or default_snapshot_path(args.collection)
+    if args.export:
+        export_collection_snapshot(args.collection, path, dtype=args.dtype, ivf_lists=args.ivf_lists)
+    index, open_ms = _timed(VectorIndex, path)
+    collection = get_chroma_collection(args.collection)
+    print(f"Opened snapshot of {index.count} x {index.dim} ({index.embeddings.dtype}) in {open_ms:.1f}ms")
+
+    rng = np.random.default_rng(0)
+    rows = rng.choice(index.count, size=min(args.queries, index.count), replace=False)
+    base = np.asarray(index.embeddings[np.sort(rows)], dtype=np.float32)
+    scale = args.noise * np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(index.dim)
+    queries = base + rng.normal(size=base.shape).astype(np.float32) * scale
+
+    index.search(queries[:1], args.k)  # page in before timing
+    exact_matches, overlaps, recalls = 0, [], []
+    chroma_ms, snapshot_ms, ivf_ms = [], [], []
+    for query in queries:
+        chroma_result, ms = _timed(collection.query, query_embeddings=[query.tolist()], n_results=args.k, include=["distances"])
+        chroma_ms.append(ms)
+        snapshot_result, ms = _timed(index.query, [query], n_results=args.k)
+        snapshot_ms.append(ms)
+        chroma_ids, snapshot_ids = chroma_result["ids"][0], snapshot_result["ids"][0]
+        exact_matches += chroma_ids == snapshot_ids
+        overlaps.append(len(set(chroma_ids) & set(snapshot_ids)) / args.k)
+        if index.has_ivf:
+            ivf_hits, ms = _timed(index.search, [query], args.k, nprobe=args.nprobe)
+            ivf_ms.append(ms)
+            exact_rows = {row for row, _ in index.search([query], args.k, nprobe=0)[0]}
+            recalls.append(len(exact_rows & {row for row, _ in ivf_hits[0]}) / args.k)
+
+    print(f"Same top-{args.k} as Chroma: {exact_matches}/{len(queries)} queries, mean overlap {statistics.mean(overlaps):.3f}")
+    for name, samples in (("chroma", chroma_ms), ("snapshot", snapshot_ms), (f"ivf nprobe={args.nprobe}", ivf_ms)):
+        if samples:
+            print(f"{name:<16} p50 {statistics.median(samples):7.2f}ms  p95 {_percentile(samples, 0.95):7.2f}ms")
+    if recalls:
+        print(f"IVF recall@{args.k} vs exact: {statistics.mean(recalls):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 # app.py
+import json
 import streamlit as st
 import requests
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
 st.set_page_config(page_title="TravelMate AI", page_icon="🎒", layout="wide")
 
@@ -26,18 +27,28 @@ if not st.session_state.user_id:
 
 st.title("🎒 TravelMate AI - Your Smart Travel Guide")
 
-def send_message(user_query: str) -> Dict:
+def stream_message(user_query: str) -> Iterator[Dict]:
+    """Yield {"event", "data"} dicts from the backend's /chat/stream SSE endpoint."""
     payload = {
         "user_id": st.session_state.user_id,
         "user_query": user_query
     }
     try:
-        res = requests.post(f"{API_URL}/chat", json=payload)
-        res.raise_for_status()
-        return res.json()
+        with requests.post(f"{API_URL}/chat/stream", json=payload, stream=True) as res:
+            res.raise_for_status()
+            event = {}
+            for line in res.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event["event"] = line[len("event: "):]
+                elif line.startswith("data: "):
+                    event["data"] = json.loads(line[len("data: "):])
+                elif not line and event:
+                    yield event
+                    if event.get("event") in ("done", "error"):
+                        return
+                    event = {}
     except requests.RequestException as e:
         st.error(f"Failed to connect to backend: {e}")
-        return {}
 
 # Display chat history
 for message in st.session_state.messages:
@@ -62,16 +73,33 @@ if prompt := st.chat_input("Where do you want to explore today?"):
     with st.chat_message("user"):
         st.write(prompt)
 
-    response = send_message(prompt)
-    if response:
-        st.session_state.messages.append({"role": "assistant", "content": response})
-        with st.chat_message("assistant"):
-            if summary := response.get("summary"):
-                st.markdown("### ✨ Summary")
-                st.markdown(summary)
-            if table := response.get("table"):
-                st.markdown("### 📋 Tourist Information")
-                st.markdown(table, unsafe_allow_html=True)
+    with st.chat_message("assistant"):
+        status = st.empty()
+        status.markdown("_Planning your trip..._")
+        summary_placeholder = st.empty()
+        table_placeholder = st.empty()
+        summary, table = "", ""
+
+        for event in stream_message(prompt):
+            if event.get("event") == "table":
+                table = event.get("data", "")
+                if table:
+                    table_placeholder.markdown(f"### 📋 Tourist Information\n\n{table}", unsafe_allow_html=True)
+            elif event.get("event") == "token":
+                summary += event.get("data", "")
+                status.markdown("### ✨ Summary")
+                summary_placeholder.markdown(summary + "▌")
+            elif event.get("event") == "error":
+                st.error(event.get("data") or "The backend failed to answer.")
+
+        if summary:
+            status.markdown("### ✨ Summary")
+            summary_placeholder.markdown(summary)
+        else:
+            status.empty()
+
+    if summary or table:
+        st.session_state.messages.append({"role": "assistant", "content": {"summary": summary, "table": table}})
 
 if st.sidebar.button("🧹 Clear Chat History"):
     st.session_state.messages = []
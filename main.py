@@ -1,5 +1,7 @@
 #main.py
-# from backend.memory.chroma_memory.add_data import add_pdf_to_chroma
+# from backend.memory.chroma_memory.add_data import add_pdfs_to_chroma
+# from backend.memory.vector_index.snapshot import export_collection_snapshot
+# from backend.memory.lexical_index.bm25 import build_bm25_index
 # from backend.memory.mem0_memory.try_mem0 import add_memory_in_mem0, extract_relevant_memories
 # from backend.Agents.Agent_frameworks.agent_001 import BrowserTool
 # from backend.Agents.Agent_frameworks.agent_001 import BrowserAgent
@@ -36,8 +38,9 @@ if __name__ == "__main__":
     #     "/UT_Puducherry.pdf","/Uttar_Pradesh.pdf","/Uttarakhand.pdf","/West_Bengal.pdf",
     # ]
     # pdf_paths = [base_path + pdf_file for pdf_file in pdf_files]
-    # for pdf_path in pdf_paths:
-    #     add_pdf_to_chroma(pdf_path)
+    # add_pdfs_to_chroma(pdf_paths, batch_size=64, dataset_root=base_path)
+    # export_collection_snapshot("travel_data", dtype="float16")
+    # build_bm25_index("travel_data")
 
     # tool = BrowserTool()
     # results = tool.search("Give me some information about places to visit in Jaipur")
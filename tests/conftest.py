@@ -0,0 +1,80 @@
+#conftest.py
+import hashlib
+import types
+import numpy as np
+import pytest
+
+REPHRASED = "Best beaches to visit in Goa"
+MEMORY = "Alice is a certified scuba diver"
+
+
+class FakeEmbeddingModel:
+    @staticmethod
+    def _embed(text: str):
+        seed = int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(16).tolist()
+
+    async def agenerate_embedding(self, text):
+        return self._embed(text)
+
+    async def agenerate_batch_embeddings(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def calculate_cosine_similarity(self, a, b):
+        a, b = np.asarray(a), np.asarray(b)
+        return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+class FakeLLM:
+    async def agenerate_response(self, messages, timeout=None):
+        if "rephrasing" in messages[0]["content"]:
+            return f'{{"rephrased_query": "{REPHRASED}"}}'
+        prompt = messages[-1]["content"]
+        return "Dive sites picked for your scuba skills" if MEMORY in prompt else "Generic beach guide"
+
+    async def astream_response(self, messages, timeout=None):
+        for token in (await self.agenerate_response(messages, timeout)).split(" "):
+            yield token + " "
+
+
+class FakeAgent:
+    def __init__(self, deadline=None):
+        pass
+
+    async def arun(self, query):
+        return {"summary": "Agent summary", "table": "| Beach |"}
+
+
+class FakeMemoryQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, user_id, user_query):
+        self.jobs.append((user_id, user_query))
+
+
+@pytest.fixture
+def chat_env(monkeypatch, tmp_path):
+    """The chat pipeline with fake LLM, embeddings, agent, retrieval and mem0, and a fresh answer cache."""
+    import backend.Conversations.chat as chat
+    from backend.Conversations.response_cache import SemanticResponseCache
+
+    monkeypatch.chdir(tmp_path)
+    env = types.SimpleNamespace(
+        chat=chat,
+        cache=SemanticResponseCache(threshold=0.99),
+        memory_queue=FakeMemoryQueue(),
+        memories={"alice": [MEMORY], "bob": [], "carol": []},
+    )
+
+    async def fake_query_chroma(*args, **kwargs):
+        return "Goa has many beaches."
+
+    monkeypatch.setattr(chat, "get_response_cache", lambda: env.cache)
+    monkeypatch.setattr(chat, "get_query_embedding_model", lambda: FakeEmbeddingModel())
+    monkeypatch.setattr(chat, "get_groq_llm", lambda: FakeLLM())
+    monkeypatch.setattr(chat, "BrowserAgent", FakeAgent)
+    monkeypatch.setattr(chat, "aquery_chroma", fake_query_chroma)
+    monkeypatch.setattr(chat, "get_memory_queue", lambda: env.memory_queue)
+    monkeypatch.setattr(chat, "_select_memories", lambda user_query, user_id: env.memories[user_id])
+    return env
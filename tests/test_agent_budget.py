@@ -0,0 +1,67 @@
+#test_agent_budget.py
+import json
+import asyncio
+import pytest
+from backend.Agents.Agent_frameworks import agent_001
+from backend.Agents.Agent_frameworks.agent_001 import BrowserAgent
+from backend.utils.deadline import Deadline
+
+FINISH = json.dumps({"tool_name": "finishtool", "parameters": {"summary": "Goa has great beaches"}})
+
+
+class ScriptedLLM:
+    """Answers with a malformed step until it is told to stop, then calls finishtool."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def _respond(self, messages):
+        self.prompts.append(messages)
+        if "Call finishtool now" in messages[-1]["content"]:
+            return FINISH
+        return "not a tool call"
+
+    def generate_response(self, messages, timeout=None):
+        return self._respond(messages)
+
+    async def agenerate_response(self, messages, timeout=None):
+        return self._respond(messages)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    llm = ScriptedLLM()
+    monkeypatch.setattr(agent_001, "get_groq_llm", lambda: llm)
+    return llm
+
+
+def test_iteration_limit_forces_finishtool(llm):
+    agent = BrowserAgent(max_iterations=2)
+
+    response = agent.run("Beaches in Goa")
+
+    assert response == {"summary": "Goa has great beaches", "table": "No table found."}
+    # Two regular steps, then the forced finish with the stop instruction
+    assert len(llm.prompts) == 3
+    assert "limit of 2 steps" in llm.prompts[-1][-1]["content"]
+
+
+def test_low_time_budget_forces_finishtool_async(llm, monkeypatch):
+    monkeypatch.setattr(agent_001, "AGENT_FINISH_RESERVE", 5.0)
+    agent = BrowserAgent(deadline=Deadline(2.0))
+
+    response = asyncio.run(agent.arun("Beaches in Goa"))
+
+    assert response["summary"] == "Goa has great beaches"
+    assert len(llm.prompts) == 1
+    assert "time budget" in llm.prompts[0][-1]["content"]
+
+
+def test_expired_deadline_falls_back_without_llm_call(llm):
+    agent = BrowserAgent(deadline=Deadline(0.0))
+    agent.last_summary = "Partial findings"
+
+    response = agent.run("Beaches in Goa")
+
+    assert response == {"summary": "Partial findings", "table": "No table found."}
+    assert llm.prompts == []
@@ -0,0 +1,25 @@
+#test_chat_answer_cache.py
+import asyncio
+
+
+def _ask(chat_env, user_id: str, user_query: str):
+    answer, _ = asyncio.run(chat_env.chat.achat_with_tourism_assistant(user_id, user_query, []))
+    return answer
+
+
+def test_memory_conditioned_answer_is_not_served_to_other_users(chat_env):
+    alice = _ask(chat_env, "alice", "Which beaches should I visit in Goa?")
+    assert alice["summary"] == "Dive sites picked for your scuba skills"
+    assert chat_env.cache.stats()["entries"] == 0
+
+    bob = _ask(chat_env, "bob", "Which beaches should I visit in Goa?")
+    assert bob["summary"] == "Generic beach guide"
+
+
+def test_answers_without_memories_are_shared(chat_env):
+    _ask(chat_env, "bob", "Which beaches should I visit in Goa?")
+    assert chat_env.cache.stats()["entries"] == 1
+
+    carol = _ask(chat_env, "carol", "Goa beaches worth visiting?")
+    assert carol["summary"] == "Generic beach guide"
+    assert chat_env.cache.stats()["hits"] == 1
@@ -0,0 +1,41 @@
+#test_chat_stream.py
+import asyncio
+
+
+async def _consume(stream, stop_after=None):
+    events = []
+    try:
+        async for event in stream:
+            events.append(event)
+            if event["event"] == stop_after:
+                break
+    finally:
+        await stream.aclose()
+    return events
+
+
+def test_stream_sends_table_tokens_and_done(chat_env):
+    events = asyncio.run(_consume(chat_env.chat.astream_chat_with_tourism_assistant("bob", "Goa beaches?", [])))
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "table" and kinds[-1] == "done"
+    assert "".join(event["data"] for event in events if event["event"] == "token").strip() == "Generic beach guide"
+    assert chat_env.memory_queue.jobs == [("bob", "Goa beaches?")]
+    assert chat_env.cache.stats()["entries"] == 1
+
+
+def test_disconnect_mid_stream_keeps_the_memory_write(chat_env):
+    stream = chat_env.chat.astream_chat_with_tourism_assistant("bob", "Goa beaches?", [])
+    asyncio.run(_consume(stream, stop_after="token"))
+    assert chat_env.memory_queue.jobs == [("bob", "Goa beaches?")]
+    # An incomplete answer is not cached
+    assert chat_env.cache.stats()["entries"] == 0
+
+
+def test_failing_stage_ends_the_stream_with_an_error(chat_env, monkeypatch):
+    async def failing_documents(ctx):
+        raise RuntimeError("retrieval down")
+
+    monkeypatch.setattr(chat_env.chat, "_documents_stage", failing_documents)
+    events = asyncio.run(_consume(chat_env.chat.astream_chat_with_tourism_assistant("bob", "Goa beaches?", [])))
+    assert events[-1]["event"] == "error"
+    assert "done" not in [event["event"] for event in events]
@@ -0,0 +1,79 @@
+#test_context_compaction.py
+import sys
+import copy
+import json
+import pytest
+from backend.utils import token_counter
+from backend.utils.token_counter import CHARS_PER_TOKEN, count_message_tokens, count_tokens, truncate_to_tokens
+from backend.Agents.Agent_frameworks.context_compaction import (
+    OBSERVATION_PREFIX,
+    compact_messages,
+    format_observation,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_tiktoken(monkeypatch):
+    """Count with the character heuristic, as on a deployment without tiktoken."""
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    monkeypatch.setattr(token_counter, "_encoding", None)
+    monkeypatch.setattr(token_counter, "_encoding_loaded", False)
+
+
+def _transcript(steps: int, observation_chars: int = 2000):
+    messages = [
+        {"role": "system", "content": "You are a travel research agent. " * 20},
+        {"role": "user", "content": "User query: Beaches in Goa"},
+    ]
+    for step in range(steps):
+        messages.append({"role": "assistant", "content": json.dumps({
+            "reasoning": "Need more detail " * 10,
+            "tool_name": "browsertool",
+            "parameters": {"queries": [f"goa beaches part {step}"]},
+        })})
+        messages.append({"role": "user", "content": format_observation({
+            "summary": f"Summary of step {step}",
+            "places": ["x" * observation_chars],
+        })})
+    return messages
+
+
+def test_fallback_counter_is_used_without_tiktoken():
+    assert count_tokens("a" * 10) == (10 + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    assert token_counter._encoding is None
+    assert token_counter._encoding_loaded
+    assert truncate_to_tokens("a" * 100, 5, marker="…") == "a" * (5 * CHARS_PER_TOKEN) + "…"
+
+
+def test_transcript_under_budget_is_unchanged():
+    messages = _transcript(2, observation_chars=10)
+    assert compact_messages(messages, token_budget=10_000) == messages
+
+
+def test_compaction_keeps_system_prompt_and_latest_turns_under_budget():
+    messages = _transcript(8)
+    original = copy.deepcopy(messages)
+    budget = count_message_tokens(messages[:2] + messages[-4:]) + 100
+
+    compacted = compact_messages(messages, token_budget=budget, keep_recent=2)
+
+    assert messages == original
+    assert count_message_tokens(compacted) <= budget
+    assert compacted[:2] == messages[:2]
+    assert compacted[-4:] == messages[-4:]
+    assert "earlier agent messages omitted" in compacted[2]["content"]
+
+
+def test_older_observations_keep_only_their_summary():
+    messages = _transcript(4)
+    budget = count_message_tokens(messages) - 500
+
+    compacted = compact_messages(messages, token_budget=budget, keep_recent=1)
+
+    older = [m for m in compacted[2:-2] if m["content"].startswith(OBSERVATION_PREFIX)]
+    assert older
+    for message in older:
+        payload = json.loads(message["content"][len(OBSERVATION_PREFIX):])
+        assert payload["summary"].startswith("Summary of step")
+        assert payload["omitted"] == ["places"]
+    assert compacted[-2:] == messages[-2:]
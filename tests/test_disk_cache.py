@@ -0,0 +1,41 @@
+#test_disk_cache.py
+import backend.utils.disk_cache as disk_cache
+from backend.utils.disk_cache import SQLiteCache
+
+
+def test_trimmed_to_the_most_recent_max_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=3)
+    for i in range(5):
+        now[0] += 1
+        cache.set(f"k{i}", b"v")
+    assert len(cache) == 3
+    assert cache.get("k1") is None and cache.get("k2") == b"v"
+
+    # Overwriting a key does not count as a new entry
+    now[0] += 1
+    cache.set_many([("k4", b"new"), ("k4", b"newer")])
+    assert len(cache) == 3 and cache.get("k4") == b"newer" and cache.get("k2") == b"v"
+
+
+def test_row_count_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, max_entries=2)
+    cache.set_many([("a", b"1"), ("b", b"2")])
+    cache.close()
+
+    cache = SQLiteCache(path, max_entries=2)
+    cache.set("c", b"3")
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_not_returned(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=10)
+    cache.set("a", b"1")
+    now[0] += 11
+    assert cache.get("a") is None
+    cache.set("b", b"2")
+    assert len(cache) == 1
@@ -0,0 +1,110 @@
+#test_lexical_index.py
+import math
+from collections import Counter
+import numpy as np
+import pytest
+from backend.memory.chroma_memory import chroma_client
+from backend.memory.lexical_index.bm25 import BM25_B, BM25_K1, BM25Index, build_bm25_index
+from backend.memory.lexical_index.fusion import reciprocal_rank_fusion
+from backend.memory.lexical_index.tokenizer import TOKENIZER_VERSION, tokenize
+
+CHUNKS = [
+    ("goa-1", "Goa beaches: Baga and Calangute beaches are busy, Palolem is quiet.", "goa"),
+    ("goa-2", "Goan food is famous for seafood curries.", "goa"),
+    ("kerala-1", "Kerala backwaters and beaches near Varkala and Kovalam.", "kerala"),
+    ("ladakh-1", "Leh and the Nubra valley; passes like Khardung La.", "ladakh"),
+    ("sikkim-1", "Sikkim monasteries and the valley of Yumthang.", "sikkim"),
+]
+
+
+class FakeCollection:
+    """The slice of Chroma's collection API that `read_collection` pages through."""
+
+    def count(self):
+        return len(CHUNKS)
+
+    def get(self, limit, offset, include):
+        page = CHUNKS[offset:offset + limit]
+        return {
+            "ids": [chunk_id for chunk_id, _, _ in page],
+            "documents": [document for _, document, _ in page],
+            "metadatas": [{"region": region} for _, _, region in page],
+        }
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(chroma_client, "get_chroma_collection", lambda name: FakeCollection())
+    path = build_bm25_index("travel_data", path=str(tmp_path / "travel_data.bm25"),
+                            manifest_path=str(tmp_path / "manifest.json"))
+    index = BM25Index(path)
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ("Food in the valley of Sikkim", ["food", "valley", "sikkim"]),
+    ("Beaches, cities and hills", ["beach", "city", "hill"]),
+    ("Famous passes and boxes", ["famous", "pass", "box"]),
+    ("Kōchi, Bangalore and Ziro-valley", ["kochi", "bengaluru", "ziro", "valley"]),
+])
+def test_tokenize(text, tokens):
+    assert tokenize(text) == tokens
+
+
+def test_postings_round_trip(index):
+    assert index.tokenizer_version == TOKENIZER_VERSION
+    terms = {term_id: term for term, term_id in index.vocabulary.items()}
+    rebuilt = [Counter() for _ in CHUNKS]
+    for term_id in range(len(terms)):
+        start, end = index._offsets[term_id], index._offsets[term_id + 1]
+        docs = index._docs[start:end]
+        assert list(docs) == sorted(docs)
+        for row, tf in zip(docs, index._tf[start:end]):
+            rebuilt[row][terms[term_id]] = int(tf)
+    assert rebuilt == [Counter(tokenize(document)) for _, document, _ in CHUNKS]
+
+
+def test_bm25_scores_match_the_formula(index):
+    lengths = [len(tokenize(document)) for _, document, _ in CHUNKS]
+    avg_length = sum(lengths) / len(lengths)
+
+    def expected(row, term):
+        tf = Counter(tokenize(CHUNKS[row][1]))[term]
+        df = sum(term in tokenize(document) for _, document, _ in CHUNKS)
+        idf = math.log(1.0 + (len(CHUNKS) - df + 0.5) / (df + 0.5))
+        return idf * tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[row] / avg_length))
+
+    hits = index.search("beach", n_results=5)
+    assert [row for row, _ in hits] == [0, 2]
+    np.testing.assert_allclose([score for _, score in hits], [expected(0, "beach"), expected(2, "beach")], rtol=1e-5)
+
+
+def test_bm25_query_filters_and_shapes_results(index):
+    assert index.search("Pangong lake") == []
+    unfiltered = dict(index.search("valley", n_results=5))
+    assert sorted(unfiltered) == [3, 4]
+    assert index.search("valley", n_results=5, regions=["sikkim"]) == [(4, unfiltered[4])]
+
+    result = index.query("beaches in Kerala", n_results=2)
+    assert result["ids"] == [["kerala-1", "goa-1"]]
+    assert result["metadatas"][0][0] == {"region": "kerala"}
+    assert result["distances"][0][0] < result["distances"][0][1] < 0
+
+
+def test_reciprocal_rank_fusion():
+    def ranking(ids):
+        return {"ids": [ids], "documents": [[f"doc {chunk_id}" for chunk_id in ids]], "metadatas": [[{"id": chunk_id} for chunk_id in ids]]}
+
+    fused = reciprocal_rank_fusion([ranking(["a", "b", "c"]), ranking(["c", "a"])], n_results=2, k=60)
+
+    assert fused["ids"] == [["a", "c"]]
+    assert fused["documents"] == [["doc a", "doc c"]]
+    assert fused["metadatas"] == [[{"id": "a"}, {"id": "c"}]]
+    assert fused["distances"][0] == pytest.approx([-(1 / 61 + 1 / 62), -(1 / 63 + 1 / 61)])
+
+
+def test_reciprocal_rank_fusion_without_metadata():
+    fused = reciprocal_rank_fusion([{"ids": [["a"]], "documents": [["doc a"]]}], n_results=5)
+    assert fused["ids"] == [["a"]]
+    assert fused["metadatas"] == [[None]]
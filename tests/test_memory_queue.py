@@ -0,0 +1,122 @@
+#test_memory_queue.py
+import sqlite3
+import threading
+import pytest
+from backend.memory.mem0_memory import memory_queue
+from backend.memory.mem0_memory.memory_queue import MemoryWriteQueue
+
+
+class RecordingWriter:
+    """Stands in for the mem0 writer; `gate` holds a call until the test releases it."""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = threading.Event()
+
+    def __call__(self, queries, user_id, skip, on_added):
+        self.calls.append((list(queries), user_id, set(skip)))
+        self.started.set()
+        self.gate.wait(5)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(memory_queue, "RETRY_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(memory_queue, "IDLE_POLL_SECONDS", 0.05)
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def _make(write, **kwargs):
+        queue = MemoryWriteQueue(write, path=str(tmp_path / "queue.sqlite3"), workers=1, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield _make
+    for queue in queues:
+        queue.close(drain_timeout=5)
+
+
+def _block_worker(queue, writer):
+    """Keep the single worker busy on bob's write so later jobs stay pending."""
+    writer.gate.clear()
+    assert queue.submit("bob", "Hotels in Shimla")
+    assert writer.started.wait(5)
+
+
+def test_full_queue_rejects_and_recovers(make_queue):
+    writer = RecordingWriter()
+    queue = make_queue(writer, max_pending=2)
+    _block_worker(queue, writer)
+    assert queue.submit("alice", "Beaches in Goa")
+
+    assert not queue.submit("alice", "Treks in Ladakh")
+    assert queue.stats()["rejected"] == 1
+
+    # A waiting submit gets in once the worker frees room
+    threading.Timer(0.1, writer.gate.set).start()
+    assert queue.submit("alice", "Treks in Ladakh", timeout=5)
+    assert queue.drain(timeout=5)
+    assert queue.stats()["pending"] == 0
+
+
+def test_jobs_are_coalesced_per_user(make_queue):
+    writer = RecordingWriter()
+    queue = make_queue(writer)
+    _block_worker(queue, writer)
+    for query in ["Beaches in Goa", "  beaches in GOA ", "Treks in Ladakh"]:
+        assert queue.submit("alice", query)
+    writer.gate.set()
+    assert queue.drain(timeout=5)
+
+    assert writer.calls[1] == (["Beaches in Goa", "Treks in Ladakh"], "alice", set())
+    assert len(writer.calls) == 2
+    stats = queue.stats()
+    assert stats["written"] == 3
+    assert stats["coalesced"] == 1
+
+
+def test_retry_skips_memories_already_stored(make_queue):
+    calls = []
+
+    def flaky_write(queries, user_id, skip, on_added):
+        calls.append(set(skip))
+        if len(calls) == 1:
+            on_added("Alice likes beaches")
+            raise RuntimeError("mem0 timed out")
+        for memory in ["Alice likes beaches", "Alice is vegetarian"]:
+            if memory not in skip:
+                on_added(memory)
+
+    queue = make_queue(flaky_write)
+    assert queue.submit("alice", "Vegetarian food near Goa beaches")
+    assert queue.drain(timeout=5)
+
+    assert calls == [set(), {"Alice likes beaches"}]
+    with queue._lock:
+        assert queue._conn.execute("SELECT COUNT(*) FROM memory_progress").fetchone()[0] == 0
+    assert queue.stats()["written"] == 1
+
+
+def test_worker_survives_database_errors(make_queue):
+    writer = RecordingWriter()
+    queue = make_queue(writer)
+    claim_batch = queue._claim_batch
+    failures = []
+
+    def flaky_claim():
+        if not failures:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        return claim_batch()
+
+    queue._claim_batch = flaky_claim
+    assert queue.submit("alice", "Beaches in Goa")
+    assert queue.drain(timeout=5)
+
+    assert failures
+    assert writer.calls == [(["Beaches in Goa"], "alice", set())]
@@ -0,0 +1,106 @@
+#test_micro_batching.py
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend.embeddings.Base_embeddings import BaseEmbedding, EmbeddingInput
+from backend.embeddings.micro_batching import MicroBatchingEmbedding
+
+TEXTS = [f"text {i}" for i in range(8)]
+
+
+class RecordingModel(BaseEmbedding):
+    """Embeds a text as [its number]; records every upstream batch."""
+
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__(EmbeddingInput(model_name="fake", dimensions=1, embedding_type="float"))
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def _call_embedding_model(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("embedding service unavailable")
+        return [[float(text.split()[-1])] for text in texts]
+
+    async def _acall_embedding_model(self, texts):
+        return self._call_embedding_model(texts)
+
+
+def _expected(texts):
+    return [[float(text.split()[-1])] for text in texts]
+
+
+def _generate_concurrently(batcher, texts):
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        return list(pool.map(batcher.generate_embedding, texts))
+
+
+def test_async_callers_share_one_batch():
+    model = RecordingModel()
+    batcher = MicroBatchingEmbedding(model, max_batch_size=len(TEXTS), max_wait_ms=1000)
+
+    async def run():
+        return await asyncio.gather(*(batcher.agenerate_embedding(text) for text in TEXTS))
+
+    assert asyncio.run(run()) == _expected(TEXTS)
+    assert model.batches == [TEXTS]
+    assert batcher.stats()["batch_size"]["count"] == 1
+
+
+def test_async_batch_failure_reaches_every_caller():
+    batcher = MicroBatchingEmbedding(RecordingModel(fail=True), max_batch_size=len(TEXTS), max_wait_ms=1000)
+
+    async def run():
+        return await asyncio.gather(*(batcher.agenerate_embedding(text) for text in TEXTS), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_async_single_caller_is_flushed_after_max_wait():
+    model = RecordingModel()
+    batcher = MicroBatchingEmbedding(model, max_batch_size=32, max_wait_ms=20)
+
+    start = time.perf_counter()
+    assert asyncio.run(batcher.agenerate_embedding("text 3")) == [3.0]
+    assert time.perf_counter() - start >= 0.015
+    assert model.batches == [["text 3"]]
+
+
+def test_threaded_callers_share_one_batch():
+    model = RecordingModel()
+    batcher = MicroBatchingEmbedding(model, max_batch_size=len(TEXTS), max_wait_ms=2000)
+
+    assert _generate_concurrently(batcher, TEXTS) == _expected(TEXTS)
+    assert len(model.batches) == 1
+    assert sorted(model.batches[0]) == sorted(TEXTS)
+
+
+def test_threaded_batch_failure_reaches_every_caller():
+    model = RecordingModel(fail=True)
+    batcher = MicroBatchingEmbedding(model, max_batch_size=4, max_wait_ms=2000)
+    errors = []
+
+    def call(text):
+        try:
+            batcher.generate_embedding(text)
+        except RuntimeError as e:
+            errors.append(e)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(call, TEXTS[:4]))
+    assert len(errors) == 4
+    assert len(model.batches) == 1
+
+
+def test_threaded_single_caller_is_flushed_after_max_wait():
+    model = RecordingModel()
+    batcher = MicroBatchingEmbedding(model, max_batch_size=32, max_wait_ms=20)
+
+    start = time.perf_counter()
+    assert batcher.generate_embedding("text 5") == [5.0]
+    assert time.perf_counter() - start >= 0.015
+    assert model.batches == [["text 5"]]
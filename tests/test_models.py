@@ -0,0 +1,16 @@
+#test_models.py
+import pytest
+from pydantic import ValidationError
+from backend.App.models import ChatRequest
+from backend.utils.deadline import MAX_CHAT_DEADLINE_SECONDS
+
+
+@pytest.mark.parametrize("deadline", [0, -1, MAX_CHAT_DEADLINE_SECONDS + 1])
+def test_out_of_range_deadline_is_rejected(deadline):
+    with pytest.raises(ValidationError):
+        ChatRequest(user_id="alice", user_query="Beaches in Goa", deadline_seconds=deadline)
+
+
+def test_deadline_is_optional():
+    assert ChatRequest(user_id="alice", user_query="Beaches in Goa").deadline_seconds is None
+    assert ChatRequest(user_id="alice", user_query="Beaches in Goa", deadline_seconds=10).deadline_seconds == 10
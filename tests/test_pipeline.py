@@ -0,0 +1,118 @@
+#test_pipeline.py
+import asyncio
+import pytest
+
+from backend.Conversations.pipeline import Stage, StageExecutor
+
+
+def _run(stages, inputs=None):
+    executor = StageExecutor(stages)
+    return executor, asyncio.run(executor.run(inputs))
+
+
+def test_stages_run_after_their_dependencies():
+    order = []
+
+    def stage(name, delay, value):
+        async def fn(ctx):
+            order.append(f"{name}:start")
+            await asyncio.sleep(delay)
+            order.append(f"{name}:end")
+            return value
+        return fn
+
+    async def total(ctx):
+        return await ctx.get("a") + await ctx.get("b")
+
+    executor, results = _run([
+        Stage("a", stage("a", 0.02, 1)),
+        Stage("b", stage("b", 0.0, 2), deps=["a"]),
+        Stage("total", total, deps=["b"]),
+    ])
+
+    assert results == {"a": 1, "b": 2, "total": 3}
+    assert order == ["a:start", "a:end", "b:start", "b:end"]
+    assert all(timing["status"] == "done" for timing in executor.timings.values())
+    assert executor.critical_path() == ["a", "b", "total"]
+
+
+def test_independent_stages_run_concurrently():
+    async def slow(ctx):
+        await asyncio.sleep(0.1)
+
+    executor, _ = _run([Stage("x", slow), Stage("y", slow)])
+    assert executor.timings["y"]["start"] < executor.timings["x"]["end"]
+
+
+def test_speculative_result_is_discarded_after_a_failed_check():
+    speculative_finished = []
+
+    async def speculative(ctx):
+        await asyncio.sleep(1.0)
+        speculative_finished.append(True)
+        return "guess"
+
+    async def check(ctx):
+        return False
+
+    async def answer(ctx):
+        if await ctx.get("check"):
+            return await ctx.get("speculative")
+        ctx.cancel("speculative")
+        return "recomputed"
+
+    executor, results = _run([
+        Stage("speculative", speculative, speculative=True),
+        Stage("check", check),
+        Stage("answer", answer, deps=["check"]),
+    ])
+
+    assert results == {"check": False, "answer": "recomputed"}
+    assert executor.timings["speculative"]["status"] == "cancelled"
+    assert not speculative_finished
+
+
+def test_speculative_failure_is_not_raised():
+    async def speculative(ctx):
+        raise RuntimeError("guess failed")
+
+    async def answer(ctx):
+        return "ok"
+
+    executor, results = _run([Stage("speculative", speculative, speculative=True), Stage("answer", answer)])
+    assert results == {"answer": "ok"}
+    assert executor.timings["speculative"]["status"] == "failed"
+
+
+def test_a_failing_stage_cancels_the_others():
+    async def failing(ctx):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def long_running(ctx):
+        await asyncio.sleep(5)
+
+    async def dependent(ctx):
+        return "never"
+
+    executor = StageExecutor([
+        Stage("failing", failing),
+        Stage("long_running", long_running),
+        Stage("dependent", dependent, deps=["failing"]),
+    ])
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(executor.run())
+
+    assert executor.timings["failing"]["status"] == "failed"
+    assert executor.timings["long_running"]["status"] == "cancelled"
+    assert executor.timings["dependent"]["start"] is None
+
+
+def test_stages_must_reference_earlier_stages():
+    async def fn(ctx):
+        return None
+
+    with pytest.raises(ValueError):
+        StageExecutor([Stage("b", fn, deps=["a"]), Stage("a", fn)])
+    with pytest.raises(ValueError):
+        StageExecutor([Stage("a", fn), Stage("a", fn)])
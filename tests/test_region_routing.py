@@ -0,0 +1,75 @@
+#test_region_routing.py
+import asyncio
+import pytest
+from backend.memory.chroma_memory import retrieve_data
+from backend.memory.chroma_memory.region_router import NATIONAL_REGION, region_for_pdf, route_query
+
+AVAILABLE = frozenset({"goa", "himachal_pradesh", "ladakh", NATIONAL_REGION})
+
+
+def _hits(*regions):
+    return {
+        "ids": [[f"{region}-{i}" for i, region in enumerate(regions)]],
+        "documents": [[f"About {region}" for region in regions]],
+        "metadatas": [[{"region": region} for region in regions]],
+        "distances": [[-1.0 / (i + 1) for i in range(len(regions))]],
+    }
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Lexical search that finds only national overview chunks unless it searches everything."""
+    calls = []
+
+    def fake_lexical_batch(queries, routes, collection_name, n_results):
+        calls.append(list(routes))
+        return [_hits(NATIONAL_REGION) if route else _hits("goa", NATIONAL_REGION) for route in routes]
+
+    monkeypatch.setattr(retrieve_data, "_lexical_batch", fake_lexical_batch)
+    monkeypatch.setattr(retrieve_data, "get_collection_regions", lambda name: AVAILABLE)
+    monkeypatch.setattr(retrieve_data, "REGION_ROUTING", True)
+    monkeypatch.setattr(retrieve_data, "ROUTING_INCLUDE_NATIONAL", True)
+    return calls
+
+
+@pytest.mark.parametrize("query, regions", [
+    ("Manali to Leh", ["himachal_pradesh", "ladakh"]),
+    ("best time to visit India", []),
+    ("Hotels in Bangalore and Mysore", ["karnataka"]),
+    ("Houseboats in Alleppey, Kerala", ["kerala"]),
+])
+def test_route_query(query, regions):
+    assert route_query(query) == regions
+
+
+def test_region_for_pdf():
+    assert region_for_pdf("Dataset/UT_Ladakh.pdf") == "ladakh"
+    assert region_for_pdf("Dataset/Tamil_Nadu.pdf") == "tamil_nadu"
+
+
+def test_route_adds_national_overview_and_skips_missing_regions(searches):
+    assert retrieve_data._route("Manali to Leh", "travel_data") == ["himachal_pradesh", "ladakh", NATIONAL_REGION]
+    # No Kerala PDF in the collection: search everything
+    assert retrieve_data._route("Houseboats in Kerala", "travel_data") is None
+
+
+def test_routed_query_falls_back_past_national_only_hits(searches):
+    before = retrieve_data.retrieval_stats()["routing"]
+
+    chunks = retrieve_data.retrieve(["Beaches in Goa"], mode="lexical", n_results=2)[0]
+
+    assert searches == [[["goa", NATIONAL_REGION]], [None]]
+    assert [chunk.region for chunk in chunks] == ["goa", NATIONAL_REGION]
+    after = retrieve_data.retrieval_stats()["routing"]
+    assert after["routed"] == before["routed"] + 1
+    assert after["fallback"] == before["fallback"] + 1
+
+
+def test_explicit_regions_do_not_fall_back(searches):
+    before = retrieve_data.retrieval_stats()["routing"]
+
+    chunks = asyncio.run(retrieve_data.aretrieve(["Monasteries"], mode="lexical", n_results=2, regions=["ladakh"]))[0]
+
+    assert searches == [[["ladakh"]]]
+    assert [chunk.region for chunk in chunks] == [NATIONAL_REGION]
+    assert retrieve_data.retrieval_stats()["routing"] == before
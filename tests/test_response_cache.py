@@ -0,0 +1,80 @@
+#test_response_cache.py
+import pytest
+
+import backend.Conversations.response_cache as response_cache
+from backend.Conversations.response_cache import SemanticResponseCache
+from backend.memory.chroma_memory.manifest import bump_generation, load_manifest, save_manifest
+
+ANSWER = {"summary": "Goa beaches", "table": "| Baga |"}
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_path(monkeypatch, tmp_path):
+    # The cache reads the ingestion manifest from the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def test_hit_at_or_above_threshold_miss_below():
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.store("beaches in goa", [1.0, 0.0], ANSWER)
+
+    assert cache.lookup([2.0, 0.1]) == ANSWER          # cosine ~0.999
+    assert cache.lookup([1.0, 1.0]) is None            # cosine ~0.707
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_lookup_returns_a_copy():
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.store("beaches in goa", [1.0, 0.0], ANSWER)
+    cache.lookup([1.0, 0.0])["summary"] = "changed"
+    assert cache.lookup([1.0, 0.0]) == ANSWER
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = SemanticResponseCache(threshold=0.9, ttl_seconds=60)
+    cache.store("beaches in goa", [1.0, 0.0], ANSWER)
+
+    now[0] += 59
+    assert cache.lookup([1.0, 0.0]) == ANSWER
+    now[0] += 2
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticResponseCache(threshold=0.99, max_entries=2)
+    cache.store("a", [1.0, 0.0, 0.0], {"summary": "a"})
+    cache.store("b", [0.0, 1.0, 0.0], {"summary": "b"})
+    assert cache.lookup([1.0, 0.0, 0.0])["summary"] == "a"   # "a" is now the most recent
+
+    cache.store("c", [0.0, 0.0, 1.0], {"summary": "c"})
+    assert cache.lookup([0.0, 1.0, 0.0]) is None             # "b" was evicted
+    assert cache.lookup([1.0, 0.0, 0.0])["summary"] == "a"
+    assert cache.stats()["entries"] == 2
+
+
+def test_reingestion_clears_the_cache(tmp_path):
+    cache = SemanticResponseCache(threshold=0.9, collection_name="travel_data")
+    cache.store("beaches in goa", [1.0, 0.0], ANSWER)
+    assert cache.lookup([1.0, 0.0]) == ANSWER
+
+    manifest = load_manifest()
+    bump_generation(manifest, "travel_data")
+    save_manifest(manifest)
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_other_collections_do_not_invalidate():
+    cache = SemanticResponseCache(threshold=0.9, collection_name="travel_data")
+    cache.store("beaches in goa", [1.0, 0.0], ANSWER)
+
+    manifest = load_manifest()
+    bump_generation(manifest, "other_collection")
+    save_manifest(manifest)
+
+    assert cache.lookup([1.0, 0.0]) == ANSWER
@@ -0,0 +1,106 @@
+#test_vector_index.py
+import uuid
+import numpy as np
+import pytest
+from backend.memory.chroma_memory import chroma_client
+from backend.memory.vector_index.index import VectorIndex
+from backend.memory.vector_index.snapshot import export_collection_snapshot
+
+chromadb = pytest.importorskip("chromadb")
+
+REGIONS = ["goa", "kerala", "ladakh"]
+N_RESULTS = 10
+
+
+def _clustered_vectors(count: int, dim: int, seed: int = 7) -> np.ndarray:
+    """
+    Vectors grouped around a few centres, closer to real embeddings than uniform
+    noise. Documents and queries share the centres and differ in `seed`.
+    """
+    centres = np.random.default_rng(0).standard_normal((12, dim))
+    rng = np.random.default_rng(seed)
+    vectors = centres[rng.integers(0, len(centres), count)] + 0.6 * rng.standard_normal((count, dim))
+    return vectors.astype(np.float32)
+
+
+@pytest.fixture
+def snapshot_of(tmp_path, monkeypatch):
+    """Load vectors into an in-memory Chroma collection and export its snapshot."""
+    client = chromadb.EphemeralClient()
+    collections = {}
+    monkeypatch.setattr(chroma_client, "get_chroma_collection", lambda name: collections[name])
+
+    def _snapshot(vectors: np.ndarray, metric: str, **export_options):
+        name = f"parity_{metric}_{uuid.uuid4().hex[:8]}"
+        collection = client.create_collection(name, metadata={"hnsw:space": metric, "hnsw:search_ef": 2000})
+        ids = [f"chunk-{i}" for i in range(len(vectors))]
+        collection.add(
+            ids=ids,
+            embeddings=vectors.tolist(),
+            documents=[f"document {i}" for i in range(len(vectors))],
+            metadatas=[{"region": REGIONS[i % len(REGIONS)]} for i in range(len(vectors))],
+        )
+        collections[name] = collection
+        path = export_collection_snapshot(
+            name,
+            path=str(tmp_path / f"{name}.snapshot"),
+            dtype="float32",
+            manifest_path=str(tmp_path / "manifest.json"),
+            **export_options,
+        )
+        return collection, VectorIndex(path)
+
+    yield _snapshot
+    for name in list(collections):
+        client.delete_collection(name)
+
+
+@pytest.mark.parametrize("metric", ["cosine", "l2", "ip"])
+@pytest.mark.parametrize("regions", [None, ["goa", "ladakh"]])
+def test_snapshot_matches_chroma(snapshot_of, metric, regions):
+    vectors = _clustered_vectors(600, 32)
+    collection, index = snapshot_of(vectors, metric)
+    queries = _clustered_vectors(5, 32, seed=11)
+
+    where = {"region": {"$in": regions}} if regions else None
+    expected = collection.query(query_embeddings=queries.tolist(), n_results=N_RESULTS, where=where)
+    actual = index.query(queries, n_results=N_RESULTS, first_stage="none", nprobe=0, regions=regions)
+
+    assert actual["ids"] == expected["ids"]
+    np.testing.assert_allclose(actual["distances"], expected["distances"], rtol=1e-4, atol=1e-4)
+    if regions:
+        assert {meta["region"] for hits in actual["metadatas"] for meta in hits} <= set(regions)
+    index.close()
+
+
+def _recall(index: VectorIndex, queries: np.ndarray, regions=None, **search_options) -> float:
+    """Share of the exact top results that the approximate search also returns."""
+    exact = index.search(queries, n_results=N_RESULTS, first_stage="none", nprobe=0, regions=regions)
+    approximate = index.search(queries, n_results=N_RESULTS, nprobe=0, regions=regions, **search_options)
+    found = sum(
+        len({row for row, _ in exact_hits} & {row for row, _ in approx_hits})
+        for exact_hits, approx_hits in zip(exact, approximate)
+    )
+    return found / (N_RESULTS * len(queries))
+
+
+@pytest.mark.parametrize("metric", ["cosine", "l2"])
+def test_quantized_first_stage_recall(snapshot_of, metric):
+    _, index = snapshot_of(_clustered_vectors(3000, 384), metric, quantization=["binary", "int8"])
+    queries = _clustered_vectors(20, 384, seed=11)
+
+    for first_stage in ["binary", "int8"]:
+        for regions in [None, ["kerala"]]:
+            assert _recall(index, queries, regions, first_stage=first_stage) >= 0.95, (first_stage, regions)
+    index.close()
+
+
+def test_matryoshka_first_stage_recall(snapshot_of):
+    _, index = snapshot_of(_clustered_vectors(3000, 384), "cosine", matryoshka_dims=[128, 256])
+    queries = _clustered_vectors(20, 384, seed=11)
+
+    for regions in [None, ["kerala"]]:
+        assert _recall(index, queries, regions, first_stage="matryoshka") >= 0.95, regions
+    with pytest.raises(ValueError):
+        index.search(queries, n_results=N_RESULTS, first_stage="matryoshka", matryoshka_dim=64)
+    index.close()